@@ -0,0 +1,199 @@
+# This Python file uses the following encoding: utf-8
+"""
+ Shared fixtures of the benchmarks: paced and powered up simulators,
+ a hidraw device on a FIFO, the offscreen main window, timing and printing
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+import tempfile
+import tracemalloc
+import contextlib
+from commands import POWER_UP_COMMAND
+from simulator import SimulatedDevice
+
+
+class PacedDevice:
+    """
+        Fake device producing one 40 bytes report every period
+        ...
+    Attributes:
+        produced: list, time.perf_counter_ns() of each produced report
+    """
+
+    def __init__(self, period, count):
+        """ initializes PacedDevice class """
+        self.period = period
+        self.count = count
+        self.produced = []
+        self.reports = queue.Queue()
+        self.feeder = threading.Thread(target=self.feed, daemon=True)
+
+    def start(self):
+        self.feeder.start()
+
+    def feed(self):
+        """Produces the reports at the given period"""
+        start = time.perf_counter()
+        for i in range(self.count):
+            delay = start + i * self.period - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            report = bytes((0x32, i & 0xFF, i >> 8)) + bytes(37)
+            self.produced.append(time.perf_counter_ns())
+            self.reports.put(report)
+
+    def read(self, size, timeout=None):
+        try:
+            return self.reports.get(timeout=None if timeout is None else timeout / 1000)
+        except queue.Empty:
+            return b""
+
+
+def percentile(values, p):
+    """Returns the p percentile (0..100) of values"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def measure(decode, reports, count):
+    """Decodes count reports in turn
+
+    Args:
+        decode: callable(report)
+        reports: list of bytes
+        count: int, number of decoded reports
+
+    Returns:
+        results: dict, reports/s, p50/p99 latency (µs) and Python heap
+            bytes allocated per report at peak (tracemalloc)
+    """
+    latency = [0] * count
+    size = len(reports)
+    clock = time.perf_counter_ns
+    start = clock()
+    for i in range(count):
+        t = clock()
+        decode(reports[i % size])
+        latency[i] = clock() - t
+    elapsed = clock() - start
+
+    allocated = 0
+    samples = min(count, 1000)
+    tracemalloc.start()
+    for i in range(samples):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        decode(reports[i % size])
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return {
+        "reports/s": round(count * 1e9 / elapsed),
+        "p50 us": round(percentile(latency, 50) / 1e3, 3),
+        "p99 us": round(percentile(latency, 99) / 1e3, 3),
+        "alloc B/report": round(allocated / samples),
+    }
+
+
+def timeCalls(call, count):
+    """Returns the mean cost of call() in ns"""
+    start = time.perf_counter_ns()
+    for i in range(count):
+        call()
+    return (time.perf_counter_ns() - start) / count
+
+
+def poweredSimulator(channel=8960, **options):
+    """Returns a SimulatedDevice powered up and tuned to channel
+
+    Args:
+        channel: int, tuned channel
+        options: SimulatedDevice arguments, unpaced (rate None) by default
+    """
+    options.setdefault("rate", None)
+    device = SimulatedDevice(**options)
+    device.write(POWER_UP_COMMAND)
+    device.tune(channel)
+    return device
+
+
+def offscreenApplication():
+    """Returns the QApplication, on the offscreen platform unless QT_QPA_PLATFORM is set
+
+    Raises:
+        ImportError: PySide6 is not installed
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+def simulatedWindow(device=None):
+    """Returns the main window (not shown) reading device, an unpaced
+    simulator by default, without RDS cache file
+
+    Raises:
+        ImportError: PySide6 is not installed or MainWindow.py not generated
+    """
+    from fm import Fm
+    return Fm(device=device if device is not None else SimulatedDevice(rate=None), rdsCachePath=None)
+
+
+def generatedReports(count=64):
+    """Reports of every response code, generated by the simulator
+
+    Returns:
+        reports: dict, response code -> list of bytes
+    """
+    device = poweredSimulator()
+    return {
+        0x08: [device.partInfo()],
+        0x09: [device.systemState()],
+        0x12: [device.functionInfo()],
+        0x32: [device.rsqStatus() for i in range(count)],
+        0x33: [device.acfStatus() for i in range(count)],
+        # A whole RDS cycle: 0A, 2A and 4A groups
+        0x34: [device.rdsStatus() for i in range(len(device._groups))],
+    }
+
+
+@contextlib.contextmanager
+def fifoDevice():
+    """(HidrawDevice, writer fd) on a FIFO standing for /dev/hidrawN, None off Linux"""
+    if not sys.platform.startswith("linux"):
+        yield None, None
+        return
+    from hid import HidrawDevice
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "hidraw0")
+        os.mkfifo(path)
+        device = HidrawDevice(path=path)
+        writer = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        try:
+            yield device, writer
+        finally:
+            os.close(writer)
+            device.close()
+
+
+def printResults(results):
+    for name, metrics in results.items():
+        print("{:<20} ".format(name) + "  ".join("{}: {}".format(key, value) for key, value in metrics.items()))
+
+
+def reportIndex(report):
+    return report[1] + report[2] * 256
+
+
+def printLatency(name, latency, count):
+    print("{:<16} {:>6} / {:<6} reports  p50 {:>10.3f} ms  p99 {:>10.3f} ms".format(
+        name, len(latency), count, percentile(latency, 50) / 1e6, percentile(latency, 99) / 1e6))
@@ -0,0 +1,313 @@
+# This Python file uses the following encoding: utf-8
+"""
+ GUI benchmarks (offscreen Qt): decoding in the main window, view model,
+ custom widgets and the window under load
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import io
+import time
+import contextlib
+from simulator import SimulatedDevice
+from rds import RdsDecoder, Header, Switches, PsSegment, RtSegment
+from reports import parseReport
+from viewmodel import ViewModel
+from benchcommon import (percentile, measure, generatedReports, printResults, poweredSimulator, offscreenApplication,
+                         simulatedWindow)
+
+
+def benchDecode(count=20000):
+    """Fm.onRead decode throughput per response code (offscreen Qt)"""
+    try:
+        app = offscreenApplication()
+        window = simulatedWindow()
+    except ImportError as error:
+        print("skipped: " + str(error))
+        return {}
+    window.show()
+
+    def decode(report):
+        window.bufferIn = report
+        window.onRead()
+
+    results = {}
+    # partInfo, systemState and firmwareRevision print on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        for code, reports in generatedReports().items():
+            results["onRead 0x{:02X}".format(code)] = measure(decode, reports, count)
+            app.processEvents()
+    window.close()
+    printResults(results)
+    return results
+
+
+class CountingWidget:
+    """Stands for a widget, counts the property changes it gets"""
+    calls = 0
+
+    def setText(self, value):
+        CountingWidget.calls += 1
+
+    setValue = setText
+
+
+def benchViewModel(seconds=60, rate=100, frameRate=30):
+    """Widget calls per second of a stable station: direct setters against the view model"""
+    device = poweredSimulator()
+    reports = [device.read(40) for i in range(seconds * rate)]
+    widgets = [CountingWidget() for i in range(17)]
+    setters = [widget.setText for widget in widgets]
+
+    def decode(report, decoder, set):
+        # The widget properties set by fmRsqStatus, fmAcfStatus and fmRdsStatus
+        record = parseReport(report)
+        if report[0] == 0x32:
+            set(setters[0], str(record.channel))
+            set(setters[1], str(record.rssi) + " dBµV")
+            set(setters[2], record.rssi + 128)
+            set(setters[3], str(record.snr) + " dB")
+            set(setters[4], record.snr + 128)
+        elif report[0] == 0x33:
+            set(setters[5], str(record.highCut / 10) + " Khz")
+            set(setters[6], record.blend)
+        elif report[0] == 0x34:
+            for event in decoder.decodeGroup(record.a, record.b, record.c, record.d):
+                if type(event) is Header:
+                    set(setters[7], "{:04X}".format(event.pi))
+                    set(setters[8], event.tp)
+                elif type(event) is Switches:
+                    set(setters[9], event.ta)
+                    set(setters[10], event.ms)
+                    set(setters[11 + event.segment], event.di)
+                elif type(event) is PsSegment:
+                    set(setters[15], event.ps)
+                elif type(event) is RtSegment:
+                    set(setters[16], event.rt)
+
+    results = {}
+    CountingWidget.calls = 0
+    decoder = RdsDecoder()
+    start = time.perf_counter()
+    for report in reports:
+        decode(report, decoder, lambda setter, value: setter(value))
+    results["direct"] = {"widget calls/s": round(CountingWidget.calls / seconds),
+                         "decode us/report": round((time.perf_counter() - start) * 1e6 / len(reports), 2)}
+
+    CountingWidget.calls = 0
+    decoder = RdsDecoder()
+    view = ViewModel()
+    perFrame = rate // frameRate
+    start = time.perf_counter()
+    for i, report in enumerate(reports):
+        decode(report, decoder, view.set)
+        if i % perFrame == perFrame - 1:
+            view.flush()
+    results["ViewModel"] = {"widget calls/s": round(CountingWidget.calls / seconds),
+                            "decode us/report": round((time.perf_counter() - start) * 1e6 / len(reports), 2),
+                            "frames/s": round(view.flushCount / seconds, 1)}
+    printResults(results)
+    return results
+
+
+def benchDisplay(count=2000):
+    """RadioFMDisplay: needle moves repainted from the cached scale (offscreen Qt)"""
+    try:
+        app = offscreenApplication()
+        from radiofmdisplay import RadioFMDisplay
+    except ImportError as error:
+        print("skipped: " + str(error))
+        return {}
+
+    display = RadioFMDisplay()
+    display.resize(600, 60)
+    display.show()
+    app.processEvents()
+    results = {}
+    def fullRedraw(value):
+        # Before: the whole scale drawn again on every value
+        display.setValue(value)
+        display.scale = None
+        display.repaint()
+
+    def dirtyNeedle(value):
+        display.setValue(value)
+        app.processEvents()
+
+    for name, move in (("full redraw", fullRedraw), ("cached scale, dirty needle", dirtyNeedle)):
+        display.paintCount = display.scaleCount = 0
+        start = time.perf_counter_ns()
+        for i in range(count):
+            move(880 + i % 200)
+        results[name] = {"us/frame": round((time.perf_counter_ns() - start) / count / 1e3, 1),
+                         "scale draws": display.scaleCount}
+    display.close()
+    printResults(results)
+    return results
+
+
+def benchLed(count=2000, leds=16):
+    """QLed paint time: SVG parsed and rendered per paint against the pixmap cache (offscreen Qt)"""
+    try:
+        app = offscreenApplication()
+        from PySide6.QtWidgets import QWidget, QHBoxLayout
+        from qled import QLed
+    except ImportError as error:
+        print("skipped: " + str(error))
+        return {}
+
+    window = QWidget()
+    layout = QHBoxLayout(window)
+    panel = [QLed() for i in range(leds)]
+    for led in panel:
+        layout.addWidget(led)
+    window.resize(leds * 40, 40)
+    window.show()
+    app.processEvents()
+
+    def blink(uncached):
+        # Every LED toggles at each frame, like RDS activity LEDs
+        start = time.perf_counter_ns()
+        for i in range(count // leds):
+            for led in panel:
+                if uncached:
+                    # What every paint did before
+                    QLed.clearCache()
+                led.toggleValue()
+                led.repaint()
+        return (time.perf_counter_ns() - start) / (count // leds * leds)
+
+    results = {"parse and render": {"us/paint": round(blink(True) / 1e3, 1)}}
+    QLed.cacheHits = QLed.cacheMisses = 0
+    results["pixmap cache"] = {"us/paint": round(blink(False) / 1e3, 1),
+                               "hit %": round(100 * QLed.cacheHits / max(1, QLed.cacheHits + QLed.cacheMisses), 1)}
+    window.close()
+    printResults(results)
+    return results
+
+
+def benchGui(rates=(100, 300, 1000, 3000, 10000, 30000, 100000), duration=2.0):
+    """Main window under simulated load (offscreen Qt): loop lag, paint time, GUI CPU"""
+    try:
+        app = offscreenApplication()
+        from PySide6.QtCore import QTimer, QEventLoop
+        from fm import Fm
+        from radiofmdisplay import RadioFMDisplay
+        from qled import QLed
+        from toggle import Toggle
+    except ImportError as error:
+        print("skipped: " + str(error))
+        return {}
+
+    # Paint time of the custom widgets, measured around their paintEvent
+    paintTimes = {}
+    originals = {}
+
+    def timedPaint(cls):
+        original = originals[cls] = cls.paintEvent
+
+        def paintEvent(self, e):
+            start = time.perf_counter_ns()
+            original(self, e)
+            paintTimes.setdefault(cls.__name__, []).append(time.perf_counter_ns() - start)
+        cls.paintEvent = paintEvent
+
+    for cls in (RadioFMDisplay, QLed, Toggle):
+        timedPaint(cls)
+
+    results = {}
+    keepsUp = 0
+    fallenBehind = False
+    try:
+        for rate in rates:
+            device = SimulatedDevice(rate=rate, queueSize=4096)
+            window = Fm(device=device, rdsCachePath=None)
+            # Activity LED and toggle switch blinking at the RDS group rate
+            led = QLed()
+            toggle = Toggle()
+            window.layoutPower.addWidget(led)
+            window.layoutPower.addWidget(toggle)
+            window.show()
+            with contextlib.redirect_stdout(io.StringIO()):
+                window.open()
+                loop = QEventLoop()
+                QTimer.singleShot(300, loop.quit)
+                loop.exec()
+
+                lag = []
+                last = [time.perf_counter()]
+
+                def probe():
+                    now = time.perf_counter()
+                    lag.append(now - last[0] - 0.010)
+                    last[0] = now
+
+                def blink():
+                    led.toggleValue()
+                    toggle.setChecked(not toggle.isChecked())
+
+                channels = [station.channel for station in device.stations]
+
+                def tune():
+                    # A new station every 500 ms moves the needle and restarts RDS
+                    channels.append(channels.pop(0))
+                    window.tuneChannel(channels[0])
+
+                probeTimer = QTimer()
+                probeTimer.timeout.connect(probe)
+                probeTimer.start(10)
+                blinkTimer = QTimer()
+                blinkTimer.timeout.connect(blink)
+                blinkTimer.start(88)
+                tuneTimer = QTimer()
+                tuneTimer.timeout.connect(tune)
+                tuneTimer.start(500)
+                paintTimes.clear()
+                window.decodeLatency.clear()
+                reportCount = window.reader.reportCount
+                droppedCount = window.reader.droppedCount
+                cpu = time.thread_time()
+                start = time.perf_counter()
+                QTimer.singleShot(int(duration * 1000), loop.quit)
+                last[0] = time.perf_counter()
+                loop.exec()
+                elapsed = time.perf_counter() - start
+                cpu = time.thread_time() - cpu
+                probeTimer.stop()
+                blinkTimer.stop()
+                tuneTimer.stop()
+                read = (window.reader.reportCount - reportCount) / elapsed
+                dropped = window.reader.droppedCount - droppedCount
+                largestBatch = window.reader.largestBatch
+                window.close()
+            window.writer.stop()
+            window.hide()
+            window.deleteLater()
+            app.processEvents()
+
+            latency = list(window.decodeLatency)
+            lagP99 = percentile(lag, 99) * 1e3 if lag else 0
+            decodeP99 = percentile(latency, 99) / 1e6 if latency else 0
+            behind = dropped > 0 or lagP99 > 50 or decodeP99 > 100 or read < 0.9 * rate
+            if behind:
+                fallenBehind = True
+            elif not fallenBehind:
+                keepsUp = rate
+            metrics = {"read/s": round(read), "dropped": dropped, "largest batch": largestBatch,
+                       "decode p99 ms": round(decodeP99, 2),
+                       "loop lag p50 ms": round(max(0, percentile(lag, 50)) * 1e3, 2) if lag else 0,
+                       "loop lag p99 ms": round(lagP99, 2),
+                       "GUI CPU %": round(100 * cpu / elapsed, 1)}
+            for name, times in sorted(paintTimes.items()):
+                metrics[name + " paint us"] = round(percentile(times, 50) / 1e3, 1)
+            if behind:
+                metrics["behind"] = True
+            results["{} reports/s".format(rate)] = metrics
+    finally:
+        for cls, original in originals.items():
+            cls.paintEvent = original
+    printResults(results)
+    print("keeps up to {} reports/s".format(keepsUp) if keepsUp else "falls behind at {} reports/s".format(rates[0]))
+    results["keeps up to"] = {"reports/s": keepsUp}
+    return results
@@ -0,0 +1,668 @@
+# This Python file uses the following encoding: utf-8
+"""
+ HID benchmarks: reading, writing, transactions, scan, trace and capture replay
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import os
+import io
+import sys
+import time
+import queue
+import asyncio
+import errno
+import random
+import ctypes
+import threading
+import tempfile
+import contextlib
+from hidreader import HidReader, ReportPool
+from commandwriter import CommandWriter
+from hiderrors import RetryPolicy, ErrorStats
+from commands import PROPERTY_VOLUME, PROPERTY_MUTE, POWER_UP_COMMAND, SEEK_UP_COMMAND
+from commands import tuneCommand, setPropertyCommand
+from transactions import TransactionManager
+from scanner import BandScanner
+from simulator import SimulatedDevice
+from rds import RdsDecoder
+from reports import parseReport
+from hidtrace import TraceBuffer, IN
+from capture import CaptureWriter, CaptureReader, replay
+from benchcommon import (PacedDevice, percentile, measure, timeCalls, generatedReports, fifoDevice, printResults,
+                         reportIndex, printLatency, poweredSimulator, offscreenApplication, simulatedWindow)
+
+
+def benchReader(rate=200, duration=2.0):
+    """Report-to-decode latency: reader thread against the 50 ms timer poll"""
+    count = int(rate * duration)
+
+    # Reader thread
+    device = PacedDevice(1 / rate, count)
+    latency = []
+
+    def onReport(report, timestamp):
+        latency.append(time.perf_counter_ns() - device.produced[reportIndex(report)])
+
+    reader = HidReader(device, onReport)
+    reader.start()
+    device.start()
+    device.feeder.join()
+    time.sleep(0.1)
+    reader.stop()
+    printLatency("reader thread", latency, count)
+
+    # Timer poll, one read(timeout=1) every 50 ms
+    device = PacedDevice(1 / rate, count)
+    latency = []
+    device.start()
+    tick = time.perf_counter()
+    end = tick + duration + 0.1
+    while tick < end:
+        tick += 0.05
+        time.sleep(max(0.0, tick - time.perf_counter()))
+        report = device.read(40, 1)
+        if report:
+            latency.append(time.perf_counter_ns() - device.produced[reportIndex(report)])
+    printLatency("timer 50 ms", latency, count)
+
+
+def benchDrain(rate=1000, duration=2.0, repaint=0.002):
+    """Backlog at peak rate: one wake-up per report against drained batches"""
+    count = int(rate * duration)
+
+    # GUI thread model, one repaint per wake-up
+    events = queue.Queue()
+
+    def guiLoop(handler):
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            handler(event)
+            time.sleep(repaint)
+
+    # One queued event per report
+    device = PacedDevice(1 / rate, count)
+    backlog = []
+    gui = threading.Thread(target=guiLoop, args=(lambda event: backlog.append(events.qsize()),))
+    gui.start()
+    reader = HidReader(device, lambda report, timestamp: events.put(report))
+    reader.start()
+    device.start()
+    device.feeder.join()
+    reader.stop()
+    events.put(None)
+    gui.join()
+    print("{:<16} {:>6} wake-ups  max backlog {:>6} reports".format("per report", len(backlog), max(backlog)))
+
+    # Drain mode
+    device = PacedDevice(1 / rate, count)
+    decoded = []
+    reader = HidReader(device, onPending=lambda: events.put(True))
+    gui = threading.Thread(target=guiLoop, args=(lambda event: decoded.append(len(reader.takePending()[0])),))
+    gui.start()
+    reader.start()
+    device.start()
+    device.feeder.join()
+    time.sleep(0.1)
+    reader.stop()
+    events.put(None)
+    gui.join()
+    print("{:<16} {:>6} wake-ups  max backlog {:>6} reports  {} decoded, read passes {}".format(
+        "drain", len(decoded), reader.largestBatch, sum(decoded), sorted(reader.readSizes.items())))
+
+
+def benchNotifier(rate=1000, duration=2.0):
+    """Report-to-decode latency on a hidraw FIFO: reader thread against QSocketNotifier (Qt event loop)"""
+    try:
+        # A QApplication, the GUI benchmarks run after this one in the same process
+        app = offscreenApplication()
+        from PySide6.QtCore import QObject, QSocketNotifier, QTimer, QEventLoop, Signal
+    except ImportError as error:
+        print("skipped: " + str(error))
+        return {}
+    if not sys.platform.startswith("linux"):
+        print("skipped: hidraw backend is Linux only")
+        return {}
+
+    class Pending(QObject):
+        reportsPending = Signal()
+
+    count = int(rate * duration)
+    results = {}
+    for name in ("reader thread", "notifier"):
+        with fifoDevice() as (device, writer):
+            produced = []
+            latency = []
+
+            def decode(reports):
+                now = time.perf_counter_ns()
+                latency.extend(now - produced[reportIndex(report)] for report in reports)
+
+            if name == "reader thread":
+                pending = Pending()
+                reader = HidReader(device, onPending=pending.reportsPending.emit)
+                pending.reportsPending.connect(lambda: decode(reader.takePending()[0]))
+                reader.start()
+            else:
+                notifier = QSocketNotifier(device.fileno(), QSocketNotifier.Type.Read)
+                notifier.activated.connect(lambda: decode(device.read_many(64, 40, 0)))
+
+            def feed():
+                start = time.perf_counter()
+                for i in range(count):
+                    delay = start + i / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    produced.append(time.perf_counter_ns())
+                    os.write(writer, bytes((0x32, i & 0xFF, i >> 8)) + bytes(37))
+
+            feeder = threading.Thread(target=feed, daemon=True)
+            cpu = time.process_time()
+            feeder.start()
+            loop = QEventLoop()
+            QTimer.singleShot(int(duration * 1000) + 200, loop.quit)
+            loop.exec()
+            cpu = time.process_time() - cpu
+            feeder.join()
+            if name == "reader thread":
+                reader.stop()
+            else:
+                notifier.setEnabled(False)
+            app.processEvents()
+        printLatency(name, latency, count)
+        results["hidraw " + name] = {"p50 ms": round(percentile(latency, 50) / 1e6, 3),
+                                     "p99 ms": round(percentile(latency, 99) / 1e6, 3),
+                                     "cpu ms": round(cpu * 1000)}
+    printResults(results)
+    return results
+
+
+def benchSimulator(count=200000):
+    """Load generator: unpaced simulator reports read through HidReader"""
+    device = poweredSimulator()
+    done = threading.Event()
+    codes = {}
+
+    def onReport(report, timestamp):
+        codes[report[0]] = codes.get(report[0], 0) + 1
+        if reader.reportCount >= count:
+            done.set()
+
+    reader = HidReader(device, onReport)
+    start = time.perf_counter()
+    reader.start()
+    done.wait()
+    elapsed = time.perf_counter() - start
+    reader.stop()
+    print("{:>10.0f} reports/s  {}".format(
+        reader.reportCount / elapsed, ", ".join("0x{:02X}: {}".format(*item) for item in sorted(codes.items()))))
+
+
+def benchParse(count=100000):
+    """Report parsing throughput per response code"""
+    results = {}
+    for code, reports in generatedReports().items():
+        results["parse 0x{:02X}".format(code)] = measure(parseReport, reports, count)
+    printResults(results)
+    return results
+
+
+def benchReadinto(count=200000):
+    """Per-read cost: hid.Device.read() against readinto() in a ReportPool"""
+    size = 40
+    pool = ReportPool(size)
+    array = pool.arrays[0]
+
+    # What read() does around hid_read_timeout: allocate, then copy out
+    def bufferOfRead():
+        data = ctypes.create_string_buffer(size)
+        return data.raw[:size]
+
+    results = {"read() buffers": {"ns/read": round(timeCalls(bufferOfRead, count))}}
+
+    # Through the simulator (no hidapi call, Python side only)
+    device = poweredSimulator()
+    results["simulator read"] = {"ns/read": round(timeCalls(lambda: device.read(size, 0), count))}
+
+    def poolRead():
+        pool.release(pool.readinto(device, 0))
+
+    results["simulator pool"] = {"ns/read": round(timeCalls(poolRead, count))}
+
+    # hidraw backend on a FIFO: real os.read()/os.readv() calls, reports waiting
+    with fifoDevice() as (device, writer):
+        if device is not None:
+            block = bytes(range(size)) * 1600
+
+            def fifoReads(read):
+                elapsed = 0
+                for i in range(count // 1600):
+                    os.write(writer, block)
+                    start = time.perf_counter_ns()
+                    for j in range(1600):
+                        read()
+                    elapsed += time.perf_counter_ns() - start
+                return round(elapsed / (count // 1600 * 1600))
+
+            results["hidraw read()"] = {"ns/read": fifoReads(lambda: device.read(size, 0))}
+            results["hidraw readinto()"] = {"ns/read": fifoReads(lambda: device.readinto(array, 0))}
+            results["hidraw pool"] = {"ns/read": fifoReads(poolRead)}
+
+    # Real device, idle: read(timeout=0) returns nothing, only the call cost is measured
+    try:
+        import hid
+        device = hid.Device(vid=0x1234, pid=0x4684)
+    except Exception as error:
+        print("hid.Device skipped: " + str(error))
+    else:
+        with device:
+            results["hid read()"] = {"ns/read": round(timeCalls(lambda: device.read(size, 0), count))}
+            results["hid readinto()"] = {"ns/read": round(timeCalls(lambda: device.readinto(array, 0), count))}
+    printResults(results)
+    return results
+
+
+def bulkCalls(device, count, wait):
+    """Calls/s of read()/write() loops against read_many()/write_many()
+
+    Args:
+        device: hid.Device or SimulatedDevice, powered up
+        count: int, reports per pass
+        wait: callable(), lets reports queue up before a read pass
+    """
+    # SET_PROPERTY 0x0301 (mute) to 0, harmless
+    command = bytes((0x00, 0x13, 0x00, 0x01, 0x03, 0x00, 0x00)) + bytes(9)
+    buffer = bytearray(count * 40)
+    passes = 20
+    elapsed = {"read()": 0, "read_many()": 0, "read_many(out)": 0, "write()": 0, "write_many()": 0}
+    reports = dict.fromkeys(elapsed, 0)
+
+    for i in range(passes):
+        for name in ("read()", "read_many()", "read_many(out)"):
+            wait()
+            start = time.perf_counter_ns()
+            if name == "read()":
+                read = 0
+                while read < count and device.read(40, 0):
+                    read += 1
+            elif name == "read_many()":
+                read = len(device.read_many(count, 40, 0))
+            else:
+                read = len(device.read_many(count, 40, 0, buffer))
+            elapsed[name] += time.perf_counter_ns() - start
+            reports[name] += read
+
+        start = time.perf_counter_ns()
+        for j in range(count):
+            device.write(command)
+        elapsed["write()"] += time.perf_counter_ns() - start
+        start = time.perf_counter_ns()
+        device.write_many([command] * count)
+        elapsed["write_many()"] += time.perf_counter_ns() - start
+        reports["write()"] += count
+        reports["write_many()"] += count
+
+    return {name: {"calls/s": round(reports[name] * 1e9 / elapsed[name]) if elapsed[name] else 0}
+            for name in elapsed}
+
+
+def benchBulk(count=30):
+    """Bulk read_many()/write_many() against read()/write() loops"""
+    device = poweredSimulator()
+    results = {"simulator " + name: metrics for name, metrics in bulkCalls(device, count, lambda: None).items()}
+
+    with fifoDevice() as (device, writer):
+        if device is not None:
+            block = bytes(40) * count
+
+            def refill():
+                # Empties the commands written back into the FIFO, then queues count reports
+                while device.read(4096, 0):
+                    pass
+                os.write(writer, block)
+
+            fifo = bulkCalls(device, count, refill)
+            results.update({"hidraw " + name: metrics for name, metrics in fifo.items()})
+
+    try:
+        import hid
+        device = hid.Device(vid=0x1234, pid=0x4684)
+    except Exception as error:
+        print("hid.Device skipped: " + str(error))
+    else:
+        with device:
+            device.write(POWER_UP_COMMAND)
+            # Let the tuner fill the hidapi queue before each read pass
+            real = bulkCalls(device, count, lambda: time.sleep(0.5))
+            device.write(bytes(16))
+        results.update({"hid " + name: metrics for name, metrics in real.items()})
+    printResults(results)
+    return results
+
+
+def benchAsync(count=100000):
+    """AsyncDevice throughput against the sync read() loop"""
+    device = poweredSimulator()
+    start = time.perf_counter_ns()
+    for i in range(count):
+        device.read(40)
+    results = {"sync read()": {"reports/s": round(count * 1e9 / (time.perf_counter_ns() - start))}}
+
+    try:
+        import hid
+    except ImportError as error:
+        print("skipped: " + str(error))
+        return results
+
+    async def readAll(asyncDevice):
+        start = time.perf_counter_ns()
+        read = 0
+        async for report in asyncDevice:
+            read += 1
+            if read == count:
+                break
+        elapsed = time.perf_counter_ns() - start
+        await asyncDevice.close()
+        return {"reports/s": round(count * 1e9 / elapsed), "dropped": asyncDevice.dropped}
+
+    results["AsyncDevice"] = asyncio.run(readAll(hid.AsyncDevice(poweredSimulator(), size=40)))
+
+    # Commands sent while reports stream in
+    async def writeWhileReading(asyncDevice):
+        reading = asyncio.ensure_future(readAll(asyncDevice))
+        latency = []
+        for i in range(200):
+            start = time.perf_counter_ns()
+            await asyncDevice.write(setPropertyCommand(PROPERTY_VOLUME, i & 0x3F))
+            latency.append(time.perf_counter_ns() - start)
+        await reading
+        return {"write p50 us": round(percentile(latency, 50) / 1e3, 1),
+                "write p99 us": round(percentile(latency, 99) / 1e3, 1)}
+
+    results["AsyncDevice write"] = asyncio.run(writeWhileReading(hid.AsyncDevice(poweredSimulator(), size=40)))
+    printResults(results)
+    return results
+
+
+class SlowWriteDevice(SimulatedDevice):
+    """Simulator whose write() takes as long as an USB interrupt transfer"""
+
+    def __init__(self, writeTime=0.002):
+        super().__init__(rate=None)
+        self.writeTime = writeTime
+
+    def write(self, data):
+        time.sleep(self.writeTime)
+        return super().write(data)
+
+
+def benchWriter(ticks=200, tickPeriod=0.001):
+    """Volume bar drag: a write per valueChanged against the command writer"""
+    def drag(setVolume):
+        latency = []
+        for i in range(ticks):
+            start = time.perf_counter_ns()
+            setVolume(i % 64)
+            latency.append(time.perf_counter_ns() - start)
+            time.sleep(tickPeriod)
+        return latency
+
+    results = {}
+    device = SlowWriteDevice()
+    start = time.perf_counter()
+    latency = drag(lambda value: device.write(setPropertyCommand(PROPERTY_VOLUME, value)))
+    results["write per tick"] = {"USB writes": len(device.written),
+                                 "tick p99 us": round(percentile(latency, 99) / 1e3, 1),
+                                 "settled ms": round((time.perf_counter() - start) * 1e3, 1)}
+
+    device = SlowWriteDevice()
+    writer = CommandWriter(device)
+    writer.start()
+    start = time.perf_counter()
+    latency = drag(lambda value: writer.setProperty(PROPERTY_VOLUME, value))
+    writer.stop()
+    results["CommandWriter"] = {"USB writes": len(device.written),
+                                "tick p99 us": round(percentile(latency, 99) / 1e3, 1),
+                                "settled ms": round((time.perf_counter() - start) * 1e3, 1),
+                                "coalesced": writer.coalescedCount}
+    printResults(results)
+    return results
+
+
+class FlakyDevice(SlowWriteDevice):
+    """Simulator on a bad cable: a write fails with EIO with probability failRate"""
+
+    def __init__(self, failRate=0.1, seed=1):
+        super().__init__()
+        self.failRate = failRate
+        self.random = random.Random(seed)
+
+    def write(self, data):
+        if self.random.random() < self.failRate:
+            raise OSError(errno.EIO, "Input/output error")
+        return super().write(data)
+
+
+def benchErrors(count=300, failRate=0.1):
+    """Bad cable: commands delivered without retry against the retry policy"""
+    results = {}
+    for name, retry in (("no retry", RetryPolicy(retries=0)), ("RetryPolicy", RetryPolicy())):
+        device = FlakyDevice(failRate)
+        errors = ErrorStats()
+        failed = []
+        writer = CommandWriter(device, minGap=0, onError=lambda error, command: failed.append(error),
+                               retry=retry, errors=errors)
+        writer.start()
+        latency = []
+        start = time.perf_counter()
+        for i in range(count):
+            begin = time.perf_counter_ns()
+            writer.send(tuneCommand(8750 + 10 * (i % 200)))
+            latency.append(time.perf_counter_ns() - begin)
+        while writer.pending():
+            time.sleep(0.001)
+        writer.stop()
+        results[name] = {"delivered %": round(100 * writer.writeCount / count, 1),
+                         "reported": len(failed),
+                         "retried": errors.retryCount,
+                         "recovered": errors.recoveredCount,
+                         "send p99 us": round(percentile(latency, 99) / 1e3, 1),
+                         "settled ms": round((time.perf_counter() - start) * 1e3, 1)}
+    printResults(results)
+    return results
+
+
+def benchTransactions(rounds=20, rate=1000):
+    """Scripted band walk: awaited tune/seek transactions, round trip times"""
+    device = SimulatedDevice(rate=rate)
+    manager = None
+    writer = CommandWriter(device, minGap=0, onWrite=lambda command, transaction: manager.sent(command, transaction))
+    manager = TransactionManager(writer.send)
+    reader = HidReader(device, lambda report, timestamp: manager.onReport(parseReport(report)))
+    writer.start()
+    reader.start()
+
+    manager.submit(POWER_UP_COMMAND).wait()
+    channels = [station.channel for station in device.stations]
+    start = time.perf_counter()
+    for i in range(rounds):
+        for channel in channels:
+            manager.submit(tuneCommand(channel)).wait()
+        manager.submit(SEEK_UP_COMMAND).wait()
+    walk = time.perf_counter() - start
+
+    # Pipelined: a tune and two properties in flight at once
+    start = time.perf_counter()
+    for i in range(rounds):
+        channel = channels[i % len(channels)]
+        pending = [manager.submit(tuneCommand(channel)),
+                   manager.submit(setPropertyCommand(PROPERTY_VOLUME, i & 0x3F)),
+                   manager.submit(setPropertyCommand(PROPERTY_MUTE, 0))]
+        for transaction in pending:
+            transaction.wait()
+    pipelined = time.perf_counter() - start
+    reader.stop()
+    writer.stop()
+
+    results = {"band walk": {"steps/s": round(rounds * (len(channels) + 1) / walk)},
+               "pipelined": {"rounds/s": round(rounds / pipelined)}}
+    for name, latency in manager.latency.items():
+        results["rtt " + name] = {"p50 ms": round(percentile(latency, 50) / 1e6, 2),
+                                  "p99 ms": round(percentile(latency, 99) / 1e6, 2)}
+    printResults(results)
+    for name, histogram in manager.histograms.items():
+        print("{:20} {}".format(name, "  ".join("<={}ms: {}".format(bucket, histogram[bucket])
+                                               for bucket in sorted(histogram))))
+    return results
+
+
+def benchCommands(count=200000):
+    """Per-command cost: shared bufferOut list against the command encoder"""
+    bufferOut = [0x00] * 16
+
+    def listTune(channel):
+        # What the handlers did before: fields in a shared list, hex string, bytes copy
+        bufferOut[0] = 0x00
+        bufferOut[1] = 0x30
+        bufferOut[2] = 0x00
+        bufferOut[3] = channel & 0xFF
+        bufferOut[4] = int((channel & 0xFF00) / 256)
+        bufferOut[5] = 0x00
+        bufferOut[6] = 0x00
+        dataStr = ""
+        for i in bufferOut:
+            dataStr = dataStr + " " + hex(i)
+        dataStr.replace("0x", "")
+        return bytes(bytearray(bufferOut))
+
+    channels = [station.channel for station in SimulatedDevice().stations]
+    assert all(listTune(channel) == tuneCommand(channel) for channel in channels)
+    results = {}
+    for name, encode in (("bufferOut list", listTune), ("tuneCommand", tuneCommand)):
+        i = iter(range(count))
+        results[name] = {"ns/command": round(timeCalls(lambda: encode(channels[next(i) & 7]), count))}
+    results["setPropertyCommand"] = {"ns/command": round(timeCalls(
+        lambda: setPropertyCommand(PROPERTY_VOLUME, 40), count))}
+    printResults(results)
+    return results
+
+
+def benchScan(rate=100):
+    """Full band scan on the simulator: fixed dwell on every channel against the adaptive dwell"""
+    results = {}
+    for name, minGap, adaptive in (("fixed dwell", 0.02, False), ("adaptive", 0.02, True),
+                                   ("adaptive, 5 ms gap", 0.005, True)):
+        device = SimulatedDevice(rate=rate, queueSize=4096)
+        transactions = TransactionManager(None)
+        writer = CommandWriter(device, minGap=minGap, onWrite=transactions.sent)
+        transactions.send = writer.send
+        scanner = BandScanner(transactions.submit, adaptive=adaptive)
+
+        def onReport(report, timestamp):
+            record = parseReport(report)
+            transactions.onReport(record)
+            scanner.onReport(record)
+
+        reader = HidReader(device, onReport, timeout=10)
+        writer.start()
+        reader.start()
+        transactions.submit(POWER_UP_COMMAND).wait()
+        scanner.start()
+        scanner.join()
+        reader.stop()
+        writer.stop()
+        stations = scanner.stations()
+        results[name] = {"scan s": round(scanner.elapsed, 2),
+                         "ms per channel": round(scanner.elapsed * 1e3 / len(scanner.channels), 1),
+                         "RSQ samples": sum(quality.samples for quality in scanner.bandMap.values()),
+                         "stations": len(stations),
+                         "missed": len(set(station.channel for station in device.stations) - set(stations))}
+    printResults(results)
+    return results
+
+
+def benchTrace(count=200000):
+    """Per-report cost: hex text of every report against the trace ring buffer"""
+    reports = [report for reports in generatedReports().values() for report in reports]
+
+    def hexText(report):
+        # What the read path did before for lineEditBufferIn (without the setText)
+        dataStr = ""
+        for i in report:
+            dataStr = dataStr + " " + hex(i)
+        return dataStr.replace("0x", "")
+
+    trace = TraceBuffer()
+    results = {}
+    for name, record in (("hex per report", hexText), ("TraceBuffer.append", lambda report: trace.append(IN, report))):
+        i = iter(range(count))
+        results[name] = {"ns/report": round(timeCalls(lambda: record(reports[next(i) % len(reports)]), count))}
+    # Refresh of the two line edits and of a 200 lines trace window, 30 times per second
+    results["render last"] = {"ns/refresh": round(timeCalls(lambda: trace.hex(trace.last[IN]), 10000))}
+    results["render 200 lines"] = {"us/refresh": round(timeCalls(
+        lambda: trace.render(trace.entries(trace.count - 200)), 300) / 1e3, 1)}
+    printResults(results)
+    return results
+
+
+def simulatedCapture(path, count=50000, rate=1000):
+    """Writes a capture of count simulator reports timestamped at rate per second"""
+    device = SimulatedDevice(rate=None, errorRate=0.01)
+    with CaptureWriter(path) as capture:
+        capture.record(1, POWER_UP_COMMAND, 0)
+        device.write(POWER_UP_COMMAND)
+        for i, channel in enumerate((8960, 9540, 10360)):
+            capture.record(1, tuneCommand(channel), 0)
+            device.tune(channel)
+            for j in range(count // 3):
+                capture.record(0, device.read(40), (i * (count // 3) + j) * 1000000000 // rate)
+
+
+def benchReplay(count=50000):
+    """Capture replay at max speed: headless decoder, Fm.onRead (offscreen Qt)"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session.cap")
+        start = time.perf_counter()
+        simulatedCapture(path, count)
+        results["capture write"] = {"records/s": round(count / (time.perf_counter() - start)),
+                                    "B/record": round(os.path.getsize(path) / count, 1)}
+
+        with CaptureReader(path) as capture:
+            decoder = RdsDecoder()
+
+            def decode(report, timestamp):
+                record = parseReport(report)
+                if report[0] == 0x34:
+                    decoder.decodeGroup(record.a, record.b, record.c, record.d)
+
+            replayed, elapsed = replay(capture, decode, None)
+            results["headless"] = {"records/s": round(replayed * 1e9 / elapsed)}
+            # Pacing check: 1 s of capture at 10x
+            stop = threading.Event()
+            threading.Timer(0.1, stop.set).start()
+            replayed, elapsed = replay(capture, lambda report, timestamp: None, 10, stop=stop)
+            results["10x"] = {"records in 0.1 s": replayed}
+
+            try:
+                app = offscreenApplication()
+                window = simulatedWindow()
+            except ImportError as error:
+                print("Fm skipped: " + str(error))
+            else:
+                window.show()
+
+                def onRead(report, timestamp):
+                    window.bufferIn = report
+                    window.onRead()
+
+                with contextlib.redirect_stdout(io.StringIO()):
+                    replayed, elapsed = replay(capture, onRead, None)
+                app.processEvents()
+                window.close()
+                results["Fm.onRead"] = {"records/s": round(replayed * 1e9 / elapsed)}
+    printResults(results)
+    return results
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+# This Python file uses the following encoding: utf-8
+"""
+ Benchmarks of the FM radio receiver
+
+ Headless, no device needed, Qt runs on the offscreen platform.
+ Run: python benchmark.py [--save] [--baseline file] [name ...]
+ The benchmarks are in benchhid.py, benchrds.py and benchgui.py, their
+ shared fixtures in benchcommon.py.
+
+ Benchmarks returning results are compared with the baseline file
+ (benchmarkBaseline.json next to this file, machine specific, not
+ committed), --save stores the new results as baseline.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import os
+import json
+import argparse
+from benchhid import (benchReader, benchDrain, benchNotifier, benchSimulator, benchParse, benchReadinto, benchBulk,
+                      benchAsync, benchWriter, benchErrors, benchTransactions, benchScan, benchCommands, benchTrace,
+                      benchReplay)
+from benchrds import benchRds, benchRdsGroups, benchCharset, benchRdsCache, benchVoting
+from benchgui import benchDecode, benchViewModel, benchDisplay, benchLed, benchGui
+
+
+benchmarks = {
+    "reader": benchReader,
+    "drain": benchDrain,
+    "notifier": benchNotifier,
+    "simulator": benchSimulator,
+    "decode": benchDecode,
+    "rds": benchRds,
+    "rdsgroups": benchRdsGroups,
+    "charset": benchCharset,
+    "rdscache": benchRdsCache,
+    "voting": benchVoting,
+    "parse": benchParse,
+    "readinto": benchReadinto,
+    "bulk": benchBulk,
+    "async": benchAsync,
+    "writer": benchWriter,
+    "errors": benchErrors,
+    "transactions": benchTransactions,
+    "scan": benchScan,
+    "commands": benchCommands,
+    "trace": benchTrace,
+    "replay": benchReplay,
+    "viewmodel": benchViewModel,
+    "display": benchDisplay,
+    "led": benchLed,
+    "gui": benchGui,
+}
+
+
+def compareResults(results, baseline, tolerance=0.10):
+    """Prints the change against the baseline, metrics ending with /s are
+    better when higher, the others when lower"""
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        changes = []
+        for key, value in metrics.items():
+            old = baseline[name].get(key)
+            if not old:
+                continue
+            change = (value - old) / old
+            worse = change < -tolerance if key.endswith("/s") else change > tolerance
+            changes.append("{} {:+.0%}{}".format(key, change, " REGRESSION" if worse else ""))
+        print("{:<20} vs baseline: {}".format(name, "  ".join(changes)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FM radio benchmarks")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all by default: " + ", ".join(benchmarks))
+    parser.add_argument("--save", action="store_true", help="save the results as baseline")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           "benchmarkBaseline.json"), help="baseline file")
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in benchmarks:
+            parser.error("unknown benchmark " + name)
+    baselinePath = os.path.abspath(args.baseline)
+
+    baseline = {}
+    if os.path.exists(baselinePath):
+        with open(baselinePath) as f:
+            baseline = json.load(f)
+
+    results = {}
+    for name in args.names or list(benchmarks):
+        print("== " + name + " : " + benchmarks[name].__doc__)
+        results.update(benchmarks[name]() or {})
+
+    if baseline and results:
+        print("== baseline " + baselinePath)
+        compareResults(results, baseline)
+    if args.save:
+        baseline.update(results)
+        with open(baselinePath, "w") as f:
+            json.dump(baseline, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
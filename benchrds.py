@@ -0,0 +1,263 @@
+# This Python file uses the following encoding: utf-8
+"""
+ RDS benchmarks: group decoding, character set, station cache and voting
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import os
+import time
+import random
+import tempfile
+from commands import POWER_UP_COMMAND, tuneCommand
+from simulator import SimulatedDevice
+from rds import RdsDecoder, TextAssembler, PsSegment, RtSegment, PsComplete
+from rdscharset import EBU_DECODING, ebuDecode, ebuEncode
+from rdscache import RdsCache
+from reports import parseReport
+from capture import CaptureWriter, CaptureReader
+from benchcommon import percentile, measure, generatedReports, printResults
+
+
+def benchRds(count=200000):
+    """Qt-free RDS group decoder throughput"""
+    decoder = RdsDecoder()
+    results = {"RdsDecoder": measure(decoder.decode, generatedReports()[0x34], count)}
+    printResults(results)
+    return results
+
+
+def rdsGroupMix(rng, count=512, pi=0xF201):
+    """Groups of every type and version, 0A and 2A as often as the others together"""
+    groups = []
+    for i in range(count):
+        key = rng.choice((0, 4)) if i % 2 else rng.randrange(32)
+        b = (key << 11) | (rng.randrange(32) << 5) | rng.randrange(32)
+        c = pi if key & 0x1 else rng.randrange(0x10000)
+        groups.append((pi, b, c, rng.randrange(0x10000)))
+    return groups
+
+
+def benchRdsGroups(count=200000, groupRate=11.4):
+    """Table dispatched decoding of the full RDS group mix against the line rate"""
+    groups = rdsGroupMix(random.Random(1))
+    decoder = RdsDecoder()
+    decodeGroup = decoder.decodeGroup
+    results = {"RdsDecoder": measure(lambda group: decodeGroup(*group), groups, count)}
+    results["RdsDecoder"]["x line rate"] = round(results["RdsDecoder"]["reports/s"] / groupRate)
+    printResults(results)
+    counters = decoder.counters()
+    print("groups per type:", " ".join("{}={}".format(name, counters[name]) for name in sorted(
+        counters, key=lambda name: (int(name[:-1]), name[-1]))))
+    return results
+
+
+def benchCharset(count=4000000):
+    """EBU character set decoding of RadioText buffers: per character, str.translate and charmap"""
+    rng = random.Random(1)
+    texts = [station.rt for station in SimulatedDevice(rate=None).stations] + ["Fréquence Île-de-France, à écouter"]
+    # Station texts, and noise on the whole code range
+    buffers = [ebuEncode(rng.choice(texts)).ljust(64) for i in range(64)]
+    buffers += [bytes(rng.randrange(256) for j in range(64)) for i in range(64)]
+    methods = {"per character": lambda buffer: "".join([EBU_DECODING[code] for code in buffer]),
+               "str.translate": lambda buffer: buffer.decode("latin-1").translate(EBU_DECODING),
+               "ebuDecode": ebuDecode}
+    expected = [methods["per character"](buffer) for buffer in buffers]
+    results = {}
+    for name, decode in methods.items():
+        if [decode(buffer) for buffer in buffers] != expected:
+            raise AssertionError("{} decodes differently".format(name))
+        calls = count // 64
+        size = len(buffers)
+        start = time.perf_counter()
+        for i in range(calls):
+            decode(buffers[i % size])
+        elapsed = time.perf_counter() - start
+        results[name] = {"Mchars/s": round(calls * 64 / elapsed / 1e6, 1)}
+    printResults(results)
+    return results
+
+
+def benchRdsCache(tunes=200, groupRate=11.4, piErrorRate=0.05):
+    """Groups from a retune to the full PS displayed, wrong stations identified on a corrupted PI"""
+    device = SimulatedDevice(rate=None)
+    cycles = {station.channel: device.rdsGroups(station) for station in device.stations}
+    results = {}
+    for name, cached, repeat, piErrors in (("decoder", False, 2, 0.0), ("RdsCache", True, 2, 0.0),
+                                           ("PI errors, repeat 1", True, 1, piErrorRate),
+                                           ("PI errors, repeat 2", True, 2, piErrorRate)):
+        rng = random.Random(1)
+        cache = RdsCache(repeat=repeat)
+        counts = []
+        provisional = 0
+        wrong = 0
+        for i in range(tunes):
+            station = rng.choice(device.stations)
+            groups = cycles[station.channel]
+            start = rng.randrange(len(groups))
+            decoder = RdsDecoder()
+            info = cache.tune(station.channel) if cached else None
+            if info is not None:
+                # Like Fm.stationTuned, the segments are voted against the cached texts
+                decoder.preset(info.ps, info.rtA, info.rtB)
+                if info.ps.strip():
+                    provisional += 1
+            received = 0
+            count = 0
+            shown = None
+            stable = False
+            # Decodes until the PS is stable, so the cache learns it
+            while not stable and count < 3 * len(groups):
+                a, b, c, d = groups[(start + count) % len(groups)]
+                count += 1
+                if rng.random() < piErrors:
+                    a ^= 1 << rng.randrange(16)
+                if cached and cache.heard(a):
+                    if a != station.pi:
+                        wrong += 1
+                    provisionalInfo = cache.provisional
+                    previous = cache.pi
+                    info = cache.identify(a)
+                    if info is None:
+                        if provisionalInfo is not None or previous is not None:
+                            decoder.reset()
+                    elif info != provisionalInfo:
+                        decoder.preset(info.ps, info.rtA, info.rtB)
+                    if info is not None and info.ps == station.ps.ljust(8) and shown is None:
+                        # Confirmed by the PI of the first groups
+                        shown = count
+                events = decoder.decodeGroup(a, b, c, d)
+                if cached:
+                    cache.learn(events)
+                for event in events:
+                    if type(event) is PsSegment:
+                        received |= 1 << event.segment
+                    elif type(event) is PsComplete:
+                        stable = True
+                if received == 0xF and shown is None:
+                    shown = count
+            counts.append(shown)
+        results[name] = {"groups mean": round(sum(counts) / tunes, 1),
+                         "groups p99": percentile(counts, 99),
+                         "ms at {} groups/s".format(groupRate): round(sum(counts) / tunes / groupRate * 1e3),
+                         "provisional %": round(100 * provisional / tunes),
+                         "wrong PI identified": wrong}
+    printResults(results)
+    return results
+
+
+def noisyCapture(path, errorRate, sessions=24, seconds=20, groupRate=11.4):
+    """Writes a capture of RDS groups with corrupted characters, a tune every seconds"""
+    device = SimulatedDevice(rate=None, mix=(0x34,), errorRate=errorRate, seed=7)
+    device.write(POWER_UP_COMMAND)
+    device.responses.clear()
+    timestamp = 0
+    with CaptureWriter(path) as capture:
+        for i in range(sessions):
+            station = device.stations[i % len(device.stations)]
+            capture.record(1, tuneCommand(station.channel), timestamp)
+            device.tune(station.channel)
+            device.responses.clear()
+            # The group cycle doesn't start at the tune
+            for j in range(i % 21):
+                device.read(40)
+            for j in range(int(seconds * groupRate)):
+                timestamp += int(1e9 / groupRate)
+                capture.record(0, device.read(40), timestamp)
+
+
+class LastReceived(TextAssembler):
+    """Shows the last character received, like the decoder before the votes"""
+
+    def receive(self, segment, codes):
+        start = segment * len(codes)
+        self.codes[start:start + len(codes)] = bytes(codes)
+        self._text = None
+        return False
+
+
+class LastReceivedDecoder(RdsDecoder):
+
+    def reset(self):
+        super().reset()
+        self.ps = LastReceived(4, 2)
+        self.rtA = LastReceived(16, 4)
+        self.rtB = LastReceived(16, 4)
+
+
+def stableTimes(capture, votes, stations):
+    """Replays a capture through a decoder voting with votes
+
+    Returns:
+        list of (PS, RT) per tune: time in ms from the tune to the last
+        change of the text shown, None if the text shown at the end is wrong
+        list of (PS, RT) flickers: changes of the text shown once right
+        list of PS complete events times in ms
+    """
+    decoder = RdsDecoder(votes) if votes else LastReceivedDecoder()
+    sessions = []
+
+    def close(session):
+        if session is not None:
+            sessions.append(session)
+
+    session = None
+    for timestamp, direction, report in capture:
+        if direction == 1:
+            close(session)
+            station = stations[report[3] | report[4] << 8]
+            decoder.reset()
+            truth = (station.ps.ljust(8)[:8], station.rt.ljust(64)[:64])
+            session = {"start": timestamp, "truth": truth, "shown": ["", ""], "last": [0, 0],
+                       "flickers": [0, 0], "right": [False, False], "complete": None}
+            continue
+        record = parseReport(report)
+        for event in decoder.decodeGroup(record.a, record.b, record.c, record.d):
+            kind = type(event)
+            if kind is PsSegment:
+                text, index = event.ps, 0
+            elif kind is RtSegment and not event.ab:
+                text, index = event.rt, 1
+            else:
+                if kind is PsComplete and session["complete"] is None:
+                    session["complete"] = (timestamp - session["start"]) / 1e6
+                continue
+            if text != session["shown"][index]:
+                session["shown"][index] = text
+                session["last"][index] = timestamp
+                if session["right"][index]:
+                    session["flickers"][index] += 1
+                session["right"][index] = session["right"][index] or text == session["truth"][index]
+    close(session)
+    times = [tuple((session["last"][i] - session["start"]) / 1e6 if session["shown"][i] == session["truth"][i]
+                   else None for i in (0, 1)) for session in sessions]
+    flickers = [tuple(session["flickers"]) for session in sessions]
+    complete = [session["complete"] for session in sessions if session["complete"] is not None]
+    return times, flickers, complete
+
+
+def benchVoting(errorRates=(0.01, 0.05)):
+    """Noisy captures: time to a stable PS and RadioText, last received character against voted characters"""
+    results = {}
+    stations = {station.channel: station for station in SimulatedDevice().stations}
+    with tempfile.TemporaryDirectory() as directory:
+        for errorRate in errorRates:
+            path = os.path.join(directory, "noisy.cap")
+            noisyCapture(path, errorRate)
+            with CaptureReader(path) as capture:
+                for votes in (0, 1, 2, 3):
+                    times, flickers, complete = stableTimes(capture, votes, stations)
+                    result = {}
+                    for i, name in enumerate(("PS", "RT")):
+                        stable = [time[i] for time in times if time[i] is not None]
+                        result[name + " stable p50 ms"] = round(percentile(stable, 50)) if stable else None
+                        result[name + " right %"] = round(100 * len(stable) / len(times))
+                        result[name + " flickers"] = sum(flicker[i] for flicker in flickers)
+                    if complete:
+                        result["PS complete p50 ms"] = round(percentile(complete, 50))
+                    name = "votes {}".format(votes) if votes else "last received"
+                    results["{:.0%} errors, {}".format(errorRate, name)] = result
+            os.remove(path)
+    printResults(results)
+    return results
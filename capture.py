@@ -0,0 +1,334 @@
+#!/usr/bin/python3
+# This Python file uses the following encoding: utf-8
+"""
+ HID session capture and replay
+
+ Capture file: a 16 bytes header then append-only records
+   header: b"FMHIDCAP", version (uint16), 6 reserved bytes
+   record: timestamp in ns (int64, time.perf_counter_ns()), direction
+           (0 IN report, 1 OUT command), reserved byte, length (uint16),
+           then the raw bytes of the report
+ all little endian. The capture is read through mmap, the reports are
+ memoryview slices of the file, nothing is copied.
+
+ A capture is replayed at its own pace (speed 1), N times faster, or as
+ fast as possible (speed None), either to a callback or as a device
+ (ReplayDevice) read by the normal reader path of the control panel.
+
+ Run: python capture.py file [--speed N]   headless replay of the RDS decoder
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import os
+import mmap
+import time
+import struct
+import argparse
+import threading
+
+
+MAGIC = b"FMHIDCAP"
+VERSION = 1
+
+IN = 0
+OUT = 1
+
+headerLayout = struct.Struct("<8sH6x")
+recordLayout = struct.Struct("<qBxH")
+
+
+class CaptureError(Exception):
+    pass
+
+
+class CaptureWriter:
+    """
+        Appends reports to a capture file
+        ...
+    Attributes:
+        path: string, capture file
+        count: int, number of records written
+    """
+
+    def __init__(self, path):
+        """ initializes CaptureWriter class """
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(headerLayout.pack(MAGIC, VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def record(self, direction, report, timestamp=None):
+        """Appends a report
+
+        Args:
+            direction: int, IN or OUT
+            report: bytes like
+            timestamp: int, time.perf_counter_ns(), now if None
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter_ns()
+        with self._lock:
+            self._file.write(recordLayout.pack(timestamp, direction, len(report)))
+            self._file.write(report)
+            self.count += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class CaptureReader:
+    """
+        Memory mapped capture file
+        ...
+    Attributes:
+        path: string, capture file
+        offsets: list, file offset of each record
+    """
+
+    def __init__(self, path):
+        """ initializes CaptureReader class """
+        self.path = path
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < headerLayout.size:
+                raise CaptureError(path + ": not a capture file")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self._map)
+        magic, version = headerLayout.unpack_from(self.view, 0)
+        if magic != MAGIC:
+            raise CaptureError(path + ": not a capture file")
+        if version != VERSION:
+            raise CaptureError(path + ": capture version {} not supported".format(version))
+        self.offsets = []
+        offset = headerLayout.size
+        end = len(self.view)
+        while offset + recordLayout.size <= end:
+            length = recordLayout.unpack_from(self.view, offset)[2]
+            if offset + recordLayout.size + length > end:
+                # Record cut by a crash while capturing
+                break
+            self.offsets.append(offset)
+            offset += recordLayout.size + length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        """Returns (timestamp, direction, report memoryview) of a record"""
+        offset = self.offsets[index]
+        timestamp, direction, length = recordLayout.unpack_from(self.view, offset)
+        offset += recordLayout.size
+        return timestamp, direction, self.view[offset:offset + length]
+
+    def __iter__(self):
+        view = self.view
+        unpack = recordLayout.unpack_from
+        size = recordLayout.size
+        for offset in self.offsets:
+            timestamp, direction, length = unpack(view, offset)
+            yield timestamp, direction, view[offset + size:offset + size + length]
+
+    def duration(self):
+        """Duration of the capture in ns"""
+        if not self.offsets:
+            return 0
+        return self[-1][0] - self[0][0]
+
+    def close(self):
+        """Closes the file, once the reports handed out are released"""
+        self.view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Reports still referenced (ReplayDevice), the map is closed with them
+            pass
+
+
+def replay(capture, onReport, speed=1.0, onCommand=None, stop=None):
+    """Feeds the records of a capture in order
+
+    Args:
+        capture: CaptureReader
+        onReport: callable(report, timestamp), called for every IN record,
+            timestamp is time.perf_counter_ns() of the replay
+        speed: float, 1 at the capture pace, N times faster, None as fast as possible
+        onCommand: callable(command, timestamp), called for every OUT record
+        stop: threading.Event, ends the replay when set
+
+    Returns:
+        count: int, number of records replayed
+        elapsed: int, duration of the replay in ns
+    """
+    start = time.perf_counter_ns()
+    origin = None
+    count = 0
+    for timestamp, direction, report in capture:
+        if stop is not None and stop.is_set():
+            break
+        if speed:
+            if origin is None:
+                origin = timestamp
+            wait = (timestamp - origin) / speed - (time.perf_counter_ns() - start)
+            if wait > 0:
+                time.sleep(wait / 1e9)
+        if direction == IN:
+            onReport(report, time.perf_counter_ns())
+        elif onCommand is not None:
+            onCommand(report, time.perf_counter_ns())
+        count += 1
+    return count, time.perf_counter_ns() - start
+
+
+class ReplayDevice:
+    """
+        Capture replayed with the hid.Device interface
+        ...
+    Attributes:
+        capture: CaptureReader
+        speed: float, 1 at the capture pace, N times faster, None as fast as possible
+        loop: bool, starts over at the end of the capture
+        written: list, commands written, they are not answered
+    """
+
+    def __init__(self, capture, speed=1.0, loop=False):
+        """ initializes ReplayDevice class """
+        self.capture = capture
+        self.speed = speed
+        self.loop = loop
+        self.written = []
+        self.nonblocking = 0
+        self._records = [record for record in capture if record[1] == IN]
+        self._open = True
+        self.restart()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    @property
+    def manufacturer(self):
+        return "Replay"
+
+    @property
+    def product(self):
+        return os.path.basename(self.capture.path)
+
+    @property
+    def serial(self):
+        return "0000"
+
+    def restart(self):
+        self._next = 0
+        self._start = time.perf_counter_ns()
+
+    def close(self):
+        self._open = False
+
+    def write(self, data):
+        if not self._open:
+            raise CaptureError("device closed")
+        self.written.append(bytes(data))
+        return len(data)
+
+    def read(self, size, timeout=None):
+        if not self._open:
+            raise CaptureError("device closed")
+        if self._next >= len(self._records):
+            if not self.loop or not self._records:
+                if not self.nonblocking and timeout != 0:
+                    time.sleep(0.1 if timeout is None else timeout / 1000)
+                return b""
+            self.restart()
+        timestamp, direction, report = self._records[self._next]
+        if self.speed:
+            due = (timestamp - self._records[0][0]) / self.speed
+            wait = due - (time.perf_counter_ns() - self._start)
+            if wait > 0:
+                if self.nonblocking or timeout == 0:
+                    return b""
+                if timeout is not None and wait > timeout * 1e6:
+                    time.sleep(timeout / 1000)
+                    return b""
+                time.sleep(wait / 1e9)
+        self._next += 1
+        return bytes(report[:size])
+
+    def readinto(self, buffer, timeout=None):
+        report = self.read(len(buffer), timeout)
+        memoryview(buffer).cast("B")[:len(report)] = report
+        return len(report)
+
+    def read_many(self, count, size, timeout=None, out=None):
+        ret = []
+        wait = timeout
+        while len(ret) < count:
+            report = self.read(size, wait)
+            if not report:
+                break
+            if out is None:
+                ret.append(report)
+            else:
+                offset = len(ret) * size
+                out[offset:offset + len(report)] = report
+                ret.append(len(report))
+            wait = 0
+        return ret
+
+    def write_many(self, reports):
+        return [self.write(data) for data in reports]
+
+
+def main():
+    """Headless replay: parses the reports and decodes the RDS groups"""
+    from reports import parseReport, RdsStatus
+    from rds import RdsDecoder, PsSegment, RtSegment
+
+    parser = argparse.ArgumentParser(description="Replays a HID capture through the RDS decoder")
+    parser.add_argument("path", help="capture file")
+    parser.add_argument("--speed", type=float, default=0, help="1 at the capture pace, 0 as fast as possible")
+    args = parser.parse_args()
+
+    decoder = RdsDecoder()
+    names = {}
+
+    def onReport(report, timestamp):
+        record = parseReport(report)
+        if type(record) is RdsStatus:
+            for event in decoder.decodeGroup(record.a, record.b, record.c, record.d):
+                if type(event) is PsSegment or type(event) is RtSegment:
+                    names[type(event).__name__] = event[-1]
+
+    with CaptureReader(args.path) as capture:
+        count, elapsed = replay(capture, onReport, args.speed or None)
+        print("{} records, {:.3f} s captured, replayed in {:.3f} s ({:.0f} records/s)".format(
+            count, capture.duration() / 1e9, elapsed / 1e9, count * 1e9 / max(elapsed, 1)))
+    for name, text in names.items():
+        print("{}: {!r}".format(name, text))
+
+
+if __name__ == "__main__":
+    main()
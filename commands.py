@@ -0,0 +1,81 @@
+# This Python file uses the following encoding: utf-8
+"""
+ AN649 command encoder
+
+ Builds the 16 bytes output reports of the FM tuner commands with
+ precompiled struct layouts and returns immutable bytes, so a command is
+ never assembled in a shared buffer:
+   0x00 stand by, 0x01 POWER_UP, 0x13 SET_PROPERTY, 0x30 FM_TUNE_FREQ,
+   0x31 FM_SEEK_START
+ The constant commands are built once, tune and property commands are
+ cached (there are only 206 FM channels).
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import struct
+from functools import lru_cache
+
+
+STAND_BY = 0x00
+POWER_UP = 0x01
+SET_PROPERTY = 0x13
+TUNE_FREQ = 0x30
+SEEK_START = 0x31
+
+PROPERTY_VOLUME = 0x0300
+PROPERTY_MUTE = 0x0301
+PROPERTY_MONO = 0x0302
+PROPERTY_DE_EMPHASIS = 0x3900
+PROPERTY_VALID_RSSI_THRESHOLD = 0x3202    # dBµV, seek stops on a channel above it
+PROPERTY_VALID_SNR_THRESHOLD = 0x3204     # dB
+
+CHANNEL_MIN = 8750
+CHANNEL_MAX = 10800
+CHANNEL_STEP = 10
+
+# Layouts: report id 0, command, then the arguments, padded to 16 bytes
+powerUpLayout = struct.Struct("<BBBxB8xBBx")         # 2: ARG1, 4: ARG3, 13-14: ARG12-13
+setPropertyLayout = struct.Struct("<BBxHH9x")         # 3: property, 5: value
+tuneLayout = struct.Struct("<BBxH11x")                # 3: channel in 10 kHz
+seekLayout = struct.Struct("<BBxB12x")                # 3: bit 1 up, bit 0 wrap
+
+STAND_BY_COMMAND = bytes(16)
+POWER_UP_COMMAND = powerUpLayout.pack(0x00, POWER_UP, 0x01, 0x23, 0x63, 0x11)
+SEEK_UP_COMMAND = seekLayout.pack(0x00, SEEK_START, 0x03)
+SEEK_DOWN_COMMAND = seekLayout.pack(0x00, SEEK_START, 0x01)
+
+
+@lru_cache(maxsize=256)
+def tuneCommand(channel):
+    """Returns the FM_TUNE_FREQ command of channel (in 10 kHz, 8960 for 89.6 MHz)"""
+    return tuneLayout.pack(0x00, TUNE_FREQ, channel)
+
+
+@lru_cache(maxsize=512)
+def setPropertyCommand(prop, value):
+    """Returns the SET_PROPERTY command of prop = value"""
+    return setPropertyLayout.pack(0x00, SET_PROPERTY, prop, value)
+
+
+def seekCommand(up, wrap=True):
+    """Returns the FM_SEEK_START command"""
+    if wrap:
+        return SEEK_UP_COMMAND if up else SEEK_DOWN_COMMAND
+    return seekLayout.pack(0x00, SEEK_START, 0x02 if up else 0x00)
+
+
+def frequencyToChannel(frequency):
+    """Converts a frequency in MHz (89.6 or "89.6") to a channel in 10 kHz"""
+    return int(round(float(frequency) * 100))
+
+
+def nextChannel(channel, step):
+    """Returns channel + step, wrapping around the FM band"""
+    channel += step
+    if channel > CHANNEL_MAX:
+        return CHANNEL_MIN
+    if channel < CHANNEL_MIN:
+        return CHANNEL_MAX
+    return channel
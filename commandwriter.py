@@ -0,0 +1,168 @@
+# This Python file uses the following encoding: utf-8
+"""
+ HID command writer
+
+ Writes the FM tuner commands on a dedicated thread, so a slow USB write
+ never blocks the GUI event loop.
+ Commands (power up, tune, seek, ...) are written in order. Property
+ changes (volume, mute, mono, de-emphasis) are coalesced: only the latest
+ value of each property is kept until the worker writes it, so dragging
+ the volume bar gives a few SET_PROPERTY writes instead of one per tick.
+ A value equal to the last written one is dropped, and a minimum gap is
+ kept between two writes. The tuner doesn't acknowledge the property
+ writes: forget() is called when it may have lost them (reset, power up),
+ so the next values are written even if unchanged.
+ A write failing on a transient USB error is tried again with an
+ exponential backoff (hiderrors.RetryPolicy), on this thread only.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import threading
+import time
+from collections import deque
+from commands import STAND_BY, POWER_UP, setPropertyCommand
+from hiderrors import RetryPolicy, ErrorStats, HidError
+
+
+class CommandWriter(threading.Thread):
+    """
+        Writer worker
+        ...
+    Attributes:
+        device: hid.Device, or any object with the same write() method
+        minGap: float, minimum time between two writes in seconds
+        onWrite: callable(command, tag), called after every written command,
+            tag is the object given to send(), None for a property change
+        onError: callable(error, command), called with a hiderrors.HidError
+            when a write fails, after the retries
+        retry: RetryPolicy, retries of the transient write errors
+        errors: ErrorStats, failed writes and retries
+        writeCount: int, number of written commands
+        coalescedCount: int, property values replaced before being written
+        redundantCount: int, property values dropped because already written
+        errorCount: int, number of commands not written
+    """
+
+    def __init__(self, device, minGap=0.02, onWrite=None, onError=None, retry=None, errors=None):
+        """ initializes CommandWriter class """
+        super().__init__(name="CommandWriter", daemon=True)
+        self.device = device
+        self.minGap = minGap
+        self.onWrite = onWrite
+        self.onError = onError
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.errors = errors if errors is not None else ErrorStats()
+        self.writeCount = 0
+        self.coalescedCount = 0
+        self.redundantCount = 0
+        self.errorCount = 0
+        self._commands = deque()
+        # property -> latest value not written yet, in arrival order
+        self._properties = {}
+        # property -> last value written to the device
+        self._written = {}
+        self._lastWrite = 0.0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._stopEvent = threading.Event()
+
+    def send(self, command, tag=None):
+        """Queues a command, written in order
+
+        Args:
+            command: bytes, 16 bytes command
+            tag: object given back to onWrite (the Transaction of the command)
+        """
+        with self._condition:
+            self._commands.append((bytes(command), tag))
+            self._condition.notify()
+
+    def setProperty(self, prop, value):
+        """Queues a property change, replacing the pending value of prop
+
+        Args:
+            prop: int, property id (commands.PROPERTY_VOLUME ...)
+            value: int, 16 bits value
+        """
+        with self._condition:
+            if prop in self._properties:
+                self.coalescedCount += 1
+            elif self._written.get(prop) == value:
+                self.redundantCount += 1
+                return
+            self._properties[prop] = value
+            self._condition.notify()
+
+    def forget(self):
+        """The tuner may have lost its properties, the next values are written even if unchanged"""
+        with self._condition:
+            self._written.clear()
+
+    def pending(self):
+        """Number of commands and property changes not written yet"""
+        with self._condition:
+            return len(self._commands) + len(self._properties)
+
+    def run(self):
+        """Writes the queued commands, then the pending property values"""
+        while True:
+            with self._condition:
+                while not self._commands and not self._properties and not self._stopping:
+                    self._condition.wait()
+                if self._commands:
+                    command, tag = self._commands.popleft()
+                    prop = None
+                elif self._properties:
+                    prop = next(iter(self._properties))
+                    value = self._properties.pop(prop)
+                    if self._written.get(prop) == value:
+                        # Back to the written value before the worker woke up
+                        self.redundantCount += 1
+                        continue
+                    command = setPropertyCommand(prop, value)
+                    tag = None
+                else:
+                    return
+            if self.write(command, tag) and prop is not None:
+                with self._condition:
+                    self._written[prop] = value
+
+    def write(self, command, tag=None):
+        """Writes a command once minGap is elapsed since the previous one
+
+        Returns:
+            bool, True if the command was written
+        """
+        wait = self._lastWrite + self.minGap - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            self.retry.call(self.device.write, command, operation="write", stats=self.errors,
+                            stop=self._stopEvent)
+        except HidError as error:
+            self.errorCount += 1
+            if self.onError is not None:
+                self.onError(error, command)
+            return False
+        finally:
+            self._lastWrite = time.perf_counter()
+        self.writeCount += 1
+        if command[1] in (STAND_BY, POWER_UP):
+            # Stand by and power up reset the properties of the tuner
+            with self._condition:
+                self._written.clear()
+        if self.onWrite is not None:
+            self.onWrite(command, tag)
+        return True
+
+    def stop(self, timeout=1.0):
+        """Stops the writer once the queued commands are written,
+        a write being retried gives up"""
+        self._stopEvent.set()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
@@ -13,22 +13,54 @@
  Website: mao2.fr
 """
 
+import os
 import sys
-import hid
 import json
 import math
+import time
+from functools import partial
+from collections import deque
 from MainWindow import Ui_MainWindow
 from PySide6.QtWidgets import QMainWindow, QMessageBox, QProgressBar
 from PySide6.QtWidgets import QLabel, QPushButton
 from PySide6.QtWidgets import QApplication, QVBoxLayout
-from PySide6.QtCore import QTimer, QObject, Signal, QFile
-from PySide6.QtGui import QIcon, QColor
+from PySide6.QtCore import QTimer, QObject, Signal, QFile, QSocketNotifier
+from PySide6.QtGui import QIcon, QColor, QShortcut, QKeySequence
 from qled import QLed
 from radiofmdisplay import RadioFMDisplay
+from traceview import TraceView
+from hidtrace import TraceBuffer, IN, OUT
+from viewmodel import ViewModel
+from capture import CaptureWriter, CaptureReader, ReplayDevice
+from hidreader import HidReader, ReportPool
+from commandwriter import CommandWriter
+from hiderrors import ErrorStats, classify
+from commands import STAND_BY_COMMAND, POWER_UP_COMMAND, PROPERTY_VOLUME, PROPERTY_MUTE, PROPERTY_MONO
+from commands import PROPERTY_DE_EMPHASIS, CHANNEL_MIN, CHANNEL_STEP, tuneCommand, seekCommand
+from commands import PROPERTY_VALID_RSSI_THRESHOLD, frequencyToChannel, nextChannel
+from transactions import TransactionManager
+from scanner import BandScanner
+from simulator import SimulatedDevice
+from reports import parseReport, PartInfo, SystemState, FunctionInfo, RsqStatus, AcfStatus, RdsStatus
+from rds import RdsDecoder, Header, Switches, PsSegment, RtSegment, ClockTime, PtynSegment
+from rds import PTY_NAMES, DI_NAMES, WEEK_DAYS, localTime, mjdToDate
+from rdscache import RdsCache
 
 
 class Communicate(QObject):
     updateDisplay = Signal(int)
+    # (report, timestamp) from the reader thread, queued to the GUI thread
+    reportReceived = Signal(object, object)
+    # Reports drained by the reader thread are waiting in reader.takePending()
+    reportsPending = Signal()
+    # Command written by the writer thread
+    commandWritten = Signal(object)
+    # (error, command) of a failed write
+    commandFailed = Signal(object, object)
+    # ScanProgress of the band scanner thread
+    scanProgress = Signal(object)
+    # (bandMap, error) at the end of a scan
+    scanDone = Signal(object, object)
 
 
 class Radio:
@@ -50,11 +82,15 @@ class Radio:
         self.name = name
 
 
+# Settings, icon and style sheets are next to this file, whatever the working directory
+appDir = os.path.dirname(os.path.abspath(__file__))
+RDS_CACHE_PATH = os.path.join(appDir, "rdsCache.json")
+
 # Creating list of radios
 radios = []
 
 # List all favorite radios
-with open("radioSettings.json") as f:
+with open(os.path.join(appDir, "radioSettings.json")) as f:
     data1 = json.load(f)
 
 # Appending instances to list
@@ -72,16 +108,57 @@ for i in range(16):
 class Fm(QMainWindow, Ui_MainWindow):
     """Radio panel (creating and playing)"""
 
-    def __init__(self):
-        """Initializes the MainWindow class"""
+    def __init__(self, device=None, rdsCachePath=RDS_CACHE_PATH):
+        """Initializes the MainWindow class
+
+        Args:
+            device: hid.Device like object, searched by checkDevice() if None
+            rdsCachePath: string, RDS station cache file, None to keep it in memory
+        """
+        self.rdsCachePath = rdsCachePath
         super().__init__()
 
         self.setupUi(self)
-        self.setWindowIcon(QIcon("radio.png"))
+        self.setWindowIcon(QIcon(os.path.join(appDir, "radio.png")))
         self.setWindowTitle("RADIO FM")
 
+        # Decoded values go through the view model, the changed ones are
+        # applied once per frame (frameInterval ms)
+        self.frameInterval = 33
+        self.frameTimer = QTimer()
+        self.frameTimer.setSingleShot(True)
+        self.frameTimer.timeout.connect(self.flushView)
+        self.view = ViewModel(onDirty=self.scheduleFrame)
+        # TA, TP and MS indicators: the style sheet is set once, a dynamic property selects the color
+        for label in (self.labelTA, self.labelTP, self.labelMS):
+            label.setStyleSheet('QLabel[active="true"] { background-color: lightgreen; } '
+                                'QLabel[active="false"] { background-color: lightgray; }')
+        self.setTA = partial(self.setIndicator, self.labelTA)
+        self.setTP = partial(self.setIndicator, self.labelTP)
+        self.setMS = partial(self.setIndicator, self.labelMS)
+        # Station fields, shown gray and italic while they come from the RDS cache
+        self.diWidgets = (self.lineEditPTY, self.lineEditCompressed, self.lineEditHead, self.lineEditStereo)
+        self.stationWidgets = (self.lineEditPS, self.lineEditTextA, self.lineEditTextB, self.lineEditProgramType,
+                               self.lineEditPID) + self.diWidgets
+        for lineEdit in self.stationWidgets:
+            lineEdit.setStyleSheet('QLineEdit[provisional="true"] { color: gray; font-style: italic; }')
+
+        # Band scan (Ctrl+B), the band map of the last scan is kept
+        self.scanner = None
+        self.scanStart = None
+        self.bandMap = {}
+        self.pushButtonScan = QPushButton("Scan band")
+        self.pushButtonScan.setEnabled(False)
+        self.pushButtonScan.clicked.connect(self.scanButtonPressed)
+        self.progressBarScan = QProgressBar()
+        self.progressBarScan.setMaximumWidth(200)
+        self.progressBarScan.hide()
+        self.statusbar.addPermanentWidget(self.progressBarScan)
+        self.statusbar.addPermanentWidget(self.pushButtonScan)
+        QShortcut(QKeySequence("Ctrl+B"), self).activated.connect(self.scanButtonPressed)
+
         self.initVariables()
-        self.initDevice()
+        self.initDevice(device)
         self.createConnections()
 
         self.led = QLed()
@@ -92,8 +169,59 @@ class Fm(QMainWindow, Ui_MainWindow):
         self.layoutRadioDisplay.addWidget(self.radioDisplay)
         self.radioDisplay.setValue(896)
         self.com.updateDisplay[int].connect(self.radioDisplay.setValue)
-
+        self.com.reportReceived.connect(self.onReport)
+        self.com.reportsPending.connect(self.onReportsPending)
+        self.com.commandWritten.connect(self.onCommandWritten)
+        self.com.commandFailed.connect(self.onCommandFailed)
+        self.com.scanProgress.connect(self.onScanProgress)
+        self.com.scanDone.connect(self.onScanDone)
+
+        # HID errors are counted by the reader and the writer threads, the
+        # latest one is shown in the status bar, never in a modal dialog
+        self.errors = ErrorStats()
+        self.errorsShown = (0, False)
+        self.labelHidStatus = QLabel()
+        self.labelHidStatus.setStyleSheet('QLabel[active="true"] { color: red; }')
+        self.statusbar.addPermanentWidget(self.labelHidStatus)
+        self.setHidStatus = partial(self.setIndicator, self.labelHidStatus)
+        self.statusTimer = QTimer()
+        self.statusTimer.timeout.connect(self.refreshStatus)
+        self.statusTimer.start(250)
+
+        # Commands are written by the writer thread, property changes are
+        # coalesced, transient write errors are retried with a backoff
+        self.startWriter()
+        # Every command waits for its response, hidSend() returns the transaction
+        self.transactions = TransactionManager(self.sendCommand)
+
+        # Reader thread by default, the 50 ms QTimer poll is kept for comparison
+        self.useReaderThread = True
+        # Drain every queued report per wake-up and repaint once
+        self.useDrain = True
+        # Reports read into preallocated buffers: slower than read() on the
+        # simulator and hidraw (python benchmark.py readinto), off until
+        # measured faster with hidapi
+        self.usePool = False
+        # hidraw backend (a device with fileno()): the event loop wakes on data,
+        # no reader thread (python benchmark.py notifier)
+        self.useNotifier = True
+        self.notifier = None
+        self.reader = None
         self.timer = QTimer()
+        self.timer.timeout.connect(self.readDevice)
+
+        # Reports and commands are recorded in the trace, the hex text is
+        # rendered at display rate only when it is seen
+        self.trace = TraceBuffer()
+        self.traceShown = [-1, -1]
+        self.traceView = None
+        self.traceTimer = QTimer()
+        self.traceTimer.timeout.connect(self.refreshTrace)
+        self.traceTimer.start(33)
+        # python fm.py --capture file records the session for a later replay
+        path = argumentValue("--capture")
+        self.capture = CaptureWriter(path) if path else None
+        QShortcut(QKeySequence("Ctrl+T"), self).activated.connect(self.showTrace)
 
 
     def initVariables(self):
@@ -109,36 +237,23 @@ class Fm(QMainWindow, Ui_MainWindow):
                          0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
                          0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
         # OUT -> Write to the device
-        # Transmitted data is stored here - the first item in the array must be 0
-        bufferOutSize = 16                      # Size of the data buffer going OUT from the PC
-        self.bufferOut = [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
+        # The commands are immutable bytes built by the commands module
+        self.buildPresetChannels()
 
         self.hidToSend = False
 
-        DLS_Ascii = (32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32,
-                     32, 32, 32, 32, 32, 32, 32, 32, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 45, 46, 47,
-                     48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67, 68, 69, 70, 71,
-                     72, 73, 74, 75, 76, 77, 78, 79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95,
-                     96, 97, 98, 99, 100, 101, 102, 103, 104, 105, 106, 107, 108, 109, 110, 111, 112, 113, 114, 115,
-                     116, 117, 118, 119, 120, 121, 122, 123, 124, 125, 126, 32, 225, 224, 233, 232, 237, 236, 243,
-                     242, 250, 249, 209, 199, 32, 223, 161, 32, 226, 228, 234, 235, 238, 239, 244, 246, 251, 252, 241,
-                     231, 32, 32, 32, 32, 170, 32, 169, 137, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 32, 186, 185,
-                     178, 179, 177, 32, 32, 32, 181, 191, 247, 176, 188, 189, 190, 167, 193, 192, 201, 200, 205, 204,
-                     211, 210, 218, 217, 32, 32, 154, 142, 208, 32, 194, 196, 202, 203, 206, 207, 212, 214, 219, 220,
-                     32, 32, 32, 158, 32, 32, 32, 197, 198, 140, 32, 253, 213, 216, 254, 32, 32, 32, 32, 32, 32, 32,
-                     227, 229, 230, 156, 32, 253, 245, 248, 32, 32, 32, 32, 32, 32, 32, 32)
+        # Report-to-decode latency (ns) of the last reports
+        self.decodeLatency = deque(maxlen=1024)
 
         self.comboBoxDeEmphasis.addItems(["USA 75 µS", "Europe 50 µS", "Disabled"])
         self.comboBoxDeEmphasis.setCurrentText("Europe 50 µS")
 
         self.spinBoxUpDownSeekThreshold.setValue(17)
 
-        self.RTA = []
-        self.RTB = []
-        for rta in range(16):
-            self.RTA.append("    ")
-            self.RTB.append("    ")
-        self.PS = ["    ", "    ", "    ", "    "]
+        # PS and RadioText are assembled by the RDS decoder
+        self.rds = RdsDecoder()
+        # Last complete PS, RadioText, PTY and DI of the stations heard, shown at once on a tune
+        self.rdsCache = RdsCache(self.rdsCachePath)
 
         self.pushButtonOn.setEnabled(True)
         self.pushButtonOff.setEnabled(False)
@@ -150,15 +265,24 @@ class Fm(QMainWindow, Ui_MainWindow):
         self.toolStripStatusLabel3.setText("")
         self.toolStripStatusLabel4.setText("")
 
-    def initDevice(self):
+    def initDevice(self, device=None):
         """init the device"""
-        self.myDevice = self.checkDevice()
+        self.myDevice = device if device is not None else self.checkDevice()
         # print(self.myDevice)
 
     def checkDevice(self):
-        """Check the device"""
+        """Check the device, python fm.py --simulate runs without the tuner,
+        python fm.py --replay file [--speed N] replays a capture"""
         VENDOR_ID = 0x1234
         PRODUCT_ID = 0x4684
+        if "--simulate" in sys.argv:
+            return SimulatedDevice()
+        path = argumentValue("--replay")
+        if path:
+            speed = float(argumentValue("--speed", 1))
+            return ReplayDevice(CaptureReader(path), speed or None, loop=True)
+        # Imported here, the simulator and the replay run without libhidapi
+        import hid
         try:
             device = hid.Device(vid=VENDOR_ID, pid=PRODUCT_ID)
             return device
@@ -191,12 +315,17 @@ class Fm(QMainWindow, Ui_MainWindow):
 
     def close(self):
         """Stand by the device"""
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        order = bytes(bytearray(self.bufferOut))
-        self.hidSend(order)
+        if self.scanner is not None:
+            self.scanner.stop(0)
+        self.hidSend(STAND_BY_COMMAND)
+        # The writer is a daemon thread, stand by is written before it stops
+        self.writer.stop()
+        self.stopReading()
+        # No callback of a transaction after the close, the scan is already stopped
+        self.transactions.cancelAll()
+        if self.capture is not None:
+            self.capture.flush()
+        self.rdsCache.save()
         self.clearPanel()
         self.clearTextBox()
         self.toolStripStatusLabel1.setText("FM Tuner Disconnected")
@@ -216,17 +345,18 @@ class Fm(QMainWindow, Ui_MainWindow):
         """
         self.pushButtonOn.setEnabled(True)
         self.pushButtonOff.setEnabled(False)
-        self.labelRSSI.setText("0 dbµV")
-        self.labelSNR.setText("0 dB")
-        self.labelMultipath.setText("0")
-        self.labelFrequencyOff.setText("0 PPM")
-        self.labelHighCut.setText("KHz")
-        self.labelSoftMute.setText("0 dB")
-        self.labelStereoBlend.setText("0 %")
+        self.view.set(self.labelRSSI.setText, "0 dbµV")
+        self.view.set(self.labelSNR.setText, "0 dB")
+        self.view.set(self.labelMultipath.setText, "0")
+        self.view.set(self.labelFrequencyOff.setText, "0 PPM")
+        self.view.set(self.labelHighCut.setText, "KHz")
+        self.view.set(self.labelSoftMute.setText, "0 dB")
+        self.view.set(self.labelStereoBlend.setText, "0 %")
         self.pushButtonSeekDown.setEnabled(False)
         self.pushButtonSeekUp.setEnabled(False)
         self.pushButtonTuneDown.setEnabled(False)
         self.pushButtonTuneUp.setEnabled(False)
+        self.pushButtonScan.setEnabled(False)
         self.pushButtonPreset1.setEnabled(False)
         self.pushButtonPreset2.setEnabled(False)
         self.pushButtonPreset3.setEnabled(False)
@@ -252,48 +382,35 @@ class Fm(QMainWindow, Ui_MainWindow):
 
     def clearTextBox(self):
         """ Clear all TextBox (lineEdit)"""
-        self.lineEditDI.setText("")
-        self.lineEditPS.setText("")
-        self.lineEditFrequencyValue.setText("")
-        self.lineEditFrequency.setText("")
-        self.lineEditCompressed.setText("")
-        self.lineEditDate.setText("")
-        self.lineEditHead.setText("")
-        self.lineEditMJD.setText("")
-        self.lineEditPID.setText("")
-        self.lineEditPTY.setText("")
-        self.lineEditTextA.setText("")
-        self.lineEditTextB.setText("")
-        self.lineEditProgramType.setText("")
-        self.lineEditStereo.setText("")
-        self.lineEditTime.setText("")
+        self.rds.reset()
+        self.view.set(self.setProvisional, False)
+        self.view.set(self.lineEditDI.setText, "")
+        self.view.set(self.lineEditPS.setText, "")
+        self.view.set(self.lineEditFrequencyValue.setText, "")
+        self.view.set(self.lineEditFrequency.setText, "")
+        self.view.set(self.lineEditCompressed.setText, "")
+        self.view.set(self.lineEditDate.setText, "")
+        self.view.set(self.lineEditHead.setText, "")
+        self.view.set(self.lineEditMJD.setText, "")
+        self.view.set(self.lineEditPID.setText, "")
+        self.view.set(self.lineEditPTY.setText, "")
+        self.view.set(self.lineEditTextA.setText, "")
+        self.view.set(self.lineEditTextB.setText, "")
+        self.view.set(self.lineEditProgramType.setText, "")
+        self.view.set(self.lineEditProgramType.setToolTip, "")
+        self.view.set(self.lineEditStereo.setText, "")
+        self.view.set(self.lineEditTime.setText, "")
 
 
     def open(self):
         """a HID device has been plugged in..."""
         # loadServices()
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x01
-        self.bufferOut[2] = 0x01
-        self.bufferOut[3] = 0x00
-        self.bufferOut[4] = 0x23
-        self.bufferOut[5] = 0x00
-        self.bufferOut[6] = 0x00
-        self.bufferOut[7] = 0x00
-        self.bufferOut[8] = 0x00
-        self.bufferOut[9] = 0x00
-        self.bufferOut[10] = 0x00
-        self.bufferOut[11] = 0x00
-        self.bufferOut[12] = 0x00
-        self.bufferOut[13] = 0x63
-        self.bufferOut[14] = 0x11
-        self.bufferOut[15] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        order = bytes(bytearray(self.bufferOut))
-        self.hidSend(order)
-        self.timer.timeout.connect(self.readDevice)
-        self.timer.start(50)
+        if not self.writer.is_alive():
+            # Stopped by close()
+            self.startWriter()
+        self.hidSend(POWER_UP_COMMAND)
+        self.spinBoxUpDownSeekThresholdChanged()
+        self.startReading()
         self.pushButtonOn.setEnabled(False)
         self.pushButtonOff.setEnabled(True)
         self.toolStripStatusLabel1.setText("FM Tuner connected")
@@ -317,11 +434,7 @@ class Fm(QMainWindow, Ui_MainWindow):
         Returns:
             dataStr: String like this "00 01 15 14 8d"
         """
-        dataStr = ""
-        for i in data:
-            dataStr = dataStr + " " + hex(i)
-        dataStr = dataStr.replace("0x", "")
-        return dataStr
+        return bytes(data).hex(" ")
 
     def buffertostring(self, buffer):
         """Converts a list of value  in data to String in hexadecimal form
@@ -330,13 +443,9 @@ class Fm(QMainWindow, Ui_MainWindow):
                     data: List eg. buffer = [0x00, 0x01, 0x15, 0x14, 0x8d]
 
                 Returns:
-                    dataStr: String like this "00 00 01 15 14 8d"
+                    dataStr: String like this "00 01 15 14 8d"
         """
-        dataStr = ""
-        for i in buffer:
-            dataStr = dataStr + " " + hex(i)
-        dataStr = dataStr.replace("0x", "")
-        return dataStr
+        return bytes(buffer).hex(" ")
 
     def createConnections(self):
         """Identifies the different widgets and
@@ -363,9 +472,98 @@ class Fm(QMainWindow, Ui_MainWindow):
         self.pushButtonTuneDown.clicked.connect(self.tuneDownButtonPressed)
         self.checkBoxMono.clicked.connect(self.checkBoxMonoClicked)
         self.checkBoxMute.clicked.connect(self.checkBoxMuteClicked)
+        self.comboBoxDeEmphasis.currentIndexChanged.connect(self.comboBoxDeEmphasisSelected)
         self.lineEditFrequencyValue.textChanged.connect(self.changeValue)
         self.checkBoxMemory.stateChanged.connect(self.enablePresetsSelected)
+        self.spinBoxUpDownSeekThreshold.valueChanged.connect(self.spinBoxUpDownSeekThresholdChanged)
+
+
+    def startReading(self):
+        """Starts reading the device, on the reader thread, on a socket
+        notifier or with the timer"""
+        self.stopReading()
+        if self.useNotifier and hasattr(self.myDevice, "fileno"):
+            self.notifier = QSocketNotifier(self.myDevice.fileno(), QSocketNotifier.Type.Read)
+            self.notifier.activated.connect(self.onDeviceReadable)
+        elif self.useReaderThread and self.useDrain:
+            # Reports read into preallocated buffers are released once decoded
+            pool = ReportPool(40) if self.usePool and hasattr(self.myDevice, "readinto") else None
+            self.reader = HidReader(self.myDevice, onPending=self.com.reportsPending.emit, pool=pool,
+                                    errors=self.errors)
+            self.reader.start()
+        elif self.useReaderThread:
+            self.reader = HidReader(self.myDevice, self.com.reportReceived.emit, errors=self.errors)
+            self.reader.start()
+        else:
+            self.timer.start(50)
+
+    def stopReading(self):
+        """Stops reading the device"""
+        self.timer.stop()
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier = None
+        if self.reader is not None:
+            self.reader.stop()
+            self.reader = None
+
+    def onReport(self, report, timestamp):
+        """Decodes a report coming from the reader thread
+
+        Args:
+            report: bytes, input report
+            timestamp: int, time.perf_counter_ns() when the report was read
+        """
+        self.decodeLatency.append(time.perf_counter_ns() - timestamp)
+        self.recordTraffic(IN, report, timestamp)
+        self.bufferIn = report
+        self.onRead()
+
+    def onReportsPending(self):
+        """Decodes in order every report drained by the reader thread
+        since the last wake-up, the widgets are repainted once for the batch
+        """
+        if self.reader is None:
+            return
+        reports, timestamp = self.reader.takePending()
+        try:
+            self.decodeBatch(reports, timestamp)
+        finally:
+            self.reader.release(reports)
+
+    def onDeviceReadable(self):
+        """The device file descriptor has data, decodes every queued report"""
+        timestamp = time.perf_counter_ns()
+        try:
+            reports = self.myDevice.read_many(64, 40, 0)
+        except Exception as error:
+            self.notifier.setEnabled(False)
+            self.errors.record(classify(error, "read"))
+            self.toolStripStatusLabel1.setText("FM Tuner read error")
+            self.refreshStatus()
+            return
+        self.decodeBatch(reports, timestamp)
+
+    def decodeBatch(self, reports, timestamp):
+        """Decodes reports in order
 
+        Args:
+            reports: list, input reports in arrival order
+            timestamp: int, time.perf_counter_ns() when the first one was read
+        """
+        if not reports:
+            return
+        self.decodeLatency.append(time.perf_counter_ns() - timestamp)
+        # RSQ (0x32) and ACF (0x33) are status snapshots, only the newest is shown,
+        # the transactions and the scanner get every one (STC bit, samples)
+        newest = {}
+        for i, report in enumerate(reports):
+            newest[report[0]] = i
+            self.recordTraffic(IN, report, timestamp)
+        # The decoders only fill the view model, the widgets change at the next frame
+        for i, report in enumerate(reports):
+            self.bufferIn = report
+            self.onRead(report[0] not in (0x32, 0x33) or newest[report[0]] == i)
 
     def readDevice(self):
         """Reads the device"""
@@ -373,56 +571,53 @@ class Fm(QMainWindow, Ui_MainWindow):
         try:
             self.bufferIn = self.myDevice.read(size=40, timeout=1)
             if self.bufferIn:
-                dataInHex = self.buffertostring(self.bufferIn)
-                self.lineEditBufferIn.setText(dataInHex)
+                self.recordTraffic(IN, self.bufferIn)
                 self.onRead()
 
-        except Exception:
-            pass
-            """
-            msgBox = QMessageBox()
-            msgBox.setWindowTitle("Message")
-            msgBox.setText("Reading error")
-            msgBox.setStandardButtons(QMessageBox.StandardButton.Cancel)
-            msgBox.setDefaultButton(QMessageBox.StandardButton.Cancel)
-            answer = msgBox.exec()
-            if answer == QMessageBox.StandardButton.Cancel:
-                pass
-            """
+        except Exception as error:
+            # Counted and shown in the status bar, the timer reads again at the next tick
+            self.errors.record(classify(error, "read"))
 
-    def onRead(self):
+    def onRead(self, show=True):
         """On read event
         read the data (don't forget, pass the whole array)...
+
+        Args:
+            show: bool, False only feeds the transactions and the scanner
+                (a status snapshot replaced by a newer one of the batch)
         """
         # self.timer3.setInterval(50)   # Disable HID_Send for 50 mSec
-        match self.bufferIn[0]:
-            case 0x08:                # Response 0x08 GET_PART_INFO ( See AN649 )
-                self.partInfo()
-            case 0x09:               # Response 0x09 GET_SYS_STATE ( See AN649 )
-                self.systemState()
-            case 0x12:               # Response 0x12 GET_FUNC_INFO ( See AN649 )
-                self.firmwareRevision()
-            case 0x32:               #
-                self.fmRsqStatus()
-            case 0x33:               #
-                self.fmAcfStatus()
-            case 0x34:               #
-                self.fmRdsStatus()
-
-    def partInfo(self):
+        report = parseReport(self.bufferIn)
+        self.transactions.onReport(report)
+        if self.scanner is not None:
+            self.scanner.onReport(report)
+        if not show:
+            return
+        match report:
+            case PartInfo():          # Response 0x08 GET_PART_INFO ( See AN649 )
+                self.partInfo(report)
+            case SystemState():       # Response 0x09 GET_SYS_STATE ( See AN649 )
+                self.systemState(report)
+            case FunctionInfo():      # Response 0x12 GET_FUNC_INFO ( See AN649 )
+                self.firmwareRevision(report)
+            case RsqStatus():         # Response 0x32 FM_RSQ_STATUS
+                self.fmRsqStatus(report)
+            case AcfStatus():         # Response 0x33 FM_ACF_STATUS
+                self.fmAcfStatus(report)
+            case RdsStatus():         # Response 0x34 FM_RDS_STATUS
+                self.fmRdsStatus(report)
+
+    def partInfo(self, report):
         """
         Part Info
         """
         print("Part Info")
-        Skyworks_Part_Number = str(self.bufferIn[13] * 256 + self.bufferIn[12])
-        Microchip_Part_Number = chr(self.bufferIn[27]) + chr(self.bufferIn[28]) + chr(self.bufferIn[29]) + \
-                                chr(self.bufferIn[30]) + chr(self.bufferIn[31]) + chr(self.bufferIn[32]) + \
-                                chr(self.bufferIn[33]) + chr(self.bufferIn[34]) + chr(self.bufferIn[35]) + \
-                                chr(self.bufferIn[36]) + chr(self.bufferIn[37]) + chr(self.bufferIn[38])
-        partInfoText = Microchip_Part_Number + " / Si" + Skyworks_Part_Number
+        # Answer to a power up, or the tuner was reset: the properties are written again
+        self.writer.forget()
+        partInfoText = report.microchipPart + " / Si" + str(report.skyworksPart)
         self.toolStripStatusLabel2.setText(partInfoText)
 
-    def systemState(self):
+    def systemState(self, report):
         """
 
         :return:
@@ -430,7 +625,7 @@ class Fm(QMainWindow, Ui_MainWindow):
         """
 
         print("System State")
-        Image_System = self.bufferIn[8]
+        Image_System = report.image
         print(Image_System)
         match Image_System:
             case 0:
@@ -464,6 +659,7 @@ class Fm(QMainWindow, Ui_MainWindow):
                 self.comboBoxDeEmphasis.setEnabled(True)
                 self.spinBoxUpDownSeekThreshold.setEnabled(True)
                 self.horizontalScrollBarVolume.setEnabled(True)
+                self.pushButtonScan.setEnabled(True)
 
             case 2:
                 self.toolStripStatusLabel3.setText("DAB is active")
@@ -482,467 +678,355 @@ class Fm(QMainWindow, Ui_MainWindow):
 
 
 
-    def firmwareRevision(self):
+    def firmwareRevision(self, report):
         """
         Give SI firmware and PIC firmware
         """
         print("firmware")
 
-        SI_First_Rev = str(self.bufferIn[8])
-        SI_Second_Rev = str(self.bufferIn[9])
-        SI_Third_Rev = str(self.bufferIn[10])
-        PIC_First_Rev = str(self.bufferIn[16])
-        PIC_Second_Rev = str(self.bufferIn[17])
-        PIC_Third_Rev = str(self.bufferIn[18])
-        firmwareText = " PIC Firmware revision : " + PIC_First_Rev + "." + PIC_Second_Rev + "." + PIC_Third_Rev + \
-                       " / Si Firmware revision : " + SI_First_Rev + "." + SI_Second_Rev + "." + SI_Third_Rev
+        firmwareText = " PIC Firmware revision : {}.{}.{}".format(*report.picRevision) + \
+                       " / Si Firmware revision : {}.{}.{}".format(*report.siRevision)
         self.toolStripStatusLabel4.setText(firmwareText)
 
-    def fmRsqStatus(self):
-        readChannel = (self.bufferIn[11] * 256) + self.bufferIn[10]
-        if (self.bufferIn[12] < 128):
-            frequencyOffset = self.bufferIn[12]
-        else:
-            frequencyOffset = self.bufferIn[12] - 256
-        if (self.bufferIn[13] < 128):
-            RSSI = self.bufferIn[13]
-        else:
-           RSSI = self.bufferIn[13] - 256
-        if (self.bufferIn[14] < 128):
-            SNR =self.bufferIn[14]
-        else:
-            SNR = self.bufferIn[14] - 256
-        multipath = self.bufferIn[15]
-        self.lineEditFrequency.setText(str(readChannel/100) + " Mhz")
-        self.lineEditFrequencyValue.setText(str(readChannel))
-        self.labelFrequencyOff.setText(str(frequencyOffset) + " BPPM")
-        self.labelRSSI.setText(str(RSSI) + " dBµV")
-        self.labelSNR.setText(str(SNR) + " dB")
-        self.labelMultipath.setText(str(multipath))
-        self.progressBarFrequencyOffset.setValue(abs(frequencyOffset))
-        self.progressBarRSSI.setValue(RSSI + 128)
-        self.progressBarSNR.setValue(SNR + 128)
-        self.progressBarMultipath.setvalue(multipath)
-
-    def fmAcfStatus(self):
-        softMuteattenuation = self.bufferIn[10]
-        highCut = self.bufferIn[11]
-        stereoBlend = self.bufferIn[12]
-        self.labelSoftMute.setText(str(softMuteattenuation & 0x1F) + " dB")
-        self.progressBarSoftMute.setValue(softMuteattenuation & 0x1F)
-        self.labelHighCut.setText(str(highCut / 10) + " Khz")
-        self.progressBarHighCut.setValue(highCut / 10)
-        monoStereo = stereoBlend & 0x80
-        if (monoStereo == 0x80):
-            self.label4.setText("ST Blend")
-            self.progressBarStBlend.setEnabled(True)
-            self.labelStereoBlend.setText(str(stereoBlend & 0x7F) + " %")
-            self.progressBarStBlend.setValue(stereoBlend & 0x7F)
+    def fmRsqStatus(self, report):
+        readChannel = report.channel
+        frequencyOffset = report.offset
+        RSSI = report.rssi
+        SNR = report.snr
+        multipath = report.multipath
+        if readChannel != self.rdsCache.channel and not self.transactions.pending("channel"):
+            # Seek, or the first report after power up
+            self.clearTextBox()
+            self.stationTuned(readChannel)
+        view = self.view
+        view.set(self.lineEditFrequency.setText, str(readChannel/100) + " Mhz")
+        view.set(self.lineEditFrequencyValue.setText, str(readChannel))
+        view.set(self.labelFrequencyOff.setText, str(frequencyOffset) + " BPPM")
+        view.set(self.labelRSSI.setText, str(RSSI) + " dBµV")
+        view.set(self.labelSNR.setText, str(SNR) + " dB")
+        view.set(self.labelMultipath.setText, str(multipath))
+        view.set(self.progressBarFrequencyOffset.setValue, abs(frequencyOffset))
+        view.set(self.progressBarRSSI.setValue, RSSI + 128)
+        view.set(self.progressBarSNR.setValue, SNR + 128)
+        view.set(self.progressBarMultipath.setValue, multipath)
+
+    def fmAcfStatus(self, report):
+        highCut = report.highCut
+        view = self.view
+        view.set(self.labelSoftMute.setText, str(report.softMute) + " dB")
+        view.set(self.progressBarSoftMute.setValue, report.softMute)
+        view.set(self.labelHighCut.setText, str(highCut / 10) + " Khz")
+        view.set(self.progressBarHighCut.setValue, highCut // 10)
+        if report.stereo:
+            view.set(self.label4.setText, "ST Blend")
+            view.set(self.progressBarStBlend.setEnabled, True)
+            view.set(self.labelStereoBlend.setText, str(report.blend) + " %")
+            view.set(self.progressBarStBlend.setValue, report.blend)
         else:
-            self.label4.setText(" Mono")
-            self.labelStereoBlend.setText("")
-            self.progressBarStBlend.setValue(0)
-            self.progressBarStBlend.setEnabled(False)
-
-
-
-    def fmRdsStatus(self):
-        RDSA_L = self.bufferIn[16]
-        RDSA_H = self.bufferIn[17]
-        RDSB_L = self.bufferIn[18]
-        RDSB_H = self.bufferIn[19]
-        RDSC_L = self.bufferIn[20]
-        RDSC_H = self.bufferIn[21]
-        RDSD_L = self.bufferIn[22]
-        RDSD_H = self.bufferIn[23]
-
-        # Program Identification
-        progID = str(RDSA_H) + str(RDSA_L)
-        # print("Programme Identification : " + progID)
-        self.lineEditPID.setText(progID)
-
-        # Program Type
-        pty = ((RDSB_H & 0x3) << 8) + ((RDSB_L & 0xE0) >> 32)
-        # print("pty : " + str(pty))
-
-        t0 = "00 No program type"
-        t1 = "01 News()"
-        t2 = "02 Current(affairs)"
-        t3 = "03 Information()"
-        t4 = "04 Sport()"
-        t5 = "05 Education()"
-        t6 = "06 Drama()"
-        t7 = "07 Culture()"
-        t8 = "08 Science()"
-        t9 = "09 Varied()"
-        t10 = "10 Pop(music)"
-        t11 = "11 Rock(music)"
-        t12 = "12 Easy(listening)"
-        t13 = "13 Light(classical)"
-        t14 = "14 Serious(classical)"
-        t15 = "15 Other(music)"
-        t16 = "16 Weather()"
-        t17 = "17 Finance()"
-        t18 = "18 Children()"
-        t19 = "19 Social(affairs)"
-        t20 = "20 Religion()"
-        t21 = "21 Phone-in"
-        t22 = "22 Travel()"
-        t23 = "23 Leisure()"
-        t24 = "24 Jazz(music)"
-        t25 = "25 Country(music)"
-        t26 = "26 National(music)"
-        t27 = "27 Oldies(music)"
-        t28 = "28 Folk(music)"
-        t29 = "29 Documentary()"
-        t30 = "30 Alarm(Test)"
-        t31 = "31 Alarm()"
-        t32 = "Error"
-        if pty > 32:
-            pty = 32
-
-        ptyTuple = (t0, t1, t2, t3, t4, t5, t6, t7, t8, t9, t10, t11, t12, t13, t14, t15, t16,t17, t18, t19, t20, t21,
-                    t22, t23, t24, t25, t26, t27, t28, t29, t30, t31, t32)
-
-        # print('Program type : ' + str(ptyTuple[pty]))
-        self.lineEditProgramType.setText(str(ptyTuple[pty]))
-
-        # Type Group
-        groupType = RDSB_H & 0xF0
-        # Group 0
-        if groupType == 0x0:
-            diSegment = RDSB_L & 0x03
-            di = RDSB_L & 0x07
-            ta = RDSB_L & 0x10
-            tp = RDSB_H & 0x04
-            ms = RDSB_L & 0x08
-            dataStr = hex(di)
-            dataStr = dataStr.replace("0x", "")
-            self.lineEditDI.setText(dataStr)
-            if ta == 0x10:
-                self.labelTA.setStyleSheet("background-color: lightgreen;")
-            else:
-                self.labelTA.setStyleSheet("background-color: lightgray;")
-            if tp == 0x04:
-                self.labelTP.setStyleSheet("background-color: lightgreen;")
-            else:
-                self.labelTP.setStyleSheet("background-color: lightgray;")
-            if ms == 0x08:
-                self.labelMS.setStyleSheet("background-color: lightgreen;")
-            else:
-                self.labelMS.setStyleSheet("background-color: lightgray;")
-
-            # print('diSegment : ' + str(diSegment))
-            # print('di : ' + str(di))
-            # print('ta : ' + str(ta))
-            # print('ms : ' + str(ms))
-
-            l0 = "Mono"
-            l1 = "Stereo"
-            l2 = "Not Artificial Head"
-            l3 = "Artificial Head"
-            l4 = "Not Compressed"
-            l5 = "Compressed"
-            l6 = "Static PTY"
-            l7 = "Dynamic PTY"
-
-            if di == 0:
-                self.lineEditStereo.setText(l0)
-            elif di == 4:
-                self.lineEditStereo.setText(l1)
-            elif di == 1:
-                self.lineEditHead.setText(l2)
-            elif di == 5:
-                self.lineEditHead.setText(l3)
-            elif di == 2:
-                self.lineEditCompressed.setText(l4)
-            elif di == 6:
-                self.lineEditCompressed.setText(l5)
-            elif di == 3:
-                self.lineEditPTY.setText(l6)
-            elif di == 7:
-                self.lineEditPTY.setText(l7)
-
-            if (RDSD_H < 0x20 | RDSD_H > 0x7E):
-                RDSD_H  = 0x20
-            if (RDSD_L < 0x20 | RDSD_L > 0x7E):
-                RDSD_L  = 0x20
-
-            textPS = ""
-
-            if diSegment == 0x0:
-                PS1 = chr(RDSD_H) + chr(RDSD_L)
-                self.PS[diSegment] = PS1
-            elif diSegment == 0x1:
-                PS2 = chr(RDSD_H) + chr(RDSD_L)
-                self.PS[diSegment] = PS2
-            elif diSegment == 0x2:
-                PS3 = chr(RDSD_H) + chr(RDSD_L)
-                self.PS[diSegment] = PS3
-            elif diSegment == 0x3:
-                PS4 = chr(RDSD_H) + chr(RDSD_L)
-                self.PS[diSegment] = PS4
-            # print('PS1 to PS4 : ' + PS1 + PS2 + PS3 + PS4)
-            for iter in range(4):
-                textPS = textPS + self.PS[iter]
-            # print('textPS : ' + textPS)
-            self.lineEditPS.setText(textPS)
-
-        if groupType == 0x20:
-            testSegment = RDSB_L & 0x0F
-            textAbFlag = RDSB_L & 0x10
-            textStr = chr(RDSC_H) + chr(RDSC_L) + chr(RDSD_H) + chr(RDSD_L)
-            textA = ""
-            textB = ""
-            if textAbFlag == 0x0:
-                self.RTA[testSegment] = textStr
-                for iter in range(16):
-                    textA = textA + self.RTA[iter]
-                # print('Text A : ' + textA)
-                self.lineEditTextA.setText(textA)
-            if textAbFlag == 0x10:
-                self.RTB[testSegment] = textStr
-                for iter in range(16):
-                    textB = textB + self.RTB[iter]
-                # print('Text B : ' + textB)
-                self.lineEditTextB.setText(textB)
-
-        if groupType == 0x40:
-
-            # Time
-            hour = (int((RDSD_H & 0xF0) / 16)) + ((RDSC_L & 0x1) * 16)
-            minute = (int((RDSD_L & 0xC0) / 64)) + ((RDSD_H & 0xF) * 4)
-            localTime = RDSD_L & 0x20
-            localTimeOffset = (RDSD_L & 0x1F) * 30
-            minuteTemp = (hour * 60) + minute
-            if localTime == 0x0:
-                hour = int((minuteTemp + localTimeOffset) / 60)
-                minute = (minuteTemp + localTimeOffset) - (hour * 60)
-                if hour >= 24:
-                    hour = hour - 24
-            else:
-                hour = int((minuteTemp - localTimeOffset) / 60)
-                minute = (minuteTemp - localTimeOffset) - (hour * 60)
-                if hour < 0:
-                    hour = hour + 24
-            if hour < 10:
-                hourStr = "0" + str(hour)
-            else:
-                hourStr = str(hour)
-            if minute < 10:
-                minuteStr = "0" + str(minute)
-            else:
-                minuteStr = str(minute)
-            timeStr = hourStr + " : " + minuteStr
-            #            print(timeStr)
-            self.lineEditTime.setText(timeStr)
-
-            # Date
-            mjd = int(((RDSC_H * 256) + (RDSC_L & 0xFE)) / 2) + ((RDSB_L & 0x03) * 32768)
-            #            print("MJD : " + str(mjd))
-            self.lineEditMJD.setText(str(mjd))
-            # mjd = 58712 # for test
-            yPrime = int((mjd - 15078.2) / 365.25)
-            mPrime = int((mjd - 14956.1 - int(yPrime * 365.25)) / 30.6001)
-            d = mjd - 14956 - int(yPrime * 365.25) - int(mPrime * 30.6001)
-            if mPrime == 14 or mPrime == 15:
-                k = 1
-            else:
-                k = 0
-            y = yPrime + k + 1900
-            m = mPrime - 1 - (k * 12)
-            dw = (mjd + 2) - (int((mjd + 2) / 7) * 7)
-            week = ("Monday ", "Tuesday ", "Wednesday ", "Thursday ", "Friday ", "Saturday", "Sunday ")
-            day = week[dw]
-
-            dateStr = day + str(d) + " / " + str(m) + " / " + str(y)
-            #            print(dateStr)
-            self.lineEditDate.setText(dateStr)
+            view.set(self.label4.setText, " Mono")
+            view.set(self.labelStereoBlend.setText, "")
+            view.set(self.progressBarStBlend.setValue, 0)
+            view.set(self.progressBarStBlend.setEnabled, False)
+
+    def fmRdsStatus(self, report):
+        """Displays the events of the RDS group decoder"""
+        view = self.view
+        if self.transactions.pending("channel"):
+            # Groups of the previous station, queued before the tune or seek
+            return
+        if report.a and self.rdsCache.heard(report.a):
+            # Block A is the PI of every group, 0 without RDS, a new PI
+            # must repeat so a corrupted block A doesn't change the station
+            self.stationIdentified(report.a)
+        events = self.rds.decodeGroup(report.a, report.b, report.c, report.d)
+        self.rdsCache.learn(events)
+        for event in events:
+            match event:
+                case Header():
+                    view.set(self.lineEditPID.setText, "{:04X}".format(event.pi))
+                    view.set(self.lineEditProgramType.setText, PTY_NAMES[event.pty])
+                    view.set(self.setTP, bool(event.tp))
+                case Switches():
+                    view.set(self.lineEditDI.setText, "{:x}".format(event.segment | (event.di << 2)))
+                    view.set(self.setTA, bool(event.ta))
+                    view.set(self.setMS, bool(event.ms))
+                    view.set(self.diWidgets[event.segment].setText, DI_NAMES[event.segment][event.di])
+                case PsSegment():
+                    view.set(self.lineEditPS.setText, event.ps)
+                case RtSegment():
+                    if event.ab:
+                        view.set(self.lineEditTextB.setText, event.rt)
+                    else:
+                        view.set(self.lineEditTextA.setText, event.rt)
+                case PtynSegment():
+                    # Group 10A, name given by the station to its program type
+                    view.set(self.lineEditProgramType.setToolTip, event.ptyn.strip())
+                case ClockTime():
+                    hour, minute = localTime(event)
+                    view.set(self.lineEditTime.setText, "{:02d} : {:02d}".format(hour, minute))
+                    view.set(self.lineEditMJD.setText, str(event.mjd))
+                    year, month, day, weekDay = mjdToDate(event.mjd)
+                    view.set(self.lineEditDate.setText, "{} {} / {} / {}".format(WEEK_DAYS[weekDay], day, month, year))
+
+    def stationTuned(self, channel):
+        """Shows the cached station of a new channel, as provisional"""
+        info = self.rdsCache.tune(channel)
+        if info is not None:
+            # The first segments are voted against the cached texts, they
+            # don't blank the characters not received yet
+            self.rds.preset(info.ps, info.rtA, info.rtB)
+            self.showStation(info)
+        self.view.set(self.setProvisional, info is not None)
+
+    def stationIdentified(self, pi):
+        """The first groups give the PI: the cached station of (channel, PI)
+        is confirmed, or the provisional one is replaced. Never called again
+        for the identified station, the votes of the decoder are kept"""
+        provisional = self.rdsCache.provisional
+        previous = self.rdsCache.pi
+        info = self.rdsCache.identify(pi)
+        if info is not None:
+            if info != provisional:
+                # The segments received from now on replace the cached ones
+                self.rds.preset(info.ps, info.rtA, info.rtB)
+                self.showStation(info)
+        elif provisional is not None or previous is not None:
+            # The decoder holds the texts of another station, PsComplete and
+            # RtComplete must come again for this one
+            self.rds.reset()
+            for lineEdit in self.stationWidgets:
+                self.view.set(lineEdit.setText, "")
+        self.view.set(self.setProvisional, False)
+
+    def showStation(self, info):
+        """Displays a cached StationInfo"""
+        view = self.view
+        view.set(self.lineEditPS.setText, info.ps)
+        view.set(self.lineEditTextA.setText, info.rtA)
+        view.set(self.lineEditTextB.setText, info.rtB)
+        view.set(self.lineEditPID.setText, "{:04X}".format(info.pi))
+        if info.pty is not None:
+            view.set(self.lineEditProgramType.setText, PTY_NAMES[info.pty])
+        if info.di is not None:
+            for segment, lineEdit in enumerate(self.diWidgets):
+                view.set(lineEdit.setText, DI_NAMES[segment][(info.di >> (3 - segment)) & 0x1])
+
+    def setProvisional(self, provisional):
+        """Marks the station fields as coming from the cache"""
+        for lineEdit in self.stationWidgets:
+            lineEdit.setProperty("provisional", provisional)
+            lineEdit.style().unpolish(lineEdit)
+            lineEdit.style().polish(lineEdit)
+
+    def setIndicator(self, label, active):
+        """Colors a TA/TP/MS label, the style is only polished again on a change"""
+        label.setProperty("active", active)
+        label.style().unpolish(label)
+        label.style().polish(label)
+
+    def scheduleFrame(self):
+        """A widget property changed, applies it at the next frame"""
+        if not self.frameTimer.isActive():
+            self.frameTimer.start(self.frameInterval)
+
+    def flushView(self):
+        """Applies the properties changed since the last frame"""
+        self.view.flush()
 
     def seekUpButtonPressed(self):
         """Searches for a new radio station on a higher frequency
             This is executed when the seekUp button is pressed
         """
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x31
-        self.bufferOut[2] = 0x00
-        self.bufferOut[3] = 0x03
-        self.bufferOut[4] = 0x00
-        self.bufferOut[5] = 0x00
-        self.bufferOut[6] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        dataOut = bytes(bytearray(self.bufferOut))
-        self.hidSend(dataOut)
+        self.hidSend(seekCommand(up=True))
         # self.clearTextBox2()
 
     def seekDownButtonPressed(self):
         """Searches for a new radio station on a lower frequency
             This is executed when the seekDown button is pressed
         """
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x31
-        self.bufferOut[2] = 0x00
-        self.bufferOut[3] = 0x01
-        self.bufferOut[4] = 0x00
-        self.bufferOut[5] = 0x00
-        self.bufferOut[6] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        dataOut = bytes(bytearray(self.bufferOut))
-        self.hidSend(dataOut)
+        self.hidSend(seekCommand(up=False))
         # self.clearTextBox2()
 
     def tuneUpButtonPressed(self):
-        """Searches for a new radio station on a higher frequency
-            This is executed when the seekUp button is pressed
+        """Tunes the next channel (+100 kHz)
+            This is executed when the tuneUp button is pressed
         """
-        channel = ((0 + 875) + 1) * 10
-        if channel == 8740:
-            channel = 10800
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x31
-        self.bufferOut[2] = 0x00
-        self.bufferOut[3] = channel & 0xFF
-        self.bufferOut[4] = int((channel & 0xFF00) / 256)
-        self.bufferOut[5] = 0x00
-        self.bufferOut[6] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        dataOut = bytes(bytearray(self.bufferOut))
-        self.hidSend(dataOut)
-        # self.clearTextBox2()
+        self.tuneChannel(nextChannel(self.currentChannel(), CHANNEL_STEP))
 
     def tuneDownButtonPressed(self):
-        """Searches for a new radio station on a lower frequency
-            This is executed when the seekDown button is pressed
+        """Tunes the previous channel (-100 kHz)
+            This is executed when the tuneDown button is pressed
         """
-        channel = ((0 + 875) - 1) * 10
-        if channel == 8740:
-            channel = 10800
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x30
-        self.bufferOut[2] = 0x00
-        self.bufferOut[3] = channel & 0xFF
-        self.bufferOut[4] = int((channel & 0xFF00) / 256)
-        self.bufferOut[5] = 0x00
-        self.bufferOut[6] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        dataOut = bytes(bytearray(self.bufferOut))
-        self.hidSend(dataOut)
-        # self.clearTextBox2()
+        self.tuneChannel(nextChannel(self.currentChannel(), -CHANNEL_STEP))
+
+    def currentChannel(self):
+        """Returns the channel of the last 0x32 response, in 10 kHz"""
+        if self.transactions.channel is None:
+            return CHANNEL_MIN
+        return self.transactions.channel
+
+    def tuneChannel(self, channel):
+        """Tunes channel, in 10 kHz, the cached station is shown until the first group"""
+        self.clearTextBox()
+        self.stationTuned(channel)
+        return self.hidSend(tuneCommand(channel))
+
+    def scanButtonPressed(self):
+        """Scans the whole FM band, or stops the scan in progress
+            The band map is measured by the scanner thread, the tuned
+            channel is restored at the end
+        """
+        if not self.pushButtonScan.isEnabled():
+            return
+        if self.scanner is not None:
+            self.scanner.stop(0)
+            return
+        self.scanStart = self.currentChannel()
+        self.clearTextBox()
+        self.scanner = BandScanner(self.hidSend, rssiThreshold=self.spinBoxUpDownSeekThreshold.value(),
+                                   onProgress=self.com.scanProgress.emit, onDone=self.com.scanDone.emit)
+        self.progressBarScan.setRange(0, len(self.scanner.channels))
+        self.progressBarScan.setValue(0)
+        self.progressBarScan.show()
+        self.pushButtonScan.setText("Stop scan")
+        self.scanner.start()
+
+    def onScanProgress(self, progress):
+        """A channel was measured"""
+        self.view.set(self.progressBarScan.setValue, progress.index)
+
+    def onScanDone(self, bandMap, error):
+        """Shows the stations found and tunes back the channel of the scan start"""
+        scanner = self.scanner
+        self.scanner = None
+        self.progressBarScan.hide()
+        self.pushButtonScan.setText("Scan band")
+        if error is not None:
+            # A tune of the user cancelled the scan, the user channel is kept
+            self.toolStripStatusLabel4.setText("Scan stopped: " + str(error))
+            return
+        self.bandMap = bandMap
+        stations = " ".join("{:.1f}".format(channel / 100) for channel in scanner.stations())
+        self.toolStripStatusLabel4.setText("{} stations in {:.1f} s: {}".format(
+            len(scanner.stations()), scanner.elapsed, stations))
+        if self.pushButtonScan.isEnabled():
+            self.tuneChannel(self.scanStart)
 
     def checkBoxMonoClicked(self):
         """Changes Mono or Stereo
             Mono is executed when Mono checkBox is checked
             stereo is executed when Mono checkBox is no checked
         """
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x13
-        self.bufferOut[2] = 0x00
-        self.bufferOut[3] = 0x02
-        self.bufferOut[4] = 0x03
-        if self.checkBoxMono.isChecked():
-            self.bufferOut[5] = 0x01
-        else:
-            self.bufferOut[5] = 0x00
-        self.bufferOut[6] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        dataOut = bytes(bytearray(self.bufferOut))
-        self.hidSend(dataOut)
+        self.writer.setProperty(PROPERTY_MONO, 0x01 if self.checkBoxMono.isChecked() else 0x00)
 
     def checkBoxMuteClicked(self):
         """Changes Mute or no Mute
             Mute is executed when Mute checkBox is checked
             No mute is executed when Mute checkBox is no checked
         """
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x13
-        self.bufferOut[2] = 0x00
-        self.bufferOut[3] = 0x01
-        self.bufferOut[4] = 0x03
-        if self.checkBoxMute.isChecked():
-            self.bufferOut[5] = 0x03
-        else:
-            self.bufferOut[5] = 0x00
-        self.bufferOut[6] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        dataOut = bytes(bytearray(self.bufferOut))
-        self.hidSend(dataOut)
+        self.writer.setProperty(PROPERTY_MUTE, 0x03 if self.checkBoxMute.isChecked() else 0x00)
 
     def comboBoxDeEmphasisSelected(self):
-        """
+        """Changes the de-emphasis: 0 USA 75 µS, 1 Europe 50 µS, 2 disabled"""
+        self.writer.setProperty(PROPERTY_DE_EMPHASIS, self.comboBoxDeEmphasis.currentIndex())
 
-        :return:
-        """
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x13
-        self.bufferOut[2] = 0x00
-        self.bufferOut[3] = 0x00
-        self.bufferOut[4] = 0x39
-        match self.comboBoxDeEmphasis.currentIndex():
-            case 0:
-                self.bufferOut[5] = 0x00
-            case 1:
-                self.bufferOut[5] = 0x01
-            case 2:
-                self.bufferOut[5] = 0x02
-        self.bufferOut[6] = 0x00
-        # hex(x) for x in a_list
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        dataOut = bytes(bytearray(self.bufferOut))
-        self.hidSend(dataOut)
+    def spinBoxUpDownSeekThresholdChanged(self):
+        """Changes the RSSI threshold of seek (dBµV)"""
+        self.writer.setProperty(PROPERTY_VALID_RSSI_THRESHOLD, self.spinBoxUpDownSeekThreshold.value())
 
     def horizontalScrollBarVolumeChanged(self):
-        """
-
-        :return:
-        """
+        """Changes the volume, only the latest value of a drag is written"""
         self.labelVolume = self.horizontalScrollBarVolume.value()
-        self.bufferOut[0] = 0x00
-        self.bufferOut[1] = 0x13
-        self.bufferOut[2] = 0x00
-        self.bufferOut[3] = 0x00
-        self.bufferOut[4] = 0x03
-        self.bufferOut[5] = self.horizontalScrollBarVolume.value()
-        self.bufferOut[6] = 0x00
-        dataOut = self.buffertostring(self.bufferOut)
-        self.lineEditBufferOut.setText(dataOut)
-        dataOut = bytes(bytearray(self.bufferOut))
-        self.hidSend(dataOut)
+        self.writer.setProperty(PROPERTY_VOLUME, self.horizontalScrollBarVolume.value())
 
 
     def changeValue(self, value):
         if value != "":
             value = math.floor(int(value) / 10)
         else:
-            value = "8960"
+            value = 896
+        # RadioFMDisplay.setValue() schedules the repaint of the needle
         self.com.updateDisplay.emit(value)
-        self.radioDisplay.repaint()
+
+    def startWriter(self):
+        """Starts the writer thread"""
+        self.writer = CommandWriter(self.myDevice, onWrite=self.onCommandSent, onError=self.com.commandFailed.emit,
+                                    errors=self.errors)
+        self.writer.start()
+
+    def sendCommand(self, command, transaction):
+        """Queues a command on the writer thread (TransactionManager.send)"""
+        self.writer.send(command, transaction)
 
     def hidSend(self, dataOut=b"\x00"):
-        """Sends a command for the USB HID device
+        """Queues a command for the USB HID device, written by the writer thread
         Args:
             dataOut: byte, command to the device
+
+        Returns:
+            transaction: Transaction, wait() returns the response
         """
-        try:
-            res1 = self.myDevice.write(dataOut)
-            dataOutStr = ""
-            for data in dataOut:
-                dataOutStr += str("{0:02X}".format(data)) + " "
-        except Exception:
-            msgBox = QMessageBox()
-            msgBox.setWindowTitle("Message")
-            msgBox.setText("Writing error")
-            msgBox.setStandardButtons(QMessageBox.StandardButton.Cancel)
-            msgBox.setDefaultButton(QMessageBox.StandardButton.Cancel)
-            answer = msgBox.exec()
-            if answer == QMessageBox.StandardButton.Cancel:
-                pass
+        return self.transactions.submit(dataOut)
+
+    def onCommandSent(self, command, transaction):
+        """A command was written (writer thread)"""
+        self.transactions.sent(command, transaction)
+        self.com.commandWritten.emit(command)
+
+    def onCommandWritten(self, command):
+        """Records the command written to the device"""
+        self.recordTraffic(OUT, command)
+
+    def recordTraffic(self, direction, report, timestamp=None):
+        """Records a report (IN) or a command (OUT) in the trace and the capture file"""
+        if timestamp is None:
+            timestamp = time.perf_counter_ns()
+        self.trace.append(direction, report, timestamp)
+        if self.capture is not None:
+            self.capture.record(direction, report, timestamp)
+
+    def refreshTrace(self):
+        """Displays the last report and command, at display rate and only
+        when the panel is seen"""
+        if not self.isVisible() or self.isMinimized():
+            return
+        for direction, lineEdit in ((IN, self.lineEditBufferIn), (OUT, self.lineEditBufferOut)):
+            sequence = self.trace.last[direction]
+            if sequence != self.traceShown[direction]:
+                self.traceShown[direction] = sequence
+                lineEdit.setText(self.trace.hex(sequence))
+
+    def showTrace(self):
+        """Opens the trace window (Ctrl+T)"""
+        if self.traceView is None:
+            self.traceView = TraceView(self.trace)
+        self.traceView.show()
+        self.traceView.raise_()
+
+    def onCommandFailed(self, error, command):
+        """A command could not be written, even after the retries
+
+        Args:
+            error: hiderrors.HidError
+            command: bytes, command not written
+        """
+        self.refreshStatus()
+
+    def refreshStatus(self):
+        """Shows the latest HID error in the status bar, cleared when no
+        error came for errors.window seconds"""
+        errors = self.errors
+        now = time.monotonic()
+        recent = errors.last is not None and now - errors.lastTime < errors.window
+        if (errors.count, recent) == self.errorsShown:
+            return
+        self.errorsShown = (errors.count, recent)
+        text = ""
+        if recent:
+            text = "HID {} ({}): {} errors, {:.1f}/s, {} retried".format(
+                errors.last, errors.last.kind, errors.count, errors.rate(now), errors.retryCount)
+        self.view.set(self.labelHidStatus.setText, text)
+        self.view.set(self.setHidStatus, recent)
 
 # PRESET RADIOS
 
@@ -1001,23 +1085,7 @@ class Fm(QMainWindow, Ui_MainWindow):
                 pass
 
         else:
-            self.clearTextBox()
-            frequencyRadio = radios[index].channel
-            self.bufferOut[0] = 0x00
-            self.bufferOut[1] = 0x30
-            self.bufferOut[2] = 0x00
-            self.bufferOut[3] = int(frequencyRadio * 100) & 0xFF
-            print(self.bufferOut[3])
-            self.bufferOut[4] = int(((int(frequencyRadio * 100)) & 0xFF00) / 256)
-            print(self.bufferOut[4])
-            self.bufferOut[5] = 0x00
-            self.bufferOut[6] = 0x00
-            self.bufferOut[7] = 0x00
-            dataOut = self.buffertostring(self.bufferOut)
-            self.lineEditBufferOut.setText(dataOut)
-            dataOut = bytes(bytearray(self.bufferOut))
-            print(dataOut)
-            self.hidSend(dataOut)
+            self.tuneChannel(self.presetChannels[index])
 
 
     def disableAllPresets(self):
@@ -1074,8 +1142,13 @@ class Fm(QMainWindow, Ui_MainWindow):
         self.pushButtonPreset16.setText(radios[15].name.strip())
         self.pushButtonPreset16.setEnabled(radios[15].enable)
 
+    def buildPresetChannels(self):
+        """Converts once the frequency of each preset to a channel"""
+        self.presetChannels = [frequencyToChannel(radio.channel) for radio in radios]
+
     def saveSettings(self):
         """Save all presets on json file"""
+        self.buildPresetChannels()
         settings = {}
         for radio in radios:
             id = radio.id
@@ -1092,9 +1165,15 @@ class Fm(QMainWindow, Ui_MainWindow):
             settings[favIndex] = favDict
         # Serializing json
         json_object = json.dumps(settings, indent=4)
-        with open("radioSettings.json", "w") as outfile:
+        with open(os.path.join(appDir, "radioSettings.json"), "w") as outfile:
             outfile.write(json_object)
 
+def argumentValue(name, default=None):
+    """Returns the command line value following name, default if absent"""
+    if name in sys.argv[:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
 def loadStyleSheet(app, qssFile):
     file = QFile(qssFile)
     if file.open(QFile.ReadOnly | QFile.Text):
@@ -1106,11 +1185,14 @@ def main():
     app = QApplication(sys.argv)
 
     # Load the Combinear.qss style sheet
-    loadStyleSheet(app, "qss/Combinear.qss")
+    loadStyleSheet(app, os.path.join(appDir, "qss", "Combinear.qss"))
 
     window = Fm()
     window.show()
-    sys.exit(app.exec())
+    status = app.exec()
+    # Stand by the tuner, stop the threads and save the RDS cache
+    window.close()
+    sys.exit(status)
 
 
 if __name__ == "__main__":
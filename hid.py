@@ -1,10 +1,21 @@
 # This Python file uses the following encoding: utf-8
 
 import os
+import sys
+import time
 import ctypes
 import atexit
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-__all__ = ['HIDException', 'DeviceInfo', 'Device', 'enumerate']
+# The hidraw backend (fcntl ioctls, select.poll) exists only on Linux
+if sys.platform.startswith('linux'):
+    import fcntl
+    import select
+
+__all__ = ['HIDException', 'DeviceInfo', 'Device', 'HidrawDevice', 'AsyncDevice',
+           'enumerate', 'backend']
 
 
 hidapi = None
@@ -27,13 +38,25 @@ for lib in library_paths:
     except OSError:
         pass
 else:
-    error = "Unable to load any of the following libraries:{}"\
-        .format(' '.join(library_paths))
-    raise ImportError(error)
-
+    # On Linux the hidraw backend works without the library
+    if not sys.platform.startswith('linux'):
+        error = "Unable to load any of the following libraries:{}"\
+            .format(' '.join(library_paths))
+        raise ImportError(error)
+    hidapi = None
+
+# Backend used by Device and enumerate(): 'hidraw' (Linux, /dev/hidrawN,
+# pollable file descriptor) or 'hidapi'. Override with the HID_BACKEND
+# environment variable, or the backend argument of Device / enumerate().
+if sys.platform.startswith('linux') and os.path.isdir('/sys/class/hidraw'):
+    backend = 'hidraw'
+else:
+    backend = 'hidapi'
+backend = os.environ.get('HID_BACKEND', backend)
 
-hidapi.hid_init()
-atexit.register(hidapi.hid_exit)
+if hidapi is not None:
+    hidapi.hid_init()
+    atexit.register(hidapi.hid_exit)
 
 
 class HIDException(Exception):
@@ -65,45 +88,60 @@ DeviceInfo._fields_ = [
     ('next', ctypes.POINTER(DeviceInfo)),
 ]
 
-hidapi.hid_init.argtypes = []
-hidapi.hid_init.restype = ctypes.c_int
-hidapi.hid_exit.argtypes = []
-hidapi.hid_exit.restype = ctypes.c_int
-hidapi.hid_enumerate.argtypes = [ctypes.c_ushort, ctypes.c_ushort]
-hidapi.hid_enumerate.restype = ctypes.POINTER(DeviceInfo)
-hidapi.hid_free_enumeration.argtypes = [ctypes.POINTER(DeviceInfo)]
-hidapi.hid_free_enumeration.restype = None
-hidapi.hid_open.argtypes = [ctypes.c_ushort, ctypes.c_ushort, ctypes.c_wchar_p]
-hidapi.hid_open.restype = ctypes.c_void_p
-hidapi.hid_open_path.argtypes = [ctypes.c_char_p]
-hidapi.hid_open_path.restype = ctypes.c_void_p
-hidapi.hid_write.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t]
-hidapi.hid_write.restype = ctypes.c_int
-hidapi.hid_read_timeout.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t, ctypes.c_int]
-hidapi.hid_read_timeout.restype = ctypes.c_int
-hidapi.hid_read.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t]
-hidapi.hid_read.restype = ctypes.c_int
-hidapi.hid_set_nonblocking.argtypes = [ctypes.c_void_p, ctypes.c_int]
-hidapi.hid_set_nonblocking.restype = ctypes.c_int
-hidapi.hid_send_feature_report.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
-hidapi.hid_send_feature_report.restype = ctypes.c_int
-hidapi.hid_get_feature_report.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t]
-hidapi.hid_get_feature_report.restype = ctypes.c_int
-hidapi.hid_close.argtypes = [ctypes.c_void_p]
-hidapi.hid_close.restype = None
-hidapi.hid_get_manufacturer_string.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_size_t]
-hidapi.hid_get_manufacturer_string.restype = ctypes.c_int
-hidapi.hid_get_product_string.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_size_t]
-hidapi.hid_get_product_string.restype = ctypes.c_int
-hidapi.hid_get_serial_number_string.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_size_t]
-hidapi.hid_get_serial_number_string.restype = ctypes.c_int
-hidapi.hid_get_indexed_string.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_wchar_p, ctypes.c_size_t]
-hidapi.hid_get_indexed_string.restype = ctypes.c_int
-hidapi.hid_error.argtypes = [ctypes.c_void_p]
-hidapi.hid_error.restype = ctypes.c_wchar_p
-
-
-def enumerate(vid=0, pid=0):
+if hidapi is not None:
+    hidapi.hid_init.argtypes = []
+    hidapi.hid_init.restype = ctypes.c_int
+    hidapi.hid_exit.argtypes = []
+    hidapi.hid_exit.restype = ctypes.c_int
+    hidapi.hid_enumerate.argtypes = [ctypes.c_ushort, ctypes.c_ushort]
+    hidapi.hid_enumerate.restype = ctypes.POINTER(DeviceInfo)
+    hidapi.hid_free_enumeration.argtypes = [ctypes.POINTER(DeviceInfo)]
+    hidapi.hid_free_enumeration.restype = None
+    hidapi.hid_open.argtypes = [ctypes.c_ushort, ctypes.c_ushort, ctypes.c_wchar_p]
+    hidapi.hid_open.restype = ctypes.c_void_p
+    hidapi.hid_open_path.argtypes = [ctypes.c_char_p]
+    hidapi.hid_open_path.restype = ctypes.c_void_p
+    hidapi.hid_write.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t]
+    hidapi.hid_write.restype = ctypes.c_int
+    hidapi.hid_read_timeout.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t, ctypes.c_int]
+    hidapi.hid_read_timeout.restype = ctypes.c_int
+    hidapi.hid_read.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t]
+    hidapi.hid_read.restype = ctypes.c_int
+    hidapi.hid_set_nonblocking.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    hidapi.hid_set_nonblocking.restype = ctypes.c_int
+    hidapi.hid_send_feature_report.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+    hidapi.hid_send_feature_report.restype = ctypes.c_int
+    hidapi.hid_get_feature_report.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t]
+    hidapi.hid_get_feature_report.restype = ctypes.c_int
+    hidapi.hid_close.argtypes = [ctypes.c_void_p]
+    hidapi.hid_close.restype = None
+    hidapi.hid_get_manufacturer_string.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_size_t]
+    hidapi.hid_get_manufacturer_string.restype = ctypes.c_int
+    hidapi.hid_get_product_string.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_size_t]
+    hidapi.hid_get_product_string.restype = ctypes.c_int
+    hidapi.hid_get_serial_number_string.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_size_t]
+    hidapi.hid_get_serial_number_string.restype = ctypes.c_int
+    hidapi.hid_get_indexed_string.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_wchar_p, ctypes.c_size_t]
+    hidapi.hid_get_indexed_string.restype = ctypes.c_int
+    hidapi.hid_error.argtypes = [ctypes.c_void_p]
+    hidapi.hid_error.restype = ctypes.c_wchar_p
+
+
+def select_backend(name=None):
+    name = name or backend
+    if name == 'hidapi' and hidapi is None:
+        raise HIDException('hidapi library not found')
+    if name == 'hidraw' and not sys.platform.startswith('linux'):
+        raise HIDException('hidraw backend is Linux only')
+    if name not in ('hidapi', 'hidraw'):
+        raise ValueError('unknown backend {}'.format(name))
+    return name
+
+
+def enumerate(vid=0, pid=0, backend=None):
+    if select_backend(backend) == 'hidraw':
+        return hidraw_enumerate(vid, pid)
+
     ret = []
     info = hidapi.hid_enumerate(vid, pid)
     c = info
@@ -118,7 +156,13 @@ def enumerate(vid=0, pid=0):
 
 
 class Device(object):
-    def __init__(self, vid=None, pid=None, serial=None, path=None):
+    def __new__(cls, *args, **kwargs):
+        # Device() opens the device with the selected backend
+        if cls is Device and select_backend(kwargs.get('backend')) == 'hidraw':
+            cls = HidrawDevice
+        return object.__new__(cls)
+
+    def __init__(self, vid=None, pid=None, serial=None, path=None, backend=None):
         if path:
             self.__dev = hidapi.hid_open_path(path)
         elif serial:
@@ -168,6 +212,79 @@ class Device(object):
 
         return data.raw[:size]
 
+    def readinto(self, buffer, timeout=None):
+        # Fills a caller owned buffer (bytearray, writable memoryview or
+        # ctypes char array) without allocating, returns the report size.
+        if not isinstance(buffer, ctypes.Array):
+            buffer = (ctypes.c_char * len(buffer)).from_buffer(buffer)
+
+        if timeout is None:
+            return self.__hidcall(hidapi.hid_read, self.__dev, buffer, len(buffer))
+        return self.__hidcall(
+            hidapi.hid_read_timeout, self.__dev, buffer, len(buffer), timeout)
+
+    def read_many(self, count, size, timeout=None, out=None):
+        # Reads up to count reports in one call, until timeout ms have
+        # elapsed overall (None: blocks for the first report only, then
+        # takes the reports already queued). Returns a list of bytes, or
+        # with out (writable buffer of count * size bytes, report i at
+        # offset i * size) the list of report sizes.
+        if not self.__dev:
+            raise HIDException('device closed')
+        dev = self.__dev
+        read = hidapi.hid_read_timeout
+
+        if out is None:
+            rows = None
+            data = ctypes.create_string_buffer(size)
+        else:
+            rows = self.__rows(out, count, size)
+
+        if timeout is None:
+            deadline = None
+            wait = -1
+        else:
+            deadline = time.monotonic() + timeout / 1000.0
+            wait = timeout
+        ret = []
+        while len(ret) < count:
+            buf = data if rows is None else rows[len(ret)]
+            n = read(dev, buf, size, wait)
+            if n == -1:
+                raise HIDException(hidapi.hid_error(dev))
+            if n == 0:
+                break
+            ret.append(data.raw[:n] if rows is None else n)
+            if deadline is None:
+                wait = 0
+            else:
+                wait = max(0, int((deadline - time.monotonic()) * 1000))
+        return ret
+
+    def __rows(self, out, count, size):
+        # ctypes views of the rows of out, kept for the next call with the same buffer
+        key = (id(out), count, size)
+        if getattr(self, '_rows_key', None) != key:
+            self._rows = [(ctypes.c_char * size).from_buffer(out, i * size)
+                          for i in range(count)]
+            self._rows_key = key
+        return self._rows
+
+    def write_many(self, reports):
+        # Writes a sequence of output reports, returns the list of written sizes
+        if not self.__dev:
+            raise HIDException('device closed')
+        dev = self.__dev
+        write = hidapi.hid_write
+
+        ret = []
+        for data in reports:
+            n = write(dev, data, len(data))
+            if n == -1:
+                raise HIDException(hidapi.hid_error(dev))
+            ret.append(n)
+        return ret
+
     def send_feature_report(self, data):
         return self.__hidcall(hidapi.hid_send_feature_report,
                               self.__dev, data, len(data))
@@ -215,5 +332,397 @@ class Device(object):
         return buf.value
 
 
+# hidraw backend (Linux)
+
+HIDRAW_SYSFS = '/sys/class/hidraw'
+
+
+def _ioc(direction, number, size):
+    return (direction << 30) | (size << 16) | (ord('H') << 8) | number
+
+
+def HIDIOCSFEATURE(size):
+    return _ioc(3, 0x06, size)
+
+
+def HIDIOCGFEATURE(size):
+    return _ioc(3, 0x07, size)
+
+
+def _sysfs_read(*path):
+    try:
+        with open(os.path.join(*path)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _hidraw_info(name):
+    # Device information from /sys/class/hidraw/<name>, hid.enumerate() keys
+    device = os.path.join(HIDRAW_SYSFS, name, 'device')
+    uevent = {}
+    for line in (_sysfs_read(device, 'uevent') or '').splitlines():
+        key, _, value = line.partition('=')
+        uevent[key] = value
+    try:
+        bus, vid, pid = uevent.get('HID_ID', '').split(':')
+        vid, pid = int(vid, 16), int(pid, 16)
+    except ValueError:
+        return None
+    # The hid device sits in the usb interface, in the usb device
+    interface = _sysfs_read(device, '..', 'bInterfaceNumber')
+    usb = os.path.join(device, '..', '..')
+    return {
+        'path': ('/dev/' + name).encode(),
+        'vendor_id': vid,
+        'product_id': pid,
+        'serial_number': _sysfs_read(usb, 'serial') or uevent.get('HID_UNIQ', ''),
+        'release_number': int(_sysfs_read(usb, 'bcdDevice') or '0', 16),
+        'manufacturer_string': _sysfs_read(usb, 'manufacturer') or '',
+        'product_string': _sysfs_read(usb, 'product') or uevent.get('HID_NAME', ''),
+        'usage_page': 0,
+        'usage': 0,
+        'interface_number': int(interface, 16) if interface else -1,
+    }
+
+
+def hidraw_enumerate(vid=0, pid=0):
+    ret = []
+    try:
+        names = sorted(os.listdir(HIDRAW_SYSFS))
+    except OSError:
+        return ret
+
+    for name in names:
+        info = _hidraw_info(name)
+        if info is None:
+            continue
+        if vid and info['vendor_id'] != vid:
+            continue
+        if pid and info['product_id'] != pid:
+            continue
+        ret.append(info)
+
+    return ret
+
+
+class HidrawDevice(Device):
+    # Same interface as Device on a non-blocking /dev/hidrawN file
+    # descriptor, plus fileno() to wait for data with select, selectors,
+    # epoll or a QSocketNotifier. Any character device, pty or fifo path
+    # can stand in for the device node.
+    def __init__(self, vid=None, pid=None, serial=None, path=None, backend=None):
+        self.__fd = -1
+        self._nonblocking = 0
+        self._info = {}
+        if not path:
+            if not (vid and pid):
+                raise ValueError('specify vid/pid or path')
+            for info in hidraw_enumerate(vid, pid):
+                if not serial or info['serial_number'] == serial:
+                    self._info = info
+                    path = info['path']
+                    break
+            else:
+                raise HIDException('unable to open device')
+
+        if isinstance(path, bytes):
+            path = path.decode()
+        try:
+            self.__fd = os.open(path, os.O_RDWR | os.O_NONBLOCK | os.O_CLOEXEC)
+        except OSError as e:
+            raise HIDException('unable to open device: {}'.format(e)) from e
+        if not self._info and os.path.basename(path).startswith('hidraw'):
+            self._info = _hidraw_info(os.path.basename(path)) or {}
+
+        self.__poll = select.poll()
+        self.__poll.register(self.__fd, select.POLLIN)
+
+    def __check(self):
+        if self.__fd < 0:
+            raise HIDException('device closed')
+        return self.__fd
+
+    def __wait(self, timeout):
+        # True when a report is ready within timeout ms (None: forever)
+        if self._nonblocking and timeout is None:
+            timeout = 0
+        try:
+            events = self.__poll.poll(-1 if timeout is None else timeout)
+        except InterruptedError:
+            return False
+        for fd, event in events:
+            if event & (select.POLLERR | select.POLLHUP | select.POLLNVAL):
+                raise HIDException('device disconnected')
+        return bool(events)
+
+    def fileno(self):
+        return self.__check()
+
+    def write(self, data):
+        fd = self.__check()
+        try:
+            return os.write(fd, data)
+        except OSError as e:
+            raise HIDException(str(e)) from e
+
+    def write_many(self, reports):
+        fd = self.__check()
+        try:
+            return [os.write(fd, data) for data in reports]
+        except OSError as e:
+            raise HIDException(str(e)) from e
+
+    def read(self, size, timeout=None):
+        fd = self.__check()
+        if timeout != 0 and not self.__wait(timeout):
+            return b''
+        try:
+            data = os.read(fd, size)
+        except BlockingIOError:
+            return b''
+        except OSError as e:
+            raise HIDException(str(e)) from e
+        if not data and size:
+            # No data is EAGAIN on a non-blocking descriptor, end of file is a hangup
+            raise HIDException('device disconnected')
+        return data
+
+    def readinto(self, buffer, timeout=None):
+        fd = self.__check()
+        if timeout != 0 and not self.__wait(timeout):
+            return 0
+        try:
+            n = os.readv(fd, [buffer])
+        except BlockingIOError:
+            return 0
+        except OSError as e:
+            raise HIDException(str(e)) from e
+        if not n and len(buffer):
+            raise HIDException('device disconnected')
+        return n
+
+    def read_many(self, count, size, timeout=None, out=None):
+        # Each wait is followed by bare os.read()/os.readv() calls until
+        # EAGAIN, the queued reports cost one system call each
+        fd = self.__check()
+        if timeout is None:
+            deadline = None
+        else:
+            deadline = time.monotonic() + timeout / 1000.0
+        view = None if out is None else memoryview(out).cast('B')
+        ret = []
+        wait = timeout
+        while len(ret) < count:
+            if wait != 0 and not self.__wait(wait):
+                break
+            try:
+                while len(ret) < count:
+                    if view is None:
+                        data = os.read(fd, size)
+                        n = len(data)
+                    else:
+                        offset = len(ret) * size
+                        data = n = os.readv(fd, [view[offset:offset + size]])
+                    if not n and size:
+                        raise HIDException('device disconnected')
+                    ret.append(data)
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                raise HIDException(str(e)) from e
+            if deadline is None:
+                break
+            wait = int((deadline - time.monotonic()) * 1000)
+            if wait <= 0:
+                break
+        return ret
+
+    def send_feature_report(self, data):
+        fd = self.__check()
+        buf = bytearray(data)
+        try:
+            return fcntl.ioctl(fd, HIDIOCSFEATURE(len(buf)), buf, True)
+        except OSError as e:
+            raise HIDException(str(e)) from e
+
+    def get_feature_report(self, report_id, size):
+        fd = self.__check()
+        buf = bytearray(size)
+        buf[0] = report_id
+        try:
+            size = fcntl.ioctl(fd, HIDIOCGFEATURE(size), buf, True)
+        except OSError as e:
+            raise HIDException(str(e)) from e
+        return bytes(buf[:size])
+
+    def close(self):
+        if self.__fd >= 0:
+            self.__poll.unregister(self.__fd)
+            os.close(self.__fd)
+            self.__fd = -1
+
+    @property
+    def nonblocking(self):
+        return self._nonblocking
+
+    @nonblocking.setter
+    def nonblocking(self, value):
+        self.__check()
+        self._nonblocking = value
+
+    @property
+    def manufacturer(self):
+        return self._info.get('manufacturer_string', '')
+
+    @property
+    def product(self):
+        return self._info.get('product_string', '')
+
+    @property
+    def serial(self):
+        return self._info.get('serial_number', '')
+
+    def get_indexed_string(self, index, max_length=255):
+        raise HIDException('indexed strings are not available with hidraw')
+
+
+class AsyncDevice(object):
+    # asyncio wrapper of an open Device (or any object with the same
+    # read/write/close methods).
+    # Reports are read ahead into a bounded queue: by the event loop itself
+    # on a device with fileno() (hidraw), else by a reader thread. Writes
+    # go to their own thread (or straight to the non-blocking descriptor),
+    # so a pending read never delays a command. read() can be cancelled
+    # without losing a report and close() completes even when cancelled.
+    def __init__(self, device, size=64, queue_size=1024, poll=100):
+        self.device = device
+        self.size = size
+        self.poll = poll
+        self.dropped = 0
+        self._queue = asyncio.Queue(queue_size)
+        self._loop = None
+        self._fd = None
+        self._thread = None
+        self._writer = None
+        self._stop = threading.Event()
+        self._closing = None
+        self._error = None
+
+    @classmethod
+    def open(cls, *args, **kwargs):
+        # AsyncDevice.open(vid=..., pid=...) opens a Device
+        size = kwargs.pop('size', 64)
+        return cls(Device(*args, **kwargs), size=size)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.read()
+        except HIDException:
+            if self._closing is not None:
+                raise StopAsyncIteration
+            raise
+
+    def __start(self):
+        if self._loop is not None:
+            return
+        if self._closing is not None:
+            raise HIDException('device closed')
+        self._loop = asyncio.get_running_loop()
+        fileno = getattr(self.device, 'fileno', None)
+        if fileno is not None:
+            self._fd = fileno()
+            self._loop.add_reader(self._fd, self.__on_readable)
+        else:
+            self._thread = threading.Thread(target=self.__read_loop, name='AsyncDevice', daemon=True)
+            self._thread.start()
+
+    def __put(self, report):
+        # Event loop side, the oldest reports go when nobody reads
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(report)
+
+    def __fail(self, error):
+        self._error = error
+        # Wakes up a pending read()
+        if self._queue.empty():
+            self._queue.put_nowait(None)
+
+    def __on_readable(self):
+        try:
+            for report in self.device.read_many(64, self.size, 0):
+                self.__put(report)
+        except HIDException as e:
+            self._loop.remove_reader(self._fd)
+            self.__fail(e)
+
+    def __read_loop(self):
+        while not self._stop.is_set():
+            try:
+                report = self.device.read(self.size, self.poll)
+            except Exception as e:
+                if not self._stop.is_set():
+                    self._loop.call_soon_threadsafe(self.__fail, HIDException(str(e)))
+                return
+            if report:
+                self._loop.call_soon_threadsafe(self.__put, report)
+
+    async def read(self, timeout=None):
+        # Next report, timeout in s (None: wait forever)
+        self.__start()
+        if self._error is not None and self._queue.empty():
+            raise self._error
+        if timeout is None:
+            report = await self._queue.get()
+        else:
+            try:
+                report = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return b''
+        if report is None:
+            raise self._error or HIDException('device closed')
+        return report
+
+    async def write(self, data):
+        if self._closing is not None:
+            raise HIDException('device closed')
+        if hasattr(self.device, 'fileno'):
+            # Non-blocking descriptor, no need for a thread
+            return self.device.write(data)
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(1, 'AsyncDeviceWriter')
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self.device.write, data)
+
+    async def close(self):
+        if self._closing is None:
+            self._closing = asyncio.ensure_future(self.__close())
+        await asyncio.shield(self._closing)
+
+    async def __close(self):
+        self._stop.set()
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+        if self._thread is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+        if self._writer is not None:
+            # Queued commands still go out before the device is closed
+            await asyncio.get_running_loop().run_in_executor(None, self._writer.shutdown)
+        self.device.close()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self.__fail(HIDException('device closed'))
+
+
 # if__name__ == "__main__":
 #     pass
\ No newline at end of file
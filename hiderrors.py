@@ -0,0 +1,238 @@
+# This Python file uses the following encoding: utf-8
+"""
+ HID error handling
+
+ The errors of the USB HID device are classified in three kinds:
+   transient     USB glitch, timeout, busy pipe: the call is tried again
+   disconnected  the tuner was unplugged or the device closed
+   fatal         permission denied, bad argument, anything else
+ A transient error is retried a bounded number of times with an
+ exponential backoff (RetryPolicy), the other kinds fail at once.
+ Every failure is counted per operation and kind (ErrorStats), the panel
+ shows the latest one in its status bar instead of a modal dialog.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import errno
+import threading
+import time
+from collections import deque
+
+
+TRANSIENT = "transient"
+DISCONNECTED = "disconnected"
+FATAL = "fatal"
+
+transientErrnos = {errno.EAGAIN, errno.EINTR, errno.ETIMEDOUT, errno.EPIPE, errno.EIO, errno.EBUSY,
+                   errno.EPROTO, errno.EOVERFLOW}
+disconnectedErrnos = {errno.ENODEV, errno.ENXIO, errno.ENOENT, errno.ESHUTDOWN, errno.EBADF}
+
+# hidapi only gives a message, matched in lower case
+transientMessages = ("timed out", "temporarily unavailable", "input/output error", "broken pipe", "busy",
+                     "overflow", "interrupted")
+disconnectedMessages = ("closed", "disconnected", "no such device", "no such file")
+
+
+class HidError(Exception):
+    """
+        Classified HID error
+        ...
+    Attributes:
+        kind: string, TRANSIENT, DISCONNECTED or FATAL
+        operation: string, "read", "write", ...
+        error: Exception, original error
+        attempts: int, number of calls done before giving up
+    """
+
+    kind = FATAL
+
+    def __init__(self, error, operation="", attempts=1):
+        super().__init__("{} error: {}".format(operation, error) if operation else str(error))
+        self.error = error
+        self.operation = operation
+        self.attempts = attempts
+
+
+class TransientError(HidError):
+    kind = TRANSIENT
+
+
+class DisconnectedError(HidError):
+    kind = DISCONNECTED
+
+
+class FatalError(HidError):
+    kind = FATAL
+
+
+errorClasses = {TRANSIENT: TransientError, DISCONNECTED: DisconnectedError, FATAL: FatalError}
+
+
+def errorKind(error):
+    """Returns the kind of an exception raised by a hid.Device like object"""
+    if isinstance(error, HidError):
+        return error.kind
+    # HidrawDevice keeps the OSError as the cause of its HIDException
+    cause = error if isinstance(error, OSError) else error.__cause__
+    if isinstance(cause, OSError) and cause.errno is not None:
+        if cause.errno in transientErrnos:
+            return TRANSIENT
+        if cause.errno in disconnectedErrnos:
+            return DISCONNECTED
+        return FATAL
+    if isinstance(error, (TimeoutError, InterruptedError)):
+        return TRANSIENT
+    if type(error).__name__ not in ("HIDException", "CaptureError"):
+        # A bug, not the device
+        return FATAL
+    message = str(error).lower()
+    if any(text in message for text in disconnectedMessages):
+        return DISCONNECTED
+    if any(text in message for text in transientMessages):
+        return TRANSIENT
+    if "permission" in message or "access" in message:
+        return FATAL
+    # hidapi returns -1 with an empty or unknown message on a USB glitch
+    return TRANSIENT
+
+
+def classify(error, operation="", attempts=1):
+    """Returns error as a HidError of its kind"""
+    if isinstance(error, HidError):
+        return error
+    return errorClasses[errorKind(error)](error, operation, attempts)
+
+
+class ErrorStats:
+    """
+        Error counters, shared by the reader and the writer threads
+        ...
+    Attributes:
+        window: float, period of rate() in seconds
+        counts: dict, (operation, kind) -> number of failed calls
+        retryCount: int, number of calls tried again
+        recoveredCount: int, calls which succeeded after a retry
+        count: int, number of failed calls, changes on every new error
+        last: HidError, latest error
+        lastTime: float, time.monotonic() of the latest error
+    """
+
+    def __init__(self, window=10.0):
+        """ initializes ErrorStats class """
+        self.window = window
+        self.counts = {}
+        self.retryCount = 0
+        self.recoveredCount = 0
+        self.count = 0
+        self.last = None
+        self.lastTime = 0.0
+        self._times = deque(maxlen=1024)
+        self._lock = threading.Lock()
+
+    def record(self, error):
+        """Counts a failed call
+
+        Args:
+            error: HidError
+        """
+        now = time.monotonic()
+        key = (error.operation, error.kind)
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.count += 1
+            self.last = error
+            self.lastTime = now
+            self._times.append(now)
+
+    def retried(self):
+        with self._lock:
+            self.retryCount += 1
+
+    def recovered(self):
+        with self._lock:
+            self.recoveredCount += 1
+
+    def rate(self, now=None):
+        """Failed calls per second over the last window seconds"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            while self._times and self._times[0] < now - self.window:
+                self._times.popleft()
+            return len(self._times) / self.window
+
+    def total(self, operation=None, kind=None):
+        """Number of failed calls of an operation and/or a kind"""
+        with self._lock:
+            return sum(count for (op, k), count in self.counts.items()
+                       if (operation is None or op == operation) and (kind is None or k == kind))
+
+    def clear(self):
+        with self._lock:
+            self.counts.clear()
+            self.retryCount = 0
+            self.recoveredCount = 0
+            self.last = None
+            self._times.clear()
+
+
+class RetryPolicy:
+    """
+        Bounded retries with exponential backoff
+        ...
+    Attributes:
+        retries: int, calls tried again after a transient error
+        delay: float, wait before the first retry in seconds
+        factor: float, the wait is multiplied by factor at each retry
+        maxDelay: float, longest wait in seconds
+    """
+
+    def __init__(self, retries=3, delay=0.005, factor=2.0, maxDelay=0.2):
+        """ initializes RetryPolicy class """
+        self.retries = retries
+        self.delay = delay
+        self.factor = factor
+        self.maxDelay = maxDelay
+
+    def backoff(self, attempt):
+        """Wait before the retry following attempt (1 for the first call)"""
+        return min(self.delay * self.factor ** (attempt - 1), self.maxDelay)
+
+    def call(self, function, *args, operation="", stats=None, stop=None):
+        """Calls function(*args), again after a transient error
+
+        Args:
+            function: callable, device.write, device.read, ...
+            operation: string, name of the operation in the errors
+            stats: ErrorStats, counts the failures and the retries
+            stop: threading.Event, no more retry once set
+
+        Returns:
+            the result of function
+
+        Raises:
+            HidError: the call failed, or still failed after the retries
+        """
+        attempt = 1
+        while True:
+            try:
+                result = function(*args)
+            except Exception as error:
+                hidError = classify(error, operation, attempt)
+                if stats is not None:
+                    stats.record(hidError)
+                if hidError.kind != TRANSIENT or attempt > self.retries:
+                    raise hidError from error
+                if stop is None:
+                    time.sleep(self.backoff(attempt))
+                elif stop.wait(self.backoff(attempt)):
+                    raise hidError from error
+                if stats is not None:
+                    stats.retried()
+                attempt += 1
+                continue
+            if attempt > 1 and stats is not None:
+                stats.recovered()
+            return result
@@ -0,0 +1,247 @@
+# This Python file uses the following encoding: utf-8
+"""
+ HID reader thread
+
+ Reads the FM tuner input reports on a dedicated thread, so the USB pipe
+ never waits for the GUI event loop (repaint, modal dialog, ...).
+ Each report is timestamped with a monotonic clock and handed to a
+ callback, typically a Qt signal emit (queued to the GUI thread).
+
+ In drain mode every queued report is read in one pass (non-blocking after
+ the first one) and appended to a pending batch. The consumer is woken up
+ only when the batch was empty and takes the whole batch at once, so a
+ slow consumer gets one wake-up for many reports instead of a growing queue.
+
+ With a ReportPool the reports are read with device.readinto() into
+ preallocated buffers and handed out as memoryview slices, without any
+ allocation or copy; the consumer gives them back with release().
+
+ A read error is classified and counted (hiderrors.ErrorStats), the next
+ read waits an exponential backoff growing with the consecutive errors,
+ so an unplugged tuner doesn't spin the thread.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import ctypes
+import threading
+import time
+from collections import deque
+from hiderrors import RetryPolicy, ErrorStats, classify
+
+
+class ReportPool:
+    """
+        Preallocated report buffers
+        ...
+    Attributes:
+        size: int, size of a buffer
+        buffers: list of bytearray
+        arrays: list of ctypes char arrays sharing the buffers memory,
+            built once so device.readinto() doesn't allocate
+        views: list of memoryview of the buffers
+    """
+
+    def __init__(self, size=40, count=64):
+        """ initializes ReportPool class """
+        self.size = size
+        self.buffers = [bytearray(size) for i in range(count)]
+        self.arrays = [(ctypes.c_char * size).from_buffer(buffer) for buffer in self.buffers]
+        self.views = [memoryview(buffer) for buffer in self.buffers]
+        self._slots = {id(buffer): slot for slot, buffer in enumerate(self.buffers)}
+        # deque append/popleft are atomic, the reader and the consumer share it without lock
+        self._free = deque(range(count))
+        self._inUse = [False] * count
+
+    def __len__(self):
+        """Number of free buffers"""
+        return len(self._free)
+
+    def readinto(self, device, timeout=None):
+        """Reads a report into a free buffer
+
+        Returns:
+            report: memoryview of the report, b"" if nothing was read,
+                None if every buffer is in use
+        """
+        try:
+            slot = self._free.popleft()
+        except IndexError:
+            return None
+        self._inUse[slot] = True
+        try:
+            size = device.readinto(self.arrays[slot], timeout)
+        except Exception:
+            self.giveBack(slot)
+            raise
+        if not size:
+            self.giveBack(slot)
+            return b""
+        return self.views[slot][:size]
+
+    def release(self, report):
+        """Gives back the buffer of a report handed out by readinto(),
+        other reports (bytes) are ignored"""
+        if isinstance(report, memoryview):
+            slot = self._slots.get(id(report.obj))
+            if slot is not None:
+                self.giveBack(slot)
+
+    def giveBack(self, slot):
+        if self._inUse[slot]:
+            self._inUse[slot] = False
+            self._free.append(slot)
+
+
+class HidReader(threading.Thread):
+    """
+        Reader worker
+        ...
+    Attributes:
+        device: hid.Device, or any object with the same read() method
+        onReport: callable(report, timestamp), called for every report
+        size: int, size of an input report
+        timeout: int, read timeout in ms (also the stop latency)
+        onPending: callable(), drain mode, called when the pending batch
+            goes from empty to not empty, the consumer then calls takePending()
+        maxPending: int, drain mode, reports kept when the consumer is stalled
+        pool: ReportPool, read without copy, the consumer calls release()
+        reportCount: int, number of reports read
+        errors: ErrorStats, classified read errors
+        backoff: RetryPolicy, wait after consecutive read errors
+        errorCount: int, number of read errors
+        droppedCount: int, reports dropped because the pending batch was full
+        readSizes: dict, reports read per reader pass -> number of passes
+        batchSizes: dict, reports taken per consumer pass (backlog depth)
+            -> number of passes
+        largestBatch: int, deepest backlog seen by the consumer
+        poolMisses: int, reports copied because every pool buffer was in use
+    """
+
+    def __init__(self, device, onReport=None, size=40, timeout=100, onPending=None, maxPending=4096,
+                 pool=None, errors=None, backoff=None):
+        """ initializes HidReader class """
+        super().__init__(name="HidReader", daemon=True)
+        self.device = device
+        self.onReport = onReport
+        self.size = size
+        self.timeout = timeout
+        self.onPending = onPending
+        self.maxPending = maxPending
+        self.pool = pool
+        self.errors = errors if errors is not None else ErrorStats()
+        self.backoff = backoff if backoff is not None else RetryPolicy(delay=0.01, maxDelay=1.0)
+        self.reportCount = 0
+        self.errorCount = 0
+        self.droppedCount = 0
+        self.readSizes = {}
+        self.batchSizes = {}
+        self.largestBatch = 0
+        self.poolMisses = 0
+        self._pending = []
+        self._pendingTimestamp = 0
+        self._lock = threading.Lock()
+        self._stopEvent = threading.Event()
+
+    def run(self):
+        """Blocks in the device read and publishes every report"""
+        failures = 0
+        while not self._stopEvent.is_set():
+            try:
+                report = self.readReport(self.timeout)
+            except Exception as error:
+                self.readFailed(error)
+                failures += 1
+                # Don't spin on a dead device
+                self._stopEvent.wait(self.backoff.backoff(failures))
+                continue
+            failures = 0
+            if not report:
+                continue
+            if self.onPending is not None:
+                self.drainPending(report)
+            else:
+                self.reportCount += 1
+                self.onReport(report, time.perf_counter_ns())
+
+    def readReport(self, timeout):
+        """Reads a report, in a pool buffer when there is a free one"""
+        if self.pool is not None:
+            report = self.pool.readinto(self.device, timeout)
+            if report is not None:
+                return report
+            self.poolMisses += 1
+        return self.device.read(self.size, timeout)
+
+    def readFailed(self, error):
+        self.errorCount += 1
+        self.errors.record(classify(error, "read"))
+
+    def release(self, reports):
+        """Gives back the pool buffers of reports once they are decoded"""
+        if self.pool is not None:
+            for report in reports:
+                self.pool.release(report)
+
+    def drainPending(self, report):
+        """Reads without blocking the reports queued behind report
+        and appends them to the pending batch
+
+        Args:
+            report: bytes, first report of the pass
+        """
+        timestamp = time.perf_counter_ns()
+        reports = [report]
+        try:
+            if self.pool is None and hasattr(self.device, "read_many"):
+                # One call for the whole queue
+                reports.extend(self.device.read_many(self.maxPending, self.size, 0))
+            else:
+                while True:
+                    report = self.readReport(0)
+                    if not report:
+                        break
+                    reports.append(report)
+        except Exception as error:
+            self.readFailed(error)
+        size = len(reports)
+        self.reportCount += size
+        self.readSizes[size] = self.readSizes.get(size, 0) + 1
+
+        with self._lock:
+            wakeUp = not self._pending
+            if wakeUp:
+                self._pendingTimestamp = timestamp
+            self._pending.extend(reports)
+            overflow = len(self._pending) - self.maxPending
+            if overflow > 0:
+                self.release(self._pending[:overflow])
+                del self._pending[:overflow]
+                self.droppedCount += overflow
+        if wakeUp:
+            self.onPending()
+
+    def takePending(self):
+        """Takes the pending batch (consumer side)
+
+        Returns:
+            reports: list, reports in arrival order
+            timestamp: int, time.perf_counter_ns() of the oldest read pass
+        """
+        with self._lock:
+            reports = self._pending
+            timestamp = self._pendingTimestamp
+            self._pending = []
+        size = len(reports)
+        if size:
+            self.batchSizes[size] = self.batchSizes.get(size, 0) + 1
+            if size > self.largestBatch:
+                self.largestBatch = size
+        return reports, timestamp
+
+    def stop(self):
+        """Stops the reader and waits for the end of the current read"""
+        self._stopEvent.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(2 * self.timeout / 1000)
@@ -0,0 +1,114 @@
+# This Python file uses the following encoding: utf-8
+"""
+ HID trace ring buffer
+
+ Keeps the last input and output reports with their timestamp in
+ preallocated memory: recording a report is a copy into a slot, no string
+ is built. The hexadecimal text is only rendered on demand by the views
+ (lineEditBufferIn/Out refresh, trace window, export).
+ Single writer: the reports and the commands are recorded on the GUI thread.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import time
+from array import array
+
+
+IN = 0
+OUT = 1
+
+DIRECTION_NAMES = ("IN ", "OUT")
+
+
+class TraceBuffer:
+    """
+        Ring buffer of timestamped reports
+        ...
+    Attributes:
+        capacity: int, number of reports kept
+        size: int, bytes kept per report
+        count: int, number of reports recorded since the start (sequence
+            number of the next one)
+        last: list, direction -> sequence number of the last report, -1 if none
+        start: int, time.perf_counter_ns() of the start, origin of the rendered times
+    """
+
+    def __init__(self, capacity=4096, size=64):
+        """ initializes TraceBuffer class """
+        self.capacity = capacity
+        self.size = size
+        self.data = bytearray(capacity * size)
+        self.view = memoryview(self.data)
+        self.lengths = array("H", bytes(2 * capacity))
+        self.timestamps = array("q", bytes(8 * capacity))
+        self.directions = bytearray(capacity)
+        self.clear()
+
+    def __len__(self):
+        """Number of reports available"""
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        self.count = 0
+        self.last = [-1, -1]
+        self.start = time.perf_counter_ns()
+
+    def append(self, direction, report, timestamp=None):
+        """Records a report
+
+        Args:
+            direction: int, IN or OUT
+            report: bytes like
+            timestamp: int, time.perf_counter_ns(), now if None
+        """
+        slot = self.count % self.capacity
+        length = min(len(report), self.size)
+        offset = slot * self.size
+        self.view[offset:offset + length] = report[:length]
+        self.lengths[slot] = length
+        self.timestamps[slot] = time.perf_counter_ns() if timestamp is None else timestamp
+        self.directions[slot] = direction
+        self.last[direction] = self.count
+        self.count += 1
+
+    def first(self):
+        """Sequence number of the oldest report available"""
+        return self.count - len(self)
+
+    def entry(self, sequence):
+        """Returns (timestamp, direction, report bytes) of a sequence number"""
+        if not self.first() <= sequence < self.count:
+            raise IndexError("trace entry overwritten or not recorded")
+        slot = sequence % self.capacity
+        offset = slot * self.size
+        return (self.timestamps[slot], self.directions[slot],
+                bytes(self.view[offset:offset + self.lengths[slot]]))
+
+    def entries(self, first=None, last=None):
+        """Returns the entries of the sequence numbers first to last (excluded)"""
+        first = self.first() if first is None else max(first, self.first())
+        last = self.count if last is None else min(last, self.count)
+        return [self.entry(sequence) for sequence in range(first, last)]
+
+    def hex(self, sequence):
+        """Returns the hexadecimal text of a report, "" if not available"""
+        if sequence < self.first():
+            return ""
+        slot = sequence % self.capacity
+        offset = slot * self.size
+        return self.view[offset:offset + self.lengths[slot]].hex(" ")
+
+    def render(self, entries):
+        """Returns the text lines of entries: time in s, direction, bytes in hex"""
+        return ["{:12.6f} {} {}".format((timestamp - self.start) / 1e9, DIRECTION_NAMES[direction], report.hex(" "))
+                for timestamp, direction, report in entries]
+
+    def export(self, path, entries=None):
+        """Writes entries (every available one if None) to a text file"""
+        if entries is None:
+            entries = self.entries()
+        with open(path, "w") as file:
+            for line in self.render(entries):
+                file.write(line + "\n")
@@ -1,8 +1,9 @@
 # This Python file uses the following encoding: utf-8
+from collections import OrderedDict
 from colorsys import rgb_to_hls, hls_to_rgb
 from PySide6.QtWidgets import QWidget, QStyleOption
-from PySide6.QtGui import QPainter
-from PySide6.QtCore import QSize, QByteArray, QRectF, Property
+from PySide6.QtGui import QPainter, QPixmap
+from PySide6.QtCore import Qt, QSize, QByteArray, QRectF, QPointF, Property
 from PySide6.QtCore import Signal
 from PySide6.QtSvg import QSvgRenderer
 
@@ -78,6 +79,15 @@ class QLed(QWidget):
     clicked = Signal()
     pressed = Signal(bool)
 
+    # Shared by every QLed: one parsed SVG per (shape, colour), and the
+    # last rendered pixmaps per (shape, colour, size, devicePixelRatio),
+    # on and off are two colours
+    renderers = {}
+    pixmaps = OrderedDict()
+    pixmapCacheSize = 64
+    cacheHits = 0
+    cacheMisses = 0
+
     def __init__(self, parent=None, **kwargs):
         self.m_value = False
         self.m_onColour = QLed.Red
@@ -88,7 +98,6 @@ class QLed(QWidget):
         QWidget.__init__(self, parent, **kwargs)
 
         self._pressed = False
-        self.renderer = QSvgRenderer()
 
     def value(self): return self.m_value
 
@@ -127,7 +136,8 @@ class QLed(QWidget):
     def sizeHint(self):
         return QSize(48, 48)
 
-    def adjust(self, r, g, b):
+    @staticmethod
+    def adjust(r, g, b):
         def normalise(x): return x/255.0
         def denormalise(x): return int(x*255.0)
 
@@ -136,6 +146,47 @@ class QLed(QWidget):
 
         return (denormalise(nr), denormalise(ng), denormalise(nb))
 
+    @classmethod
+    def svgRenderer(cls, shape, colour):
+        """Returns the parsed SVG of a shape in a colour"""
+        renderer = cls.renderers.get((shape, colour))
+        if renderer is None:
+            (dark_r, dark_g, dark_b) = cls.colours[colour]
+
+            dark_str = "rgb(%d,%d,%d)" % (dark_r, dark_g, dark_b)
+            light_str = "rgb(%d,%d,%d)" % cls.adjust(dark_r, dark_g, dark_b)
+
+            __xml = (cls.shapes[shape] % (dark_str, light_str)).encode('utf8')
+            renderer = cls.renderers[(shape, colour)] = QSvgRenderer(QByteArray(__xml))
+        return renderer
+
+    @classmethod
+    def pixmap(cls, shape, colour, size, ratio):
+        """Returns the LED rendered at size (logical pixels), least recently used pixmaps are dropped"""
+        key = (shape, colour, size, ratio)
+        pixmap = cls.pixmaps.get(key)
+        if pixmap is not None:
+            cls.cacheHits += 1
+            cls.pixmaps.move_to_end(key)
+            return pixmap
+        cls.cacheMisses += 1
+        pixmap = QPixmap(max(1, round(size * ratio)), max(1, round(size * ratio)))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        cls.svgRenderer(shape, colour).render(painter, QRectF(0, 0, size, size))
+        painter.end()
+        cls.pixmaps[key] = pixmap
+        if len(cls.pixmaps) > cls.pixmapCacheSize:
+            cls.pixmaps.popitem(last=False)
+        return pixmap
+
+    @classmethod
+    def clearCache(cls):
+        cls.renderers.clear()
+        cls.pixmaps.clear()
+
     def paintEvent(self, event):
         option = QStyleOption()
         option.initFrom(self)
@@ -146,19 +197,11 @@ class QLed(QWidget):
         size = min(w, h)
         x = abs(size-w)/2.0
         y = abs(size-h)/2.0
-        bounds = QRectF(x, y, size, size)
 
+        colour = self.m_onColour if self.m_value else self.m_offColour
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing, True)
-
-        (dark_r, dark_g, dark_b) = self.colours[self.m_onColour if self.m_value else self.m_offColour]
-
-        dark_str = "rgb(%d,%d,%d)" % (dark_r, dark_g, dark_b)
-        light_str = "rgb(%d,%d,%d)" % self.adjust(dark_r, dark_g, dark_b)
-
-        __xml = (self.shapes[self.m_shape] % (dark_str, light_str)).encode('utf8')
-        self.renderer.load(QByteArray(__xml))
-        self.renderer.render(painter, bounds)
+        painter.drawPixmap(QPointF(x, y), self.pixmap(self.m_shape, colour, size, self.devicePixelRatioF()))
+        painter.end()
 
     def mousePressEvent(self, event):
         self._pressed = True
@@ -3,14 +3,18 @@
 """
 Wigdet Radio FM display
 
+The scale (background, ticks and labels) is drawn once in a pixmap at the
+device pixel ratio of the screen, and drawn again only after a resize or
+a colour change. A new value only repaints the old and the new needle.
+
 Author: Alain the cat
 Website: mao2.fr
 
 """
 
 from PySide6.QtWidgets import QWidget
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPainter, QFont, QColor, QPen
+from PySide6.QtCore import Qt, QRect, QRectF
+from PySide6.QtGui import QPainter, QFont, QColor, QPen, QPixmap
 
 
 class RadioFMDisplay(QWidget):
@@ -30,25 +34,71 @@ class RadioFMDisplay(QWidget):
         self.green = 184
         self.num = []
         self.num = range(88, 110)
+        self.font = QFont('Serif', 7, QFont.Light)
+        self.tickPen = QPen(QColor(20, 20, 184), 1, Qt.SolidLine)
+        self.scale = None
+        self.paintCount = 0
+        self.scaleCount = 0
 
     def setValue(self, value):
 
+        if value == self.value:
+            return
+        old = self.needleRect()
         self.value = value
+        self.update(old)
+        self.update(self.needleRect())
 
     def setColorBackground(self, color):
+        if color == self.colorBackground:
+            return
         self.colorBackground = color
+        self.scale = None
+        self.update()
+
+    def resizeEvent(self, e):
+        self.scale = None
+        super().resizeEvent(e)
+
+    def needlePosition(self):
+
+        step = int(round(self.width() / 22))
+        return int((step * (self.value/10 - 87)))
+
+    def needleRect(self):
+        """Area of the needle, pen included"""
+        return QRect(self.needlePosition() - 4, 0, 9, self.height() + 1)
 
     def paintEvent(self, e):
 
+        self.paintCount += 1
+        ratio = self.devicePixelRatioF()
+        if self.scale is None or self.scale.devicePixelRatio() != ratio:
+            self.scale = self.drawScale(ratio)
         qp = QPainter()
         qp.begin(self)
+        # Only the dirty area of the scale is copied
+        rect = QRectF(e.rect())
+        qp.drawPixmap(rect, self.scale, QRectF(rect.x() * ratio, rect.y() * ratio,
+                                               rect.width() * ratio, rect.height() * ratio))
+        self.drawNeedle(qp)
+        qp.end()
+
+    def drawScale(self, ratio):
+        """Draws the background, the ticks and the labels in a pixmap"""
+        self.scaleCount += 1
+        scale = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        scale.setDevicePixelRatio(ratio)
+        scale.fill(Qt.transparent)
+        qp = QPainter()
+        qp.begin(scale)
         self.drawWidget(qp)
         qp.end()
+        return scale
 
     def drawWidget(self, qp):
 
-        font = QFont('Serif', 7, QFont.Light)
-        qp.setFont(font)
+        qp.setFont(self.font)
 
         size = self.size()
         w = size.width()
@@ -60,24 +110,23 @@ class RadioFMDisplay(QWidget):
         qp.drawRect(0, 0, w - 1, h - 1)
 
         step = int(round(w / 22))
-        till = int((step * (self.value/10 - 87)))
 
-        qp.setPen(QColor(255, 255, 255))
-        qp.setBrush(self.colorTrack)
-        qp.drawRect(till-3, 0, 6, h)
+        qp.setPen(self.tickPen)
 
-        pen = QPen(QColor(20, 20, 184), 1,
-                   Qt.SolidLine)
-        qp.setPen(pen)
+        metrics = qp.fontMetrics()
+        y = int(h / 2)
 
-        j = 0
-
-        for i in range(step, 22 * step, step):
+        for j, i in enumerate(range(step, 22 * step, step)):
 
             qp.drawLine(i, 0, i, 5)
-            metrics = qp.fontMetrics()
-            fw = metrics.horizontalAdvance(str(self.num[j]))
+            label = str(self.num[j])
+            fw = metrics.horizontalAdvance(label)
+
+            qp.drawText(int(i - fw/2), y, label)
 
-            x, y = int(i - fw/2), int(h / 2)
-            qp.drawText(x, y, str(self.num[j]))
-            j = j + 1
+    def drawNeedle(self, qp):
+
+        till = self.needlePosition()
+        qp.setPen(QColor(255, 255, 255))
+        qp.setBrush(self.colorTrack)
+        qp.drawRect(till-3, 0, 6, self.height())
@@ -0,0 +1,340 @@
+# This Python file uses the following encoding: utf-8
+"""
+ RDS group decoder
+
+ Qt-free decoder of the RDS groups received in the 0x34 FM_RDS_STATUS
+ responses (blocks A, B, C, D, low byte first, bufferIn[16:24]).
+ The decoder keeps the PS and RadioText accumulation state and returns
+ for every group a tuple of immutable events, the widgets only display them.
+ The PS and RadioText characters are voted (TextAssembler): a character
+ is stable after 2 agreeing receptions, a corrupted group doesn't replace
+ it, and a complete event is returned once every segment is stable.
+ The character codes are decoded with the EBU table of rdscharset.
+ Each group goes to the handler of its type and version, looked up in a
+ table indexed by the 5 high bits of block B: 0A/0B, 1A, 2A/2B, 3A, 4A,
+ 10A and 15B are decoded, the other groups only give their Header and
+ are counted.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import struct
+from collections import namedtuple
+from rdscharset import ebuDecode, ebuEncode
+
+
+# Every group: program identification, group type (0..15), version (0 = A, 1 = B),
+# traffic program, program type
+Header = namedtuple("Header", "pi group version tp pty")
+# Group 0A/0B: traffic announcement, music/speech, decoder identification bit
+# of the segment (segment 0 -> d3 ... segment 3 -> d0)
+Switches = namedtuple("Switches", "ta ms segment di")
+# Group 0A/0B: 2 characters of the program service name, and the whole name
+PsSegment = namedtuple("PsSegment", "segment chars ps")
+# Group 2A/2B: RadioText A/B flag, characters of the segment, and the whole text
+RtSegment = namedtuple("RtSegment", "ab segment chars rt")
+# Every character of the program service name is stable
+PsComplete = namedtuple("PsComplete", "ps")
+# Every character of the RadioText up to its end is stable
+RtComplete = namedtuple("RtComplete", "ab rt")
+# Group 1A: slow labelling variant and code (variant 0: extended country code),
+# program item number (day, hour, minute)
+ProgramItem = namedtuple("ProgramItem", "variant label day hour minute")
+# Group 3A: group type and version of an open data application, message, application identifier
+OpenData = namedtuple("OpenData", "group version message aid")
+# Group 4A: modified Julian day, UTC hour and minute, local offset in half hours
+ClockTime = namedtuple("ClockTime", "mjd hour minute offset")
+# Group 10A: A/B flag, characters of the segment, and the whole program type name
+PtynSegment = namedtuple("PtynSegment", "ab segment chars ptyn")
+
+# Group type and version names, indexed by group << 1 | version (block B >> 11)
+GROUP_NAMES = tuple("{}{}".format(group, version) for group in range(16) for version in "AB")
+
+PTY_NAMES = ("00 No program type", "01 News()", "02 Current(affairs)", "03 Information()", "04 Sport()",
+             "05 Education()", "06 Drama()", "07 Culture()", "08 Science()", "09 Varied()", "10 Pop(music)",
+             "11 Rock(music)", "12 Easy(listening)", "13 Light(classical)", "14 Serious(classical)",
+             "15 Other(music)", "16 Weather()", "17 Finance()", "18 Children()", "19 Social(affairs)",
+             "20 Religion()", "21 Phone-in", "22 Travel()", "23 Leisure()", "24 Jazz(music)", "25 Country(music)",
+             "26 National(music)", "27 Oldies(music)", "28 Folk(music)", "29 Documentary()", "30 Alarm(Test)",
+             "31 Alarm()")
+
+# Decoder identification, segment -> (label if 0, label if 1)
+DI_NAMES = (("Static PTY", "Dynamic PTY"),
+            ("Not Compressed", "Compressed"),
+            ("Not Artificial Head", "Artificial Head"),
+            ("Mono", "Stereo"))
+
+WEEK_DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+blocks = struct.Struct("<4H")
+
+
+def localTime(clock):
+    """Returns (hour, minute) local time of a ClockTime"""
+    minutes = (clock.hour * 60 + clock.minute + clock.offset * 30) % 1440
+    return minutes // 60, minutes % 60
+
+
+def mjdToDate(mjd):
+    """Converts a modified Julian day (IEC 62106 annex G)
+
+    Returns:
+        (year, month, day, weekDay), weekDay 0 is Monday
+    """
+    yPrime = int((mjd - 15078.2) / 365.25)
+    mPrime = int((mjd - 14956.1 - int(yPrime * 365.25)) / 30.6001)
+    day = mjd - 14956 - int(yPrime * 365.25) - int(mPrime * 30.6001)
+    k = 1 if mPrime == 14 or mPrime == 15 else 0
+    return yPrime + k + 1900, mPrime - 1 - k * 12, day, (mjd + 2) % 7
+
+
+class TextAssembler:
+    """
+        Text assembled from RDS segments with confidence votes
+        ...
+    Every reception of a character code is a vote for it at its position,
+    the code with the most votes is shown (the shown one on a tie), so a
+    corrupted group doesn't replace a character received twice. A character
+    is stable once it has votes agreeing receptions. The codes are decoded
+    to text (EBU character set) all at once, when the text is read after
+    a change.
+
+    The 0x34 reports of the board carry the blocks without the block error
+    (BLE) flags of the tuner, so a corrupted block can't be told from a good
+    one and votes defaults to 2. The votes delay the stable flags and the
+    complete events, which the RDS cache stores, not what is shown: at 1%
+    block errors the PS is shown right as soon as with 1 vote, PsComplete
+    comes after 3.7 s instead of 1.3 s, and at 5% the RadioText shown in
+    the end is right for every station instead of 79% (benchmark "voting").
+
+    Attributes:
+        size: int, number of characters
+        votes: int, agreeing receptions making a character stable
+        codes: bytearray, codes shown, the most received at each position
+        stable: list of bool, per character
+        stableMask: int, bit n set when every character of segment n is stable
+        end: int, last segment of the text, before the end marker (0x0D) if any
+        complete: bool, every segment up to end is stable
+    """
+
+    def __init__(self, segments, width, votes=2):
+        """ initializes TextAssembler class """
+        self.segments = segments
+        self.size = segments * width
+        self.votes = votes
+        self.reset()
+
+    def reset(self):
+        self.codes = bytearray(b" " * self.size)
+        self.stable = [False] * self.size
+        self.counts = [{} for i in range(self.size)]
+        self.stableMask = 0
+        self.end = self.segments - 1
+        self.complete = False
+        self._text = None
+
+    def preset(self, text):
+        """Shows a known text, each character counts as one reception"""
+        self.reset()
+        for position, code in enumerate(ebuEncode(text.ljust(self.size)[:self.size])):
+            self.codes[position] = code
+            self.counts[position][code] = 1
+
+    def receive(self, segment, codes):
+        """Votes for the characters of a segment
+
+        Args:
+            segment: int, segment address
+            codes: tuple, character codes of the segment
+
+        Returns:
+            bool, True when the text just became complete
+        """
+        width = len(codes)
+        start = segment * width
+        shown = self.codes
+        stable = self.stable
+        position = start
+        for code in codes:
+            if stable[position] and code == shown[position]:
+                # Nothing to vote, a stable character keeps the count which made it stable
+                position += 1
+                continue
+            if code == 0x0D and segment < self.end:
+                self.end = segment
+            counts = self.counts[position]
+            count = counts.get(code, 0) + 1
+            counts[code] = count
+            if code != shown[position] and count > counts.get(shown[position], 0):
+                # First reception, a corrupted one outvoted, or the station changed its text
+                shown[position] = code
+                self._text = None
+            if code == shown[position] and count >= self.votes:
+                stable[position] = True
+            position += 1
+        bit = 1 << segment
+        if not self.stableMask & bit and all(stable[start:position]):
+            self.stableMask |= bit
+        if self.complete:
+            return False
+        full = (2 << self.end) - 1
+        self.complete = self.stableMask & full == full
+        return self.complete
+
+    def value(self):
+        """Returns the text shown"""
+        if self._text is None:
+            self._text = ebuDecode(self.codes)
+        return self._text
+
+
+class RdsDecoder:
+    """
+        Stateful RDS group decoder
+        ...
+    Every group is dispatched by its type and version (the 5 high bits of
+    block B) to the handler of a 32 entries table. A handler is a
+    callable(b, c, d) returning a tuple of events; groupHandlers maps the
+    decoded types to their method, register() plugs in another handler.
+
+    Attributes:
+        votes: int, agreeing receptions making a PS or RadioText character stable
+        ps: TextAssembler, 4 segments of 2 characters of the program service name
+        rtA: TextAssembler, 16 segments of 4 characters of RadioText A
+        rtB: TextAssembler, 16 segments of 4 characters of RadioText B
+        rtFlag: int, A/B flag of the last RadioText segment, None before
+        ptyn: TextAssembler, 2 segments of 4 characters of the program type name
+        ptynFlag: int, A/B flag of the last program type name segment, None before
+        handlers: list, (group type << 1 | version) -> handler, None if not decoded
+        groupCount: int, number of decoded groups
+        groupCounts: list, (group type << 1 | version) -> number of groups
+    """
+
+    # (group type, version) -> name of the method decoding it
+    groupHandlers = {(0, 0): "decodePs", (0, 1): "decodePs", (1, 0): "decodeProgramItem",
+                     (2, 0): "decodeRt", (2, 1): "decodeRt", (3, 0): "decodeOpenData", (4, 0): "decodeClock",
+                     (10, 0): "decodePtyn", (15, 1): "decodeSwitches"}
+
+    def __init__(self, votes=2):
+        """ initializes RdsDecoder class """
+        self.votes = votes
+        self.handlers = [None] * 32
+        for (group, version), name in self.groupHandlers.items():
+            self.register(group, version, getattr(self, name))
+        self.reset()
+
+    def register(self, group, version, handler):
+        """Decodes the groups of a type and version with handler
+
+        Args:
+            group: int, group type 0..15
+            version: int, 0 for A, 1 for B
+            handler: callable(b, c, d), returns a tuple of events, None to ignore the groups
+        """
+        self.handlers[(group << 1) | version] = handler
+
+    def reset(self):
+        """Forgets the station (after a tune)"""
+        self.ps = TextAssembler(4, 2, self.votes)
+        self.rtA = TextAssembler(16, 4, self.votes)
+        self.rtB = TextAssembler(16, 4, self.votes)
+        self.rtFlag = None
+        self.ptyn = TextAssembler(2, 4, self.votes)
+        self.ptynFlag = None
+        self.groupCount = 0
+        self.groupCounts = [0] * 32
+
+    def preset(self, ps="", rtA="", rtB=""):
+        """Starts from known texts (cached station), the segments received confirm or replace them"""
+        self.ps.preset(ps)
+        self.rtA.preset(rtA)
+        self.rtB.preset(rtB)
+
+    def counters(self):
+        """Returns the number of groups received per type, {"0A": count ...}"""
+        return {GROUP_NAMES[key]: count for key, count in enumerate(self.groupCounts) if count}
+
+    def decode(self, data, offset=16):
+        """Decodes the RDS group of a 0x34 report
+
+        Args:
+            data: bytes like, the report
+            offset: int, index of block A low byte
+
+        Returns:
+            events: tuple, Header then the events of the group type
+        """
+        return self.decodeGroup(*blocks.unpack_from(data, offset))
+
+    def decodeGroup(self, a, b, c, d):
+        """Decodes a group given as 4 blocks of 16 bits"""
+        self.groupCount += 1
+        key = b >> 11
+        self.groupCounts[key] += 1
+        header = Header(a, key >> 1, key & 0x1, (b >> 10) & 0x1, (b >> 5) & 0x1F)
+        handler = self.handlers[key]
+        if handler is None:
+            return (header,)
+        return (header,) + handler(b, c, d)
+
+    def decodePs(self, b, c, d):
+        """Group 0A/0B: switches and 2 characters of the program service name"""
+        segment = b & 0x03
+        ps = self.ps
+        complete = ps.receive(segment, (d >> 8, d & 0xFF))
+        text = ps.value()
+        events = (Switches((b >> 4) & 0x1, (b >> 3) & 0x1, segment, (b >> 2) & 0x1),
+                  PsSegment(segment, text[2 * segment:2 * segment + 2], text))
+        return events + (PsComplete(text),) if complete else events
+
+    def decodeProgramItem(self, b, c, d):
+        """Group 1A: slow labelling code (variant 0 extended country code) and program item number"""
+        return (ProgramItem((c >> 12) & 0x07, c & 0x0FFF, d >> 11, (d >> 6) & 0x1F, d & 0x3F),)
+
+    def decodeRt(self, b, c, d):
+        """Group 2A/2B: 4 (2A) or 2 (2B) characters of the RadioText"""
+        ab = (b >> 4) & 0x1
+        segment = b & 0x0F
+        rt = self.rtB if ab else self.rtA
+        if ab != self.rtFlag:
+            if self.rtFlag is not None:
+                # The flag changes with the text
+                rt.reset()
+            self.rtFlag = ab
+        if b & 0x0800:
+            codes = (d >> 8, d & 0xFF)
+        else:
+            codes = (c >> 8, c & 0xFF, d >> 8, d & 0xFF)
+        complete = rt.receive(segment, codes)
+        text = rt.value()
+        start = segment * len(codes)
+        events = (RtSegment(ab, segment, text[start:start + len(codes)], text),)
+        return events + (RtComplete(ab, text),) if complete else events
+
+    def decodeOpenData(self, b, c, d):
+        """Group 3A: group type carrying an open data application, its message and identifier"""
+        return (OpenData((b >> 1) & 0x0F, b & 0x01, c, d),)
+
+    def decodeClock(self, b, c, d):
+        """Group 4A: modified Julian day, UTC time and local offset"""
+        offset = d & 0x1F
+        if d & 0x20:
+            offset = -offset
+        return (ClockTime(((b & 0x03) << 15) | (c >> 1), ((c & 0x1) << 4) | (d >> 12), (d >> 6) & 0x3F, offset),)
+
+    def decodePtyn(self, b, c, d):
+        """Group 10A: 4 characters of the program type name"""
+        ab = (b >> 4) & 0x1
+        segment = b & 0x01
+        if ab != self.ptynFlag:
+            if self.ptynFlag is not None:
+                self.ptyn.reset()
+            self.ptynFlag = ab
+        self.ptyn.receive(segment, (c >> 8, c & 0xFF, d >> 8, d & 0xFF))
+        text = self.ptyn.value()
+        return (PtynSegment(ab, segment, text[4 * segment:4 * segment + 4], text),)
+
+    def decodeSwitches(self, b, c, d):
+        """Group 15B: fast basic tuning and switching information"""
+        return (Switches((b >> 4) & 0x1, (b >> 3) & 0x1, b & 0x03, (b >> 2) & 0x1),)
@@ -0,0 +1,182 @@
+# This Python file uses the following encoding: utf-8
+"""
+ RDS station cache
+
+ Keeps the last fully assembled PS, RadioText, PTY and DI of every station
+ heard, keyed by (channel, PI), and the last PI heard on each channel.
+ After a tune the cached station of the channel is shown at once as
+ provisional, the decoder starts from its texts. The first group with
+ its PI confirms it, another PI replaces it. A PI different from the
+ identified (or provisional) one must come in 2 consecutive groups, a
+ corrupted block A doesn't change the station.
+
+ A part is stored once complete:
+   PS, RT  every character stable (PsComplete and RtComplete events)
+   DI      the 4 decoder identification bits received (sent with the PS segments)
+ The cache is saved as JSON (rdsCache.json next to radioSettings.json by
+ default), through a temporary file replacing the previous one, so a crash
+ while saving never leaves a truncated cache. An unreadable cache is ignored.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import os
+import json
+from collections import namedtuple, OrderedDict
+from rds import Switches, PsComplete, RtComplete
+
+
+# Last complete information of a station, "" or None for a part never completed
+StationInfo = namedtuple("StationInfo", "channel pi ps rtA rtB pty di")
+
+
+class RdsCache:
+    """
+        Stations heard, (channel, PI) -> StationInfo
+        ...
+    Attributes:
+        path: string, JSON file, None to keep the cache in memory
+        size: int, number of stations kept, the least recently heard are dropped
+        repeat: int, consecutive groups giving a new PI before it is identified
+        stations: OrderedDict, (channel, pi) -> StationInfo, least recently heard first
+        lastPi: dict, channel -> PI heard last on this channel
+        channel: int, tuned channel, None before the first tune
+        pi: int, PI of the tuned station, None until its first group
+        provisional: StationInfo shown since the tune, None once the PI is known
+        changed: bool, stations changed since the last save
+    """
+
+    def __init__(self, path=None, size=512, repeat=2):
+        """ initializes RdsCache class """
+        self.path = path
+        self.size = size
+        self.repeat = repeat
+        self.stations = OrderedDict()
+        self.lastPi = {}
+        self.changed = False
+        self.tune(None)
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def tune(self, channel):
+        """A new channel is tuned, returns its provisional StationInfo or None"""
+        self.channel = channel
+        self.pi = None
+        self.restart()
+        self.provisional = self.stations.get((channel, self.lastPi.get(channel)))
+        return self.provisional
+
+    def restart(self):
+        """Forgets the parts received"""
+        self._diMask = 0
+        self._di = 0
+        # New PI heard, and in how many consecutive groups
+        self._candidate = None
+        self._candidateCount = 0
+
+    def heard(self, pi):
+        """Counts the PI of a group
+
+        Returns:
+            bool, True when a PI other than the identified one came in repeat
+            consecutive groups, or the first group gives the PI of the
+            provisional station, identify() it
+        """
+        if pi == self.pi:
+            self._candidate = None
+            return False
+        if self.provisional is not None and pi == self.provisional.pi:
+            return True
+        if pi != self._candidate:
+            self._candidate = pi
+            self._candidateCount = 0
+        self._candidateCount += 1
+        return self._candidateCount >= self.repeat
+
+    def identify(self, pi):
+        """The PI of the station is known (first groups, or heard() confirmed a new one)
+
+        Returns:
+            info: StationInfo of (channel, pi), None if never heard
+        """
+        self.pi = pi
+        self.provisional = None
+        self.restart()
+        info = self.stations.get((self.channel, pi))
+        if info is not None:
+            self.stations.move_to_end((self.channel, pi))
+        if self.lastPi.get(self.channel) != pi:
+            self.lastPi[self.channel] = pi
+            self.changed = True
+        return info
+
+    def learn(self, events):
+        """Stores the parts completed by the events of a group
+
+        Args:
+            events: tuple, events of RdsDecoder.decodeGroup()
+        """
+        if self.pi is None or self.channel is None:
+            return
+        # The Header comes first
+        pty = events[0].pty
+        for event in events:
+            match event:
+                case Switches():
+                    self._diMask |= 1 << event.segment
+                    # segment 0 carries d3 ... segment 3 carries d0
+                    bit = 1 << (3 - event.segment)
+                    self._di = self._di | bit if event.di else self._di & ~bit
+                    if self._diMask == 0xF:
+                        self.store(pty=pty, di=self._di)
+                case PsComplete():
+                    self.store(pty=pty, ps=event.ps)
+                case RtComplete():
+                    if event.ab:
+                        self.store(pty=pty, rtB=event.rt)
+                    else:
+                        self.store(pty=pty, rtA=event.rt)
+
+    def store(self, **parts):
+        """Updates parts of the tuned station"""
+        key = (self.channel, self.pi)
+        info = self.stations.get(key)
+        if info is None:
+            info = StationInfo(self.channel, self.pi, "", "", "", None, None)
+        info = info._replace(**parts)
+        if info != self.stations.get(key):
+            self.stations[key] = info
+            self.changed = True
+        self.stations.move_to_end(key)
+        while len(self.stations) > self.size:
+            self.stations.popitem(last=False)
+
+    def load(self):
+        """Reads the cache file, starts empty if it can't be read"""
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            stations = OrderedDict()
+            for item in data["stations"]:
+                info = StationInfo(**item)
+                stations[(info.channel, info.pi)] = info
+            lastPi = {int(channel): pi for channel, pi in data["lastPi"].items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as error:
+            print("RDS cache {} ignored: {}".format(self.path, error))
+            return
+        self.stations = stations
+        self.lastPi = lastPi
+        self.changed = False
+
+    def save(self):
+        """Writes the cache file if the stations changed"""
+        if self.path is None or not self.changed:
+            return
+        data = {"stations": [info._asdict() for info in self.stations.values()],
+                "lastPi": {str(channel): pi for channel, pi in self.lastPi.items()}}
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as outfile:
+            outfile.write(json.dumps(data, indent=1))
+        os.replace(temporary, self.path)
+        self.changed = False
@@ -0,0 +1,60 @@
+# This Python file uses the following encoding: utf-8
+"""
+ RDS character set
+
+ PS, RadioText and PTYN characters are coded with the EBU Latin based
+ repertoire of IEC 62106 annex E (table E.1): ASCII with a few changes
+ (0x24 ¤, 0x5E ―, 0x60 ‖, 0x7E ¯) and the accented letters of the
+ European languages from 0x80.
+ The table is a precomputed 256 characters string decoded by the codecs
+ charmap, a whole PS or RadioText buffer is translated in one call.
+ The control codes (0x0A line break, 0x0B end of headline, 0x0D end of
+ RadioText, 0x1F soft hyphen) and the unused codes are shown as spaces,
+ a text keeps one character per code.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import codecs
+
+
+# Code -> character, the 16 codes of a column (high nibble) per line
+EBU_DECODING = (" " * 32
+                + " !\"#¤%&'()*+,-./"
+                + "0123456789:;<=>?"
+                + "@ABCDEFGHIJKLMNO"
+                + "PQRSTUVWXYZ[\\]―_"
+                + "‖abcdefghijklmno"
+                + "pqrstuvwxyz{|}¯ "
+                + "áàéèíìóòúùÑÇŞß¡Ĳ"
+                + "âäêëîïôöûüñçşǧıĳ"
+                + "ªα©‰Ǧěňőπ€£$←↑→↓"
+                + "º¹²³±İńűµ¿÷°¼½¾§"
+                + "ÁÀÉÈÍÌÓÒÚÙŘČŠŽĐĿ"
+                + "ÂÄÊËÎÏÔÖÛÜřčšžđŀ"
+                + "ÃÅÆŒŷÝÕØÞŊŔĆŚŹŦð"
+                + "ãåæœŵýõøþŋŕćśźŧ ")
+
+# Character -> code, the first code of a character from 0x20 (the space is 0x20)
+EBU_ENCODING = {}
+for code in range(0x20, 0x100):
+    EBU_ENCODING.setdefault(ord(EBU_DECODING[code]), code)
+del code
+
+
+def ebuDecode(data):
+    """Returns the text of RDS character codes
+
+    Args:
+        data: bytes like, character codes
+
+    Returns:
+        text: string, one character per code
+    """
+    return codecs.charmap_decode(data, "strict", EBU_DECODING)[0]
+
+
+def ebuEncode(text):
+    """Returns the RDS character codes of a text, ? for a character out of the table"""
+    return codecs.charmap_encode(text, "replace", EBU_ENCODING)[0]
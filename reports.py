@@ -0,0 +1,185 @@
+# This Python file uses the following encoding: utf-8
+"""
+ AN649 input report parsing
+
+ Every known response of the FM tuner is parsed in one pass with a
+ precompiled struct layout (struct.unpack_from, no slicing, no copy of
+ the read buffer) into a small slotted record:
+   0x08 GET_PART_INFO, 0x09 GET_SYS_STATE, 0x12 GET_FUNC_INFO,
+   0x32 FM_RSQ_STATUS, 0x33 FM_ACF_STATUS, 0x34 FM_RDS_STATUS
+ A report too short for its layout (a partial read) is ignored like an
+ unknown one.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import struct
+
+
+PART_INFO = 0x08
+SYS_STATE = 0x09
+FUNC_INFO = 0x12
+RSQ_STATUS = 0x32
+ACF_STATUS = 0x33
+RDS_STATUS = 0x34
+
+# Layouts, starting at the offset of the first field
+partInfoLayout = struct.Struct("<H")                 # 12: Skyworks part number
+microchipLayout = struct.Struct("12s")               # 27: Microchip part number
+sysStateLayout = struct.Struct("B")                  # 8: active image
+funcInfoLayout = struct.Struct("3B5x3B")             # 8: Si revision, 16: PIC revision
+rsqLayout = struct.Struct("<HbbbB")                  # 10: channel, offset, RSSI, SNR, multipath
+acfLayout = struct.Struct("3B")                      # 10: soft mute, high cut, stereo blend
+rdsLayout = struct.Struct("<4H")                     # 16: blocks A, B, C, D
+
+
+class PartInfo:
+    """
+    Attributes:
+        skyworksPart: int, Si part number (4684)
+        microchipPart: string, PIC part number
+    """
+    __slots__ = ("skyworksPart", "microchipPart")
+
+    def __init__(self, skyworksPart, microchipPart):
+        self.skyworksPart = skyworksPart
+        self.microchipPart = microchipPart
+
+
+class SystemState:
+    """
+    Attributes:
+        image: int, active image (1 FMHD)
+    """
+    __slots__ = ("image",)
+
+    def __init__(self, image):
+        self.image = image
+
+
+class FunctionInfo:
+    """
+    Attributes:
+        siRevision: tuple, Si firmware major, minor, build
+        picRevision: tuple, PIC firmware major, minor, build
+    """
+    __slots__ = ("siRevision", "picRevision")
+
+    def __init__(self, siRevision, picRevision):
+        self.siRevision = siRevision
+        self.picRevision = picRevision
+
+
+class RsqStatus:
+    """
+    Attributes:
+        channel: int, tuned frequency in 10 kHz
+        offset: int, frequency offset (signed)
+        rssi: int, dBµV (signed)
+        snr: int, dB (signed)
+        multipath: int
+    """
+    __slots__ = ("channel", "offset", "rssi", "snr", "multipath")
+
+    def __init__(self, channel, offset, rssi, snr, multipath):
+        self.channel = channel
+        self.offset = offset
+        self.rssi = rssi
+        self.snr = snr
+        self.multipath = multipath
+
+
+class AcfStatus:
+    """
+    Attributes:
+        softMute: int, soft mute attenuation in dB
+        highCut: int, high cut in 100 Hz
+        stereo: bool, stereo blend active
+        blend: int, stereo blend in %
+    """
+    __slots__ = ("softMute", "highCut", "stereo", "blend")
+
+    def __init__(self, softMute, highCut, stereoBlend):
+        self.softMute = softMute & 0x1F
+        self.highCut = highCut
+        self.stereo = bool(stereoBlend & 0x80)
+        self.blend = stereoBlend & 0x7F
+
+
+class RdsStatus:
+    """
+    Attributes:
+        a, b, c, d: int, RDS blocks of 16 bits
+    """
+    __slots__ = ("a", "b", "c", "d")
+
+    def __init__(self, a, b, c, d):
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+
+
+def parsePartInfo(data):
+    microchipPart = microchipLayout.unpack_from(data, 27)[0]
+    return PartInfo(partInfoLayout.unpack_from(data, 12)[0], microchipPart.decode("latin-1"))
+
+
+def parseSystemState(data):
+    return SystemState(data[8])
+
+
+def parseFunctionInfo(data):
+    revisions = funcInfoLayout.unpack_from(data, 8)
+    return FunctionInfo(revisions[:3], revisions[3:])
+
+
+def parseRsqStatus(data):
+    return RsqStatus(*rsqLayout.unpack_from(data, 10))
+
+
+def parseAcfStatus(data):
+    return AcfStatus(*acfLayout.unpack_from(data, 10))
+
+
+def parseRdsStatus(data):
+    return RdsStatus(*rdsLayout.unpack_from(data, 16))
+
+
+# Report sizes, up to the end of the last field
+sizes = {
+    PART_INFO: 27 + microchipLayout.size,
+    SYS_STATE: 8 + sysStateLayout.size,
+    FUNC_INFO: 8 + funcInfoLayout.size,
+    RSQ_STATUS: 10 + rsqLayout.size,
+    ACF_STATUS: 10 + acfLayout.size,
+    RDS_STATUS: 16 + rdsLayout.size,
+}
+
+parsers = {
+    PART_INFO: parsePartInfo,
+    SYS_STATE: parseSystemState,
+    FUNC_INFO: parseFunctionInfo,
+    RSQ_STATUS: parseRsqStatus,
+    ACF_STATUS: parseAcfStatus,
+    RDS_STATUS: parseRdsStatus,
+}
+
+
+def parseReport(data):
+    """Parses an input report
+
+    Args:
+        data: bytes, bytearray or memoryview of the report
+
+    Returns:
+        record: PartInfo, SystemState, FunctionInfo, RsqStatus, AcfStatus,
+            RdsStatus or None for an unknown, empty or truncated report
+    """
+    if not data:
+        return None
+    parser = parsers.get(data[0])
+    if parser is None or len(data) < sizes[data[0]]:
+        return None
+    return parser(data)
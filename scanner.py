@@ -0,0 +1,152 @@
+# This Python file uses the following encoding: utf-8
+"""
+ FM band scanner
+
+ Sweeps the FM band (87.5 - 108 MHz by 100 kHz) with FM_TUNE_FREQ (0x30)
+ and measures every channel with the 0x32 FM_RSQ_STATUS reports:
+   - the tune transaction returns the first RSQ sample of the channel
+   - a hopeless channel (RSSI or SNR far below the thresholds) is left at
+     once, most of the band costs a single round trip
+   - a candidate is measured for a short dwell, its samples are averaged
+ The result is a band map, channel -> ChannelQuality, and a ScanProgress
+ event after every channel.
+
+ The scan runs on its own thread, the reports are fed by the thread
+ decoding them (onReport), like the TransactionManager.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import threading
+import time
+from collections import namedtuple
+from commands import CHANNEL_MIN, CHANNEL_MAX, CHANNEL_STEP, tuneCommand
+from reports import RsqStatus
+from transactions import TransactionError
+
+
+# Averaged measures of a channel, valid when RSSI and SNR reach the thresholds
+ChannelQuality = namedtuple("ChannelQuality", "channel rssi snr multipath offset samples valid")
+# Sent after each channel: index of the channel (from 1), number of channels, its quality
+ScanProgress = namedtuple("ScanProgress", "index total quality")
+
+
+class BandScanner(threading.Thread):
+    """
+        Scan worker
+        ...
+    Attributes:
+        submit: callable(command), returns a Transaction (TransactionManager.submit)
+        rssiThreshold: int, dBµV, minimum RSSI of a station
+        snrThreshold: int, dB, minimum SNR of a station
+        rssiMargin: int, dB, a first sample below rssiThreshold - rssiMargin is hopeless
+        snrMargin: int, dB, a first sample below snrThreshold - snrMargin is hopeless
+        samples: int, RSQ samples averaged on a candidate
+        dwell: float, longest measure of a candidate in seconds
+        adaptive: bool, False measures every channel like a candidate
+        channels: list, channels to scan in 10 kHz
+        onProgress: callable(ScanProgress), called after every channel
+        onDone: callable(bandMap, error), called at the end, error is None
+            or the TransactionError which stopped the scan
+        bandMap: dict, channel -> ChannelQuality
+        elapsed: float, duration of the scan in seconds
+    """
+
+    def __init__(self, submit, rssiThreshold=17, snrThreshold=3, rssiMargin=6, snrMargin=3, samples=4,
+                 dwell=0.15, adaptive=True, first=CHANNEL_MIN, last=CHANNEL_MAX, step=CHANNEL_STEP,
+                 onProgress=None, onDone=None):
+        """ initializes BandScanner class """
+        super().__init__(name="BandScanner", daemon=True)
+        self.submit = submit
+        self.rssiThreshold = rssiThreshold
+        self.snrThreshold = snrThreshold
+        self.rssiMargin = rssiMargin
+        self.snrMargin = snrMargin
+        self.samples = samples
+        self.dwell = dwell
+        self.adaptive = adaptive
+        self.channels = list(range(first, last + 1, step))
+        self.onProgress = onProgress
+        self.onDone = onDone
+        self.bandMap = {}
+        self.elapsed = 0.0
+        # Samples of the channel being measured, None when not measuring
+        self._channel = None
+        self._samples = None
+        self._condition = threading.Condition()
+        self._stopEvent = threading.Event()
+
+    def onReport(self, record):
+        """Feeds a parsed report, the RSQ samples of the measured channel are kept
+
+        Args:
+            record: parsed report (reports.parseReport)
+        """
+        if type(record) is not RsqStatus or self._samples is None:
+            return
+        with self._condition:
+            if self._samples is not None and record.channel == self._channel and record is not self._samples[0]:
+                self._samples.append(record)
+                self._condition.notify()
+
+    def hopeless(self, record):
+        """True if the first sample of a channel is too weak to be a station"""
+        return (record.rssi < self.rssiThreshold - self.rssiMargin
+                or record.snr < self.snrThreshold - self.snrMargin)
+
+    def run(self):
+        """Scans the channels in turn"""
+        start = time.perf_counter()
+        error = None
+        total = len(self.channels)
+        for index, channel in enumerate(self.channels, 1):
+            if self._stopEvent.is_set():
+                break
+            try:
+                quality = self.measure(channel)
+            except TransactionError as e:
+                # Cancelled by a tune of the user, or no answer
+                error = e
+                break
+            self.bandMap[channel] = quality
+            if self.onProgress is not None:
+                self.onProgress(ScanProgress(index, total, quality))
+        self.elapsed = time.perf_counter() - start
+        if self.onDone is not None:
+            self.onDone(self.bandMap, error)
+
+    def measure(self, channel):
+        """Tunes channel and returns its ChannelQuality"""
+        first = self.submit(tuneCommand(channel)).wait()
+        samples = [first]
+        if not self.adaptive or not self.hopeless(first):
+            deadline = time.perf_counter() + self.dwell
+            with self._condition:
+                self._channel = channel
+                self._samples = samples
+                while len(samples) < self.samples and not self._stopEvent.is_set():
+                    wait = deadline - time.perf_counter()
+                    if wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                self._samples = None
+        count = len(samples)
+        rssi = sum(sample.rssi for sample in samples) / count
+        snr = sum(sample.snr for sample in samples) / count
+        return ChannelQuality(channel, round(rssi, 1), round(snr, 1),
+                              round(sum(sample.multipath for sample in samples) / count, 1),
+                              round(sum(sample.offset for sample in samples) / count, 1),
+                              count, rssi >= self.rssiThreshold and snr >= self.snrThreshold)
+
+    def stations(self):
+        """Valid channels of the band map, in band order"""
+        return [channel for channel, quality in sorted(self.bandMap.items()) if quality.valid]
+
+    def stop(self, timeout=1.0):
+        """Stops the scan after the channel being measured"""
+        self._stopEvent.set()
+        with self._condition:
+            self._condition.notify()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
@@ -0,0 +1,359 @@
+# This Python file uses the following encoding: utf-8
+"""
+ Simulated FM tuner
+
+ Drop-in replacement of hid.Device (read/write/close) for the FM tuner
+ board 0x1234:0x4684, no USB device and no libhidapi needed.
+ It answers the AN649 commands sent by the control panel:
+   0x00 stand by, 0x01 power up, 0x30 FM_TUNE_FREQ, 0x31 FM_SEEK_START,
+   0x13 SET_PROPERTY
+ and emits the 0x08, 0x09, 0x12, 0x32, 0x33 and 0x34 responses at a
+ configurable rate, with RDS groups 0A (PS), 2A (RadioText) and 4A (clock)
+ built from a scripted station list.
+ With rate=None the reports are produced as fast as they are read, so the
+ simulator can be used as a load generator.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import time
+import random
+from collections import deque
+from rdscharset import ebuEncode
+
+try:
+    from hid import HIDException
+except ImportError:
+    class HIDException(Exception):
+        pass
+
+
+REPORT_SIZE = 40
+
+
+class Station:
+    """
+        Scripted radio station
+        ...
+    Attributes:
+        channel: int, frequency in 10 kHz (8960 for 89.6 MHz)
+        pi: int, RDS program identification
+        ps: string, program service name (8 characters)
+        rt: string, RadioText (up to 64 characters)
+        pty: int, RDS program type
+        rssi: int, dBµV
+        snr: int, dB
+        multipath: int
+        offset: int, frequency offset
+        stereo: bool
+    """
+
+    def __init__(self, channel, pi, ps, rt="", pty=0, rssi=45, snr=25, multipath=5, offset=0, stereo=True):
+        """ initializes Station class """
+        self.channel = channel
+        self.pi = pi
+        self.ps = ps
+        self.rt = rt
+        self.pty = pty
+        self.rssi = rssi
+        self.snr = snr
+        self.multipath = multipath
+        self.offset = offset
+        self.stereo = stereo
+
+
+stations = [
+    Station(8960, 0xF201, "INTER", "France Inter - Le direct", pty=1),
+    Station(8870, 0xF202, "CULTURE", "France Culture", pty=7, rssi=38, snr=18),
+    Station(9010, 0xF80F, "  FUN  ", "FUN RADIO", pty=10, rssi=30, snr=12, multipath=20),
+    Station(9540, 0xF3A4, "LENGADOC", "Lengadoc Info - Montpellier", pty=3, rssi=25, snr=9),
+    Station(9910, 0xF80A, "NOSTALGI", "Nostalgie, la légende", pty=27),
+    Station(9990, 0xF8C4, "  RMC  ", "RMC Info Talk Sport", pty=4, rssi=40, snr=22),
+    Station(10360, 0xF210, "BLEU.HER", "France Bleu Hérault", pty=3, rssi=50, snr=30),
+    Station(10450, 0xF3B1, "LODEVE", "Radio Lodève", pty=9, rssi=20, snr=6, multipath=40),
+]
+
+
+class SimulatedDevice:
+    """
+        Simulated tuner with the hid.Device interface
+        ...
+    Attributes:
+        stations: list of Station, the scripted band
+        rate: float, streamed reports per second, None for unpaced
+        mix: tuple, response codes streamed in turn while powered up
+        queueSize: int, reports kept when the reader is late (like hidapi)
+        errorRate: float, probability of corrupting an RDS character
+        channel: int, tuned channel in 10 kHz
+        powered: bool, true after a power up command
+        properties: dict, property id -> value set by SET_PROPERTY
+        written: list, every command written
+    """
+
+    def __init__(self, stations=stations, rate=100.0, mix=(0x32, 0x33, 0x34, 0x34, 0x34, 0x34),
+                 queueSize=30, errorRate=0.0, seed=0):
+        """ initializes SimulatedDevice class """
+        self.stations = sorted(stations, key=lambda station: station.channel)
+        self.rate = rate
+        self.mix = mix
+        self.queueSize = queueSize
+        self.errorRate = errorRate
+        self.random = random.Random(seed)
+        self.channel = 8750
+        self.powered = False
+        self.properties = {}
+        self.written = []
+        self.responses = deque()
+        self._open = True
+        self._nonblocking = 0
+        self._streamed = 0
+        self._start = 0.0
+        self._groups = ()
+        self._group = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        self._open = False
+
+    @property
+    def nonblocking(self):
+        return self._nonblocking
+
+    @nonblocking.setter
+    def nonblocking(self, value):
+        self._nonblocking = value
+
+    @property
+    def manufacturer(self):
+        return "Simulator"
+
+    @property
+    def product(self):
+        return "FM Tuner"
+
+    @property
+    def serial(self):
+        return "0000"
+
+    def station(self):
+        """Returns the Station on the tuned channel or None"""
+        for station in self.stations:
+            if station.channel == self.channel:
+                return station
+        return None
+
+    # Commands
+
+    def write(self, data):
+        if not self._open:
+            raise HIDException("device closed")
+        data = bytes(data)
+        self.written.append(data)
+        command = data[1] if len(data) > 1 else 0x00
+        match command:
+            case 0x00:                  # Stand by
+                self.powered = False
+                self.responses.clear()
+            case 0x01:                  # Power up
+                self.powered = True
+                self.responses.extend((self.partInfo(), self.systemState(), self.functionInfo()))
+                self.restartStream()
+            case 0x30:                  # FM_TUNE_FREQ
+                self.tune(data[3] + data[4] * 256)
+            case 0x31:                  # FM_SEEK_START, ARG1 bit 1 up, bit 0 wrap
+                self.seek(data[3] & 0x02, data[3] & 0x01)
+            case 0x13:                  # SET_PROPERTY
+                self.properties[data[3] + data[4] * 256] = data[5] + data[6] * 256
+        return len(data)
+
+    def tune(self, channel):
+        self.channel = min(max(channel, 8750), 10800)
+        self.restartStream()
+        self.responses.append(self.rsqStatus())
+
+    def seek(self, up, wrap):
+        channels = [station.channel for station in self.stations]
+        if up:
+            found = [channel for channel in channels if channel > self.channel]
+            if not found and wrap:
+                found = channels
+            channel = found[0] if found else 10800
+        else:
+            found = [channel for channel in channels if channel < self.channel]
+            if not found and wrap:
+                found = channels
+            channel = found[-1] if found else 8750
+        self.tune(channel)
+
+    # Reports
+
+    def read(self, size, timeout=None):
+        if not self._open:
+            raise HIDException("device closed")
+        if self.responses:
+            return self.responses.popleft()[:size]
+        if not self.powered:
+            # Nothing comes in stand by, a blocking read only waits 100 ms
+            if not self._nonblocking and timeout != 0:
+                time.sleep(0.1 if timeout is None else timeout / 1000)
+            return b""
+        if self.rate:
+            due = self._start + self._streamed / self.rate
+            late = time.perf_counter() - due
+            if late < 0:
+                if self._nonblocking or timeout == 0:
+                    return b""
+                if timeout is not None and -late > timeout / 1000:
+                    time.sleep(timeout / 1000)
+                    return b""
+                time.sleep(-late)
+            else:
+                # Like hidapi, only the newest reports are queued
+                skipped = int(late * self.rate) - self.queueSize
+                if skipped > 0:
+                    self._streamed += skipped
+        return self.nextReport()[:size]
+
+    def readinto(self, buffer, timeout=None):
+        report = self.read(len(buffer), timeout)
+        memoryview(buffer).cast("B")[:len(report)] = report
+        return len(report)
+
+    def read_many(self, count, size, timeout=None, out=None):
+        deadline = None if timeout is None else time.perf_counter() + timeout / 1000
+        wait = timeout
+        ret = []
+        while len(ret) < count:
+            report = self.read(size, wait)
+            if not report:
+                break
+            if out is None:
+                ret.append(report)
+            else:
+                offset = len(ret) * size
+                out[offset:offset + len(report)] = report
+                ret.append(len(report))
+            wait = 0 if deadline is None else max(0, int((deadline - time.perf_counter()) * 1000))
+        return ret
+
+    def write_many(self, reports):
+        return [self.write(data) for data in reports]
+
+    def restartStream(self):
+        self._streamed = 0
+        self._start = time.perf_counter()
+        station = self.station()
+        self._groups = self.rdsGroups(station) if station else ()
+        self._group = 0
+
+    def nextReport(self):
+        code = self.mix[self._streamed % len(self.mix)]
+        self._streamed += 1
+        if code == 0x34:
+            return self.rdsStatus()
+        if code == 0x33:
+            return self.acfStatus()
+        return self.rsqStatus()
+
+    def report(self, code, fields):
+        """Builds a 40 bytes report
+
+        Args:
+            code: int, response code (first byte)
+            fields: dict, index -> byte value
+        """
+        report = bytearray(REPORT_SIZE)
+        report[0] = code
+        for index, value in fields.items():
+            report[index] = value & 0xFF
+        return bytes(report)
+
+    def partInfo(self):
+        report = bytearray(self.report(0x08, {12: 4684 & 0xFF, 13: 4684 >> 8}))
+        report[27:39] = b"PIC18F25K50 "
+        return bytes(report)
+
+    def systemState(self):
+        return self.report(0x09, {8: 1})
+
+    def functionInfo(self):
+        return self.report(0x12, {8: 6, 9: 0, 10: 5, 16: 1, 17: 2, 18: 0})
+
+    def rsqStatus(self):
+        station = self.station()
+        if station:
+            rssi, snr, multipath, offset = station.rssi, station.snr, station.multipath, station.offset
+        else:
+            rssi, snr, multipath, offset = 3, -5, 0, 0
+        # Some jitter on the measures
+        rssi += self.random.randint(-1, 1)
+        snr += self.random.randint(-1, 1)
+        return self.report(0x32, {10: self.channel, 11: self.channel >> 8, 12: offset, 13: rssi, 14: snr,
+                                  15: multipath})
+
+    def acfStatus(self):
+        station = self.station()
+        if station and station.stereo and station.snr > 10:
+            return self.report(0x33, {10: 0, 11: 150, 12: 0x80 | min(100, station.snr * 4)})
+        return self.report(0x33, {10: 12, 11: 30, 12: 0})
+
+    def rdsStatus(self):
+        if not self._groups:
+            return self.report(0x34, {})
+        blocks = self._groups[self._group % len(self._groups)]
+        self._group += 1
+        if self.errorRate:
+            blocks = self.corrupt(blocks)
+        fields = {}
+        for i, block in enumerate(blocks):
+            fields[16 + 2 * i] = block
+            fields[17 + 2 * i] = block >> 8
+        return self.report(0x34, fields)
+
+    def corrupt(self, blocks):
+        """Flips a bit of each RDS character with probability errorRate"""
+        corrupted = list(blocks)
+        for i in (2, 3):
+            for shift in (0, 8):
+                if self.random.random() < self.errorRate:
+                    corrupted[i] ^= 1 << (shift + self.random.randrange(8))
+        return tuple(corrupted)
+
+    def rdsGroups(self, station):
+        """Builds the RDS group cycle of a station: 4 x 0A, 16 x 2A, 1 x 4A
+
+        Returns:
+            groups: tuple of (A, B, C, D) 16 bits blocks
+        """
+        b = (1 << 10) | (station.pty << 5)                    # TP, PTY
+        ps = ebuEncode(station.ps.ljust(8)[:8])
+        rt = (ebuEncode(station.rt) + b"\r").ljust(64)[:64]
+        # Decoder identification d3..d0, sent MSB first in segments 0..3
+        di = (0, 0, 0, int(station.stereo))
+        groups = []
+        for segment in range(4):
+            blockB = b | (1 << 4) | (1 << 3) | (di[segment] << 2) | segment
+            blockD = (ps[2 * segment] << 8) | ps[2 * segment + 1]
+            groups.append((station.pi, blockB, station.pi, blockD))
+        for segment in range(16):
+            blockB = b | 0x2000 | segment
+            chars = rt[4 * segment:4 * segment + 4]
+            groups.append((station.pi, blockB, (chars[0] << 8) | chars[1], (chars[2] << 8) | chars[3]))
+        groups.append(self.clockGroup(station, b))
+        return tuple(groups)
+
+    def clockGroup(self, station, b):
+        """Builds a 4A group with the current UTC time and a +1 h offset"""
+        now = time.gmtime()
+        mjd = int(time.time() // 86400) + 40587
+        offset = 2                                              # in half hours, positive
+        blockB = b | 0x4000 | (mjd >> 15)
+        blockC = ((mjd & 0x7FFF) << 1) | (now.tm_hour >> 4)
+        blockD = ((now.tm_hour & 0x0F) << 12) | (now.tm_min << 6) | offset
+        return station.pi, blockB, blockC, blockD
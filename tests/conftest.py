@@ -0,0 +1,9 @@
+# This Python file uses the following encoding: utf-8
+"""
+ The modules are flat at the top of the repository
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
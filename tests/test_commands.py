@@ -0,0 +1,69 @@
+# This Python file uses the following encoding: utf-8
+"""
+ Output reports compared with the bytes the original fm.py wrote
+"""
+
+import pytest
+
+import commands
+from commands import (STAND_BY_COMMAND, POWER_UP_COMMAND, SEEK_UP_COMMAND, SEEK_DOWN_COMMAND,
+                      tuneCommand, setPropertyCommand, seekCommand, frequencyToChannel, nextChannel,
+                      PROPERTY_VOLUME, PROPERTY_MUTE, PROPERTY_MONO, PROPERTY_DE_EMPHASIS,
+                      CHANNEL_MIN, CHANNEL_MAX)
+
+
+def padded(*data):
+    """16 bytes report starting with data"""
+    return bytes(data) + bytes(16 - len(data))
+
+
+def test_stand_by():
+    assert STAND_BY_COMMAND == padded(0x00, 0x00)
+
+
+def test_power_up():
+    assert POWER_UP_COMMAND == bytes([0x00, 0x01, 0x01, 0x00, 0x23, 0, 0, 0, 0, 0, 0, 0, 0, 0x63, 0x11, 0x00])
+
+
+def test_seek():
+    assert SEEK_UP_COMMAND == padded(0x00, 0x31, 0x00, 0x03, 0x00, 0x00, 0x00)
+    assert SEEK_DOWN_COMMAND == padded(0x00, 0x31, 0x00, 0x01, 0x00, 0x00, 0x00)
+    assert seekCommand(True) is SEEK_UP_COMMAND
+    assert seekCommand(False) is SEEK_DOWN_COMMAND
+    assert seekCommand(True, wrap=False) == padded(0x00, 0x31, 0x00, 0x02)
+    assert seekCommand(False, wrap=False) == padded(0x00, 0x31, 0x00, 0x00)
+
+
+@pytest.mark.parametrize("channel", [CHANNEL_MIN, 8960, 10000, CHANNEL_MAX])
+def test_tune(channel):
+    assert tuneCommand(channel) == padded(0x00, 0x30, 0x00, channel & 0xFF, (channel & 0xFF00) // 256, 0x00, 0x00)
+
+
+@pytest.mark.parametrize("prop, value, data", [
+    (PROPERTY_MONO, 1, (0x02, 0x03, 0x01)),
+    (PROPERTY_MONO, 0, (0x02, 0x03, 0x00)),
+    (PROPERTY_MUTE, 3, (0x01, 0x03, 0x03)),
+    (PROPERTY_DE_EMPHASIS, 2, (0x00, 0x39, 0x02)),
+    (PROPERTY_VOLUME, 45, (0x00, 0x03, 45)),
+])
+def test_set_property(prop, value, data):
+    assert setPropertyCommand(prop, value) == padded(0x00, 0x13, 0x00, *data, 0x00)
+
+
+def test_immutable_and_cached():
+    for command in (STAND_BY_COMMAND, POWER_UP_COMMAND, tuneCommand(8960), setPropertyCommand(PROPERTY_VOLUME, 10)):
+        assert type(command) is bytes
+        assert len(command) == 16
+    assert tuneCommand(8960) is tuneCommand(8960)
+
+
+@pytest.mark.parametrize("frequency, channel", [(89.6, 8960), ("89.6", 8960), (87.5, 8750), ("108.0", 10800), (100.1, 10010)])
+def test_frequency_to_channel(frequency, channel):
+    assert frequencyToChannel(frequency) == channel
+
+
+def test_next_channel():
+    assert nextChannel(8960, commands.CHANNEL_STEP) == 8970
+    assert nextChannel(8960, -commands.CHANNEL_STEP) == 8950
+    assert nextChannel(CHANNEL_MAX, 10) == CHANNEL_MIN
+    assert nextChannel(CHANNEL_MIN, -10) == CHANNEL_MAX
@@ -0,0 +1,213 @@
+# This Python file uses the following encoding: utf-8
+"""
+ CommandWriter thread: order, coalescing, redundant values, gap, retries, stop
+"""
+
+import errno
+import threading
+import time
+import pytest
+
+from commandwriter import CommandWriter
+from commands import (STAND_BY_COMMAND, POWER_UP_COMMAND, tuneCommand, setPropertyCommand,
+                      PROPERTY_VOLUME, PROPERTY_MUTE)
+from hiderrors import RetryPolicy, HidError
+
+
+class FakeDevice:
+    """
+        Device recording its writes
+        ...
+    Attributes:
+        written: list of bytes, commands written
+        times: list of float, time.perf_counter() of each write
+        failures: list of exceptions raised by the next writes
+        gate: threading.Event, a write waits for it
+    """
+
+    def __init__(self):
+        self.written = []
+        self.times = []
+        self.failures = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def write(self, data):
+        self.entered.set()
+        self.gate.wait(2)
+        if self.failures:
+            raise self.failures.pop(0)
+        self.written.append(bytes(data))
+        self.times.append(time.perf_counter())
+        return len(data)
+
+
+def waitFor(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def device():
+    return FakeDevice()
+
+
+@pytest.fixture
+def writer(device):
+    written = []
+    writer = CommandWriter(device, minGap=0, onWrite=lambda command, tag: written.append((command, tag)),
+                           retry=RetryPolicy(retries=2, delay=0.001))
+    writer.tags = written
+    writer.start()
+    yield writer
+    device.gate.set()
+    writer.stop()
+
+
+def blockWrites(device, writer):
+    """Holds the writer in a write, the next sends are queued"""
+    device.gate.clear()
+    device.entered.clear()
+    writer.send(tuneCommand(8750))
+    device.entered.wait(2)
+
+
+def test_commands_in_order(device, writer):
+    tags = [object(), object()]
+    writer.send(POWER_UP_COMMAND, tags[0])
+    writer.send(tuneCommand(8960), tags[1])
+    waitFor(lambda: len(device.written) == 2)
+    assert device.written == [POWER_UP_COMMAND, tuneCommand(8960)]
+    assert writer.tags == list(zip(device.written, tags))
+
+
+def test_properties_coalesced(device, writer):
+    blockWrites(device, writer)
+    for value in range(1, 11):
+        writer.setProperty(PROPERTY_VOLUME, value)
+    writer.setProperty(PROPERTY_MUTE, 3)
+    assert writer.pending() == 2
+    device.gate.set()
+    waitFor(lambda: writer.pending() == 0 and len(device.written) == 3)
+    assert device.written[1:] == [setPropertyCommand(PROPERTY_VOLUME, 10), setPropertyCommand(PROPERTY_MUTE, 3)]
+    assert writer.coalescedCount == 9
+    assert writer.tags[1] == (setPropertyCommand(PROPERTY_VOLUME, 10), None)
+
+
+def test_commands_before_properties(device, writer):
+    blockWrites(device, writer)
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    writer.send(tuneCommand(8960))
+    device.gate.set()
+    waitFor(lambda: len(device.written) == 3)
+    assert device.written[1:] == [tuneCommand(8960), setPropertyCommand(PROPERTY_VOLUME, 20)]
+
+
+def test_redundant_dropped(device, writer):
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    waitFor(lambda: len(device.written) == 1)
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    assert writer.redundantCount == 1
+    assert writer.pending() == 0
+
+
+def test_back_to_written_value_dropped(device, writer):
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    waitFor(lambda: len(device.written) == 1)
+    blockWrites(device, writer)
+    writer.setProperty(PROPERTY_VOLUME, 21)
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    device.gate.set()
+    waitFor(lambda: writer.pending() == 0 and len(device.written) == 2)
+    time.sleep(0.01)
+    assert device.written == [setPropertyCommand(PROPERTY_VOLUME, 20), tuneCommand(8750)]
+    assert writer.redundantCount == 1
+
+
+def test_forget(device, writer):
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    waitFor(lambda: len(device.written) == 1)
+    writer.forget()
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    waitFor(lambda: len(device.written) == 2)
+    assert writer.redundantCount == 0
+
+
+@pytest.mark.parametrize("command", [POWER_UP_COMMAND, STAND_BY_COMMAND])
+def test_reset_forgets(device, writer, command):
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    waitFor(lambda: len(device.written) == 1)
+    writer.send(command)
+    waitFor(lambda: len(device.written) == 2)
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    waitFor(lambda: len(device.written) == 3)
+    assert writer.redundantCount == 0
+
+
+def test_min_gap(device):
+    writer = CommandWriter(device, minGap=0.02)
+    for channel in (8960, 9120, 9350):
+        writer.send(tuneCommand(channel))
+    writer.start()
+    writer.stop()
+    assert len(device.times) == 3
+    gaps = [b - a for a, b in zip(device.times, device.times[1:])]
+    assert min(gaps) >= 0.019
+
+
+def test_transient_error_retried(device, writer):
+    device.failures = [OSError(errno.EIO, "Input/output error")] * 2
+    writer.send(tuneCommand(8960))
+    waitFor(lambda: len(device.written) == 1)
+    assert writer.errorCount == 0
+    assert writer.writeCount == 1
+
+
+def test_error_after_retries(device):
+    errors = []
+    writer = CommandWriter(device, minGap=0, onError=lambda error, command: errors.append((error, command)),
+                           retry=RetryPolicy(retries=2, delay=0.001))
+    device.failures = [OSError(errno.EIO, "Input/output error")] * 3
+    writer.send(tuneCommand(8960))
+    writer.send(tuneCommand(9120))
+    writer.start()
+    waitFor(lambda: writer.errorCount + writer.writeCount == 2)
+    writer.stop()
+    assert device.written == [tuneCommand(9120)]
+    assert writer.errorCount == 1
+    assert isinstance(errors[0][0], HidError) and errors[0][1] == tuneCommand(8960)
+
+
+def test_failed_property_not_written(device, writer):
+    device.failures = [OSError(errno.ENODEV, "No such device")]
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    waitFor(lambda: writer.errorCount == 1)
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    waitFor(lambda: len(device.written) == 1)
+
+
+def test_stop_drains_queue(device):
+    writer = CommandWriter(device, minGap=0)
+    commands = [tuneCommand(channel) for channel in range(8750, 8800, 10)]
+    for command in commands:
+        writer.send(command)
+    writer.setProperty(PROPERTY_VOLUME, 20)
+    writer.start()
+    writer.stop()
+    assert not writer.is_alive()
+    assert device.written == commands + [setPropertyCommand(PROPERTY_VOLUME, 20)]
+
+
+def test_stop_gives_up_retry(device):
+    writer = CommandWriter(device, minGap=0, retry=RetryPolicy(retries=5, delay=10))
+    device.failures = [OSError(errno.EIO, "Input/output error")]
+    writer.send(tuneCommand(8960))
+    writer.start()
+    waitFor(lambda: not device.failures)
+    start = time.monotonic()
+    writer.stop()
+    assert time.monotonic() - start < 1
+    assert writer.errorCount == 1
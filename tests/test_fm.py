@@ -0,0 +1,94 @@
+# This Python file uses the following encoding: utf-8
+"""
+ RDS station display of the main window (offscreen Qt, no tuner)
+
+ Skipped without PySide6 or the MainWindow.py generated from fm.ui.
+"""
+
+import os
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PySide6")
+pytest.importorskip("MainWindow", reason="pyside6-uic fm.ui -o MainWindow.py")
+
+from PySide6.QtWidgets import QApplication
+from fm import Fm
+from simulator import SimulatedDevice
+from reports import RdsStatus
+
+CHANNEL = 8960
+PI = 0xF201
+OTHER_PI = 0xF202
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def window(app):
+    window = Fm(device=SimulatedDevice(rate=None), rdsCachePath=None)
+    yield window
+    window.stopReading()
+
+
+def psGroup(pi, segment, text):
+    """0A group carrying 2 characters of the PS"""
+    return RdsStatus(pi, segment, 0, (ord(text[0]) << 8) | ord(text[1]))
+
+
+def sendPs(window, pi, text, times=1):
+    """Groups of every PS segment, returns the PS shown after each group"""
+    shown = []
+    for i in range(times):
+        for segment in range(4):
+            window.fmRdsStatus(psGroup(pi, segment, text[2 * segment:2 * segment + 2]))
+            window.view.flush()
+            shown.append(window.lineEditPS.text())
+    return shown
+
+
+def tune(window, channel):
+    window.clearTextBox()
+    window.stationTuned(channel)
+    window.view.flush()
+
+
+def test_cached_ps_not_blanked_on_retune(window):
+    tune(window, CHANNEL)
+    sendPs(window, PI, "STATIONA", times=2)
+    assert window.rdsCache.stations[(CHANNEL, PI)].ps == "STATIONA"
+    tune(window, 9120)
+    tune(window, CHANNEL)
+    assert window.lineEditPS.text() == "STATIONA"
+    assert window.lineEditPS.property("provisional")
+    # The first group gives the PI of the cached station: no 'ST      '
+    assert sendPs(window, PI, "STATIONA") == ["STATIONA"] * 4
+    assert not window.lineEditPS.property("provisional")
+    assert window.rdsCache.pi == PI
+
+
+def test_other_station_on_cached_channel(window):
+    tune(window, CHANNEL)
+    sendPs(window, PI, "STATIONA", times=2)
+    tune(window, 9120)
+    tune(window, CHANNEL)
+    # 2 groups confirm the PI, then 2 votes per character
+    shown = sendPs(window, OTHER_PI, "RADIO B ", times=3)
+    # Blanked once the new PI is confirmed, then the new name only
+    assert "STATIONA" not in shown[2:]
+    assert shown[-1] == "RADIO B "
+    assert window.rdsCache.stations[(CHANNEL, OTHER_PI)].ps == "RADIO B "
+
+
+def test_pi_change_without_cache(window):
+    tune(window, CHANNEL)
+    sendPs(window, PI, "STATIONA", times=2)
+    # Another station on the same channel, never heard
+    sendPs(window, OTHER_PI, "RADIO B ", times=3)
+    assert window.rdsCache.pi == OTHER_PI
+    assert window.lineEditPS.text() == "RADIO B "
+    assert window.rdsCache.stations[(CHANNEL, OTHER_PI)].ps == "RADIO B "
+    assert window.rdsCache.stations[(CHANNEL, PI)].ps == "STATIONA"
@@ -0,0 +1,278 @@
+# This Python file uses the following encoding: utf-8
+"""
+ HidrawDevice and AsyncDevice driven through a FIFO or a pty
+
+ A FIFO stands in for /dev/hidrawN: HidrawDevice opens it read/write, the
+ test writes the "reports" on its own descriptor. A pty gives the hangup
+ of an unplugged device when its master side is closed.
+"""
+
+import os
+import sys
+import time
+import tty
+import asyncio
+import threading
+import pytest
+
+import hid
+from hid import HidrawDevice, AsyncDevice, HIDException
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="hidraw backend is Linux only")
+
+REPORT = bytes(range(40))
+
+
+@pytest.fixture
+def fifo(tmp_path):
+    """(device, writer fd) on a FIFO"""
+    path = str(tmp_path / "hidraw0")
+    os.mkfifo(path)
+    device = HidrawDevice(path=path)
+    writer = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+    yield device, writer
+    device.close()
+    os.close(writer)
+
+
+@pytest.fixture
+def pty():
+    """(device, master fd) on a raw pty, closing master hangs the device up"""
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    device = HidrawDevice(path=os.ttyname(slave))
+    os.close(slave)
+    state = {"master": master}
+    yield device, state
+    device.close()
+    if state["master"] is not None:
+        os.close(state["master"])
+
+
+def hangUp(state):
+    os.close(state["master"])
+    state["master"] = None
+
+
+class ThreadedDevice:
+    """Device without fileno(), AsyncDevice reads it from a thread"""
+
+    def __init__(self, device):
+        self.device = device
+
+    def read(self, size, timeout=None):
+        return self.device.read(size, timeout)
+
+    def write(self, data):
+        return self.device.write(data)
+
+    def close(self):
+        self.device.close()
+
+
+def test_read_timeout(fifo):
+    device, writer = fifo
+    start = time.monotonic()
+    assert device.read(40, timeout=50) == b""
+    assert time.monotonic() - start >= 0.04
+
+
+def test_read_without_wait(fifo):
+    device, writer = fifo
+    assert device.read(40, timeout=0) == b""
+    device.nonblocking = 1
+    assert device.read(40) == b""
+
+
+def test_read_partial(fifo):
+    device, writer = fifo
+    os.write(writer, REPORT[:10])
+    assert device.read(40, timeout=100) == REPORT[:10]
+
+
+def test_read(fifo):
+    device, writer = fifo
+    os.write(writer, REPORT)
+    assert device.read(40, timeout=100) == REPORT
+    assert device.read(40, timeout=0) == b""
+
+
+def test_readinto(fifo):
+    device, writer = fifo
+    buffer = bytearray(40)
+    assert device.readinto(buffer, timeout=10) == 0
+    os.write(writer, REPORT[:25])
+    assert device.readinto(buffer, timeout=100) == 25
+    assert buffer[:25] == REPORT[:25]
+
+
+def test_read_many(fifo):
+    device, writer = fifo
+    os.write(writer, REPORT * 3)
+    assert device.read_many(64, 40, 100) == [REPORT] * 3
+
+
+def test_read_many_count(fifo):
+    device, writer = fifo
+    os.write(writer, REPORT * 3)
+    assert device.read_many(2, 40, 0) == [REPORT] * 2
+    assert device.read_many(2, 40, 0) == [REPORT]
+
+
+def test_read_many_into(fifo):
+    device, writer = fifo
+    os.write(writer, REPORT * 2 + REPORT[:7])
+    out = bytearray(4 * 40)
+    assert device.read_many(4, 40, 0, out) == [40, 40, 7]
+    assert out[:87] == REPORT * 2 + REPORT[:7]
+
+
+def test_read_many_empty(fifo):
+    device, writer = fifo
+    assert device.read_many(64, 40, 0) == []
+    assert device.read_many(64, 40, 0, bytearray(40 * 64)) == []
+
+
+def test_read_many_until_deadline(fifo):
+    device, writer = fifo
+    os.write(writer, REPORT)
+    late = threading.Timer(0.03, os.write, (writer, REPORT))
+    late.start()
+    try:
+        assert device.read_many(64, 40, 150) == [REPORT] * 2
+    finally:
+        late.join()
+
+
+def test_read_many_timeout(fifo):
+    device, writer = fifo
+    start = time.monotonic()
+    assert device.read_many(64, 40, 30) == []
+    assert time.monotonic() - start >= 0.02
+
+
+def test_write(pty):
+    device, state = pty
+    assert device.write(REPORT[:8]) == 8
+    assert os.read(state["master"], 64) == REPORT[:8]
+    assert device.write_many([REPORT[:4], REPORT[4:8]]) == [4, 4]
+    time.sleep(0.01)
+    assert os.read(state["master"], 64) == REPORT[:8]
+
+
+def test_fileno(fifo):
+    device, writer = fifo
+    assert device.fileno() >= 0
+
+
+def test_closed(fifo):
+    device, writer = fifo
+    device.close()
+    device.close()
+    for call in (lambda: device.read(40, 0), lambda: device.readinto(bytearray(40), 0),
+                 lambda: device.write(REPORT), device.fileno):
+        with pytest.raises(HIDException, match="closed"):
+            call()
+
+
+def test_hangup(pty):
+    device, state = pty
+    hangUp(state)
+    with pytest.raises(HIDException, match="disconnected"):
+        device.read(40, timeout=100)
+    # Without waiting, the end of file is the hangup
+    for call in (lambda: device.read(40, 0), lambda: device.readinto(bytearray(40), 0),
+                 lambda: device.read_many(64, 40, 0)):
+        with pytest.raises(HIDException, match="disconnected"):
+            call()
+
+
+def test_unknown_path(tmp_path):
+    with pytest.raises(HIDException):
+        HidrawDevice(path=str(tmp_path / "hidraw9"))
+
+
+def test_select_backend(monkeypatch):
+    monkeypatch.setattr(hid, "backend", "hidraw")
+    assert hid.select_backend() == "hidraw"
+    with hid.Device(path=os.devnull) as device:
+        assert type(device) is HidrawDevice
+    with pytest.raises(ValueError):
+        hid.select_backend("usb")
+
+
+def test_async_read(fifo):
+    device, writer = fifo
+
+    async def run():
+        async with AsyncDevice(device, size=40) as asyncDevice:
+            assert await asyncDevice.read(timeout=0.02) == b""
+            os.write(writer, REPORT * 2)
+            assert await asyncDevice.read(timeout=1) == REPORT
+            assert await asyncDevice.read(timeout=1) == REPORT
+
+    asyncio.run(run())
+
+
+def test_async_iterate_until_close(fifo):
+    device, writer = fifo
+
+    async def run():
+        asyncDevice = AsyncDevice(device, size=40)
+        os.write(writer, REPORT)
+        reports = []
+        async for report in asyncDevice:
+            reports.append(report)
+            await asyncDevice.close()
+        return reports
+
+    assert asyncio.run(run()) == [REPORT]
+
+
+def test_async_closed(fifo):
+    device, writer = fifo
+
+    async def run():
+        asyncDevice = AsyncDevice(device, size=40)
+        await asyncDevice.close()
+        with pytest.raises(HIDException):
+            await asyncDevice.read(timeout=0.1)
+        with pytest.raises(HIDException):
+            await asyncDevice.write(REPORT)
+
+    asyncio.run(run())
+    with pytest.raises(HIDException, match="closed"):
+        device.read(40, 0)
+
+
+def test_async_hangup(pty):
+    device, state = pty
+
+    async def run():
+        asyncDevice = AsyncDevice(device, size=40)
+        assert await asyncDevice.read(timeout=0.02) == b""
+        hangUp(state)
+        with pytest.raises(HIDException, match="disconnected"):
+            await asyncDevice.read(timeout=1)
+        await asyncDevice.close()
+
+    asyncio.run(run())
+
+
+def test_async_thread(pty):
+    device, state = pty
+
+    async def run():
+        async with AsyncDevice(ThreadedDevice(device), size=40) as asyncDevice:
+            os.write(state["master"], REPORT)
+            assert await asyncDevice.read(timeout=1) == REPORT
+            assert await asyncDevice.write(REPORT[:4]) == 4
+        return os.read(state["master"], 64)
+
+    assert asyncio.run(run()) == REPORT[:4]
+
+
+def test_hidraw_linux_only(monkeypatch):
+    monkeypatch.setattr(sys, "platform", "win32")
+    with pytest.raises(HIDException, match="Linux"):
+        hid.select_backend("hidraw")
@@ -0,0 +1,134 @@
+# This Python file uses the following encoding: utf-8
+"""
+ TextAssembler votes and the RadioText handling of RdsDecoder
+"""
+
+from rds import TextAssembler, RdsDecoder, RtSegment, RtComplete
+
+PI = 0xF201
+
+
+def codes(text):
+    return tuple(text.encode("latin-1"))
+
+
+def rtGroup(ab, segment, text):
+    """2A group carrying 4 characters of RadioText A or B"""
+    chars = codes(text)
+    return PI, 0x2000 | (ab << 4) | segment, (chars[0] << 8) | chars[1], (chars[2] << 8) | chars[3]
+
+
+def test_first_reception_shown():
+    ps = TextAssembler(4, 2)
+    assert not ps.receive(1, codes("AB"))
+    assert ps.value() == "  AB    "
+    assert not ps.stable[2]
+
+
+def test_stable_after_votes():
+    ps = TextAssembler(4, 2, votes=2)
+    for segment, chars in enumerate(("IN", "TE", "R ", "  ")):
+        ps.receive(segment, codes(chars))
+    assert not ps.complete
+    complete = [ps.receive(segment, codes(chars)) for segment, chars in enumerate(("IN", "TE", "R ", "  "))]
+    assert complete == [False, False, False, True]
+    assert ps.value() == "INTER   "
+    # Complete is returned once
+    assert not ps.receive(0, codes("IN"))
+
+
+def test_single_vote():
+    ps = TextAssembler(1, 2, votes=1)
+    assert ps.receive(0, codes("OK"))
+    assert ps.stable == [True, True]
+
+
+def test_tie_keeps_shown_character():
+    ps = TextAssembler(1, 2)
+    ps.receive(0, codes("AB"))
+    ps.receive(0, codes("AX"))
+    # 1 vote each for B and X, the shown one stays
+    assert ps.value() == "AB"
+    assert ps.stable == [True, False]
+    ps.receive(0, codes("AX"))
+    assert ps.value() == "AX"
+    assert ps.stable == [True, True]
+
+
+def test_stable_character_not_replaced_by_one_error():
+    ps = TextAssembler(1, 2)
+    ps.receive(0, codes("AB"))
+    ps.receive(0, codes("AB"))
+    ps.receive(0, codes("AZ"))
+    assert ps.value() == "AB"
+    assert ps.complete
+
+
+def test_end_marker():
+    rt = TextAssembler(16, 4)
+    rt.receive(0, codes("Info"))
+    rt.receive(1, (0x20, 0x32, 0x0D, 0x20))
+    assert rt.end == 1
+    assert not rt.complete
+    rt.receive(0, codes("Info"))
+    assert rt.receive(1, (0x20, 0x32, 0x0D, 0x20))
+    # The marker is shown as a space, the segments after it are not needed
+    assert rt.value() == "Info 2" + " " * 58
+
+
+def test_end_marker_moves_back():
+    rt = TextAssembler(16, 4, votes=1)
+    rt.receive(3, (0x0D, 0x20, 0x20, 0x20))
+    rt.receive(1, codes("ab") + (0x0D, 0x20))
+    assert rt.end == 1
+
+
+def test_preset_then_override():
+    ps = TextAssembler(4, 2)
+    ps.preset("OLDNAME")
+    assert ps.value() == "OLDNAME "
+    assert not any(ps.stable)
+    # The preset counts as one reception: a first different one ties
+    ps.receive(0, codes("NE"))
+    assert ps.value() == "OLDNAME "
+    ps.receive(0, codes("NE"))
+    assert ps.value() == "NEDNAME "
+    # A reception agreeing with the preset makes it stable
+    ps.receive(1, codes("DN"))
+    assert ps.stable[2:4] == [True, True]
+
+
+def test_preset_accented():
+    ps = TextAssembler(4, 2)
+    ps.preset("CHÉRIE")
+    assert ps.value() == "CHÉRIE  "
+    # E without accent ties with the preset É
+    ps.receive(1, codes("ER"))
+    assert ps.value() == "CHÉRIE  "
+
+
+def test_ebu_characters():
+    ps = TextAssembler(1, 2, votes=1)
+    ps.receive(0, (0x82, 0x8B))
+    assert ps.value() == "éÇ"
+
+
+def test_rt_ab_flag_reset():
+    decoder = RdsDecoder(votes=1)
+    decoder.decodeGroup(*rtGroup(0, 0, "Old "))
+    assert decoder.rtA.value().startswith("Old ")
+    events = decoder.decodeGroup(*rtGroup(1, 0, "New "))
+    assert events[1] == RtSegment(1, 0, "New ", "New " + " " * 60)
+    assert decoder.rtB.value().startswith("New ")
+    # Back to A: a new text, the old one is forgotten
+    decoder.decodeGroup(*rtGroup(0, 1, "text"))
+    assert decoder.rtA.value() == "    text" + " " * 56
+
+
+def test_rt_complete_once():
+    decoder = RdsDecoder(votes=1)
+    decoder.decodeGroup(*rtGroup(0, 0, "Keep"))
+    decoder.decodeGroup(*rtGroup(0, 1, " on\r"))
+    events = decoder.decodeGroup(*rtGroup(0, 0, "Keep"))
+    assert decoder.rtA.value().startswith("Keep on ")
+    assert not any(type(event) is RtComplete for event in events)
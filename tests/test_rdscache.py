@@ -0,0 +1,187 @@
+# This Python file uses the following encoding: utf-8
+"""
+ RdsCache: provisional station, PI confirmation, learning, size, file
+"""
+
+import json
+import pytest
+
+from rdscache import RdsCache, StationInfo
+from rds import Header, Switches, PsComplete, RtComplete
+
+CHANNEL = 8960
+PI = 0xF201
+OTHER_PI = 0xF202
+
+
+def header(pty=10):
+    return Header(PI, 0, 0, 1, pty)
+
+
+def learnStation(cache, channel=CHANNEL, pi=PI, ps="STATIONA", rtA="", rtB=""):
+    """Tunes channel and learns a station from its completed parts"""
+    cache.tune(channel)
+    cache.identify(pi)
+    cache.learn((header(), Switches(0, 1, 0, 1), PsComplete(ps)))
+    if rtA:
+        cache.learn((header(), RtComplete(0, rtA)))
+    if rtB:
+        cache.learn((header(), RtComplete(1, rtB)))
+
+
+def test_unknown_channel():
+    cache = RdsCache()
+    assert cache.tune(CHANNEL) is None
+    assert cache.provisional is None
+    assert cache.identify(PI) is None
+    assert cache.lastPi == {CHANNEL: PI}
+
+
+def test_learn_and_provisional():
+    cache = RdsCache()
+    learnStation(cache, rtA="Text A", rtB="Text B")
+    info = cache.stations[(CHANNEL, PI)]
+    assert info == StationInfo(CHANNEL, PI, "STATIONA", "Text A", "Text B", 10, None)
+    cache.tune(9120)
+    assert cache.tune(CHANNEL) == info
+    assert cache.provisional == info
+    assert cache.pi is None
+
+
+def test_learn_before_identify_ignored():
+    cache = RdsCache()
+    cache.tune(CHANNEL)
+    cache.learn((header(), PsComplete("STATIONA")))
+    assert not cache.stations
+    assert not cache.changed
+
+
+def test_di_stored_once_complete():
+    cache = RdsCache()
+    cache.tune(CHANNEL)
+    cache.identify(PI)
+    # d3 d2 d1 d0 = 1 0 0 1, segment 0 carries d3
+    for segment, di in enumerate((1, 0, 0, 1)):
+        assert cache.stations.get((CHANNEL, PI)) is None
+        cache.learn((header(), Switches(0, 1, segment, di)))
+    assert cache.stations[(CHANNEL, PI)].di == 0b1001
+
+
+def test_heard_new_pi_repeats():
+    cache = RdsCache(repeat=2)
+    cache.tune(CHANNEL)
+    assert not cache.heard(PI)
+    assert cache.heard(PI)
+    cache.identify(PI)
+    assert not cache.heard(PI)
+    # A corrupted block A once, then the station again
+    assert not cache.heard(PI ^ 0x0100)
+    assert not cache.heard(PI)
+    assert not cache.heard(OTHER_PI)
+    assert cache.heard(OTHER_PI)
+
+
+def test_heard_candidate_interrupted():
+    cache = RdsCache(repeat=2)
+    cache.tune(CHANNEL)
+    assert not cache.heard(PI)
+    assert not cache.heard(OTHER_PI)
+    assert not cache.heard(PI)
+    assert cache.heard(PI)
+
+
+def test_heard_provisional_pi_at_once():
+    cache = RdsCache(repeat=2)
+    learnStation(cache)
+    cache.tune(CHANNEL)
+    assert cache.heard(PI)
+    # Another PI still needs 2 groups
+    cache.tune(CHANNEL)
+    assert not cache.heard(OTHER_PI)
+    assert cache.heard(OTHER_PI)
+
+
+def test_identify_other_station():
+    cache = RdsCache()
+    learnStation(cache)
+    cache.tune(CHANNEL)
+    assert cache.identify(OTHER_PI) is None
+    assert cache.provisional is None
+    assert cache.lastPi[CHANNEL] == OTHER_PI
+    assert cache.tune(CHANNEL) is None
+
+
+def test_size_least_recently_heard_dropped():
+    cache = RdsCache(size=3)
+    for channel in (8750, 8800, 8850):
+        learnStation(cache, channel=channel)
+    # Heard again, 8750 is now the most recent
+    cache.tune(8750)
+    cache.identify(PI)
+    learnStation(cache, channel=8900)
+    assert list(cache.stations) == [(8850, PI), (8750, PI), (8900, PI)]
+
+
+def test_save_load(tmp_path):
+    path = str(tmp_path / "rdsCache.json")
+    cache = RdsCache(path)
+    learnStation(cache, rtA="Text é")
+    assert cache.changed
+    cache.save()
+    assert not cache.changed
+    assert not (tmp_path / "rdsCache.json.tmp").exists()
+    loaded = RdsCache(path)
+    assert loaded.stations == cache.stations
+    assert loaded.lastPi == {CHANNEL: PI}
+    assert loaded.tune(CHANNEL).rtA == "Text é"
+    assert not loaded.changed
+
+
+def test_save_unchanged_not_written(tmp_path):
+    path = tmp_path / "rdsCache.json"
+    cache = RdsCache(str(path))
+    cache.save()
+    assert not path.exists()
+    learnStation(cache)
+    cache.save()
+    path.write_text("kept")
+    cache.save()
+    assert path.read_text() == "kept"
+
+
+def test_save_replaces_atomically(tmp_path, monkeypatch):
+    path = tmp_path / "rdsCache.json"
+    cache = RdsCache(str(path))
+    learnStation(cache)
+    cache.save()
+    before = path.read_text()
+    learnStation(cache, channel=9120)
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    # A crash while writing leaves the previous file whole
+    monkeypatch.setattr(json, "dumps", crash)
+    with pytest.raises(OSError):
+        cache.save()
+    assert path.read_text() == before
+    assert cache.changed
+
+
+def test_missing_file(tmp_path):
+    cache = RdsCache(str(tmp_path / "none" / "rdsCache.json"))
+    assert not cache.stations
+
+
+@pytest.mark.parametrize("content", ["", "{", "[]", "{}", '{"stations": [{"channel": 1}], "lastPi": {}}',
+                                     '{"stations": [], "lastPi": {"x": 1}}', '{"stations": 3, "lastPi": {}}'])
+def test_corrupt_file(tmp_path, capsys, content):
+    path = tmp_path / "rdsCache.json"
+    path.write_text(content)
+    cache = RdsCache(str(path))
+    assert not cache.stations and not cache.lastPi
+    assert "ignored" in capsys.readouterr().out
+    # Still usable, and saved over the bad file
+    learnStation(cache)
+    cache.save()
+    assert RdsCache(str(path)).stations == cache.stations
@@ -0,0 +1,82 @@
+# This Python file uses the following encoding: utf-8
+"""
+ EBU (IEC 62106 annex E) character table
+"""
+
+import pytest
+
+from rdscharset import EBU_DECODING, ebuDecode, ebuEncode
+
+# Codes shown differently from ASCII / Latin-1
+DIFFERENT = {
+    0x24: "¤", 0x5E: "―", 0x60: "‖", 0x7E: "¯", 0x7F: " ",
+    0x80: "á", 0x81: "à", 0x82: "é", 0x83: "è", 0x84: "í", 0x85: "ì", 0x86: "ó", 0x87: "ò",
+    0x88: "ú", 0x89: "ù", 0x8A: "Ñ", 0x8B: "Ç", 0x8C: "Ş", 0x8D: "ß", 0x8E: "¡", 0x8F: "Ĳ",
+    0x90: "â", 0x91: "ä", 0x92: "ê", 0x93: "ë", 0x94: "î", 0x95: "ï", 0x96: "ô", 0x97: "ö",
+    0x98: "û", 0x99: "ü", 0x9A: "ñ", 0x9B: "ç", 0x9C: "ş", 0x9D: "ǧ", 0x9E: "ı", 0x9F: "ĳ",
+    0xA0: "ª", 0xA1: "α", 0xA2: "©", 0xA3: "‰", 0xA4: "Ǧ", 0xA5: "ě", 0xA6: "ň", 0xA7: "ő",
+    0xA8: "π", 0xA9: "€", 0xAA: "£", 0xAB: "$", 0xAC: "←", 0xAD: "↑", 0xAE: "→", 0xAF: "↓",
+    0xB0: "º", 0xB1: "¹", 0xB2: "²", 0xB3: "³", 0xB4: "±", 0xB5: "İ", 0xB6: "ń", 0xB7: "ű",
+    0xB8: "µ", 0xB9: "¿", 0xBA: "÷", 0xBB: "°", 0xBC: "¼", 0xBD: "½", 0xBE: "¾", 0xBF: "§",
+    0xC0: "Á", 0xC1: "À", 0xC2: "É", 0xC3: "È", 0xC4: "Í", 0xC5: "Ì", 0xC6: "Ó", 0xC7: "Ò",
+    0xC8: "Ú", 0xC9: "Ù", 0xCA: "Ř", 0xCB: "Č", 0xCC: "Š", 0xCD: "Ž", 0xCE: "Đ", 0xCF: "Ŀ",
+    0xD0: "Â", 0xD1: "Ä", 0xD2: "Ê", 0xD3: "Ë", 0xD4: "Î", 0xD5: "Ï", 0xD6: "Ô", 0xD7: "Ö",
+    0xD8: "Û", 0xD9: "Ü", 0xDA: "ř", 0xDB: "č", 0xDC: "š", 0xDD: "ž", 0xDE: "đ", 0xDF: "ŀ",
+    0xE0: "Ã", 0xE1: "Å", 0xE2: "Æ", 0xE3: "Œ", 0xE4: "ŷ", 0xE5: "Ý", 0xE6: "Õ", 0xE7: "Ø",
+    0xE8: "Þ", 0xE9: "Ŋ", 0xEA: "Ŕ", 0xEB: "Ć", 0xEC: "Ś", 0xED: "Ź", 0xEE: "Ŧ", 0xEF: "ð",
+    0xF0: "ã", 0xF1: "å", 0xF2: "æ", 0xF3: "œ", 0xF4: "ŵ", 0xF5: "ý", 0xF6: "õ", 0xF7: "ø",
+    0xF8: "þ", 0xF9: "ŋ", 0xFA: "ŕ", 0xFB: "ć", 0xFC: "ś", 0xFD: "ź", 0xFE: "ŧ", 0xFF: " ",
+}
+
+
+def test_table_size():
+    assert len(EBU_DECODING) == 256
+
+
+@pytest.mark.parametrize("code, char", sorted(DIFFERENT.items()))
+def test_different_from_latin1(code, char):
+    assert EBU_DECODING[code] == char
+    assert ebuDecode(bytes([code])) == char
+
+
+def test_ascii():
+    same = [code for code in range(0x20, 0x7F) if code not in DIFFERENT]
+    assert ebuDecode(bytes(same)) == bytes(same).decode("ascii")
+
+
+@pytest.mark.parametrize("code", [0x00, 0x0A, 0x0B, 0x0D, 0x1F])
+def test_control_codes_are_spaces(code):
+    assert ebuDecode(bytes([code])) == " "
+
+
+def test_decode_keeps_width():
+    data = bytes(range(256))
+    assert len(ebuDecode(data)) == 256
+    assert ebuDecode(bytearray(data)) == ebuDecode(memoryview(data)) == EBU_DECODING
+
+
+def test_encode_every_character():
+    for code in range(0x21, 0xFF):
+        if code != 0x7F:
+            assert ebuEncode(EBU_DECODING[code]) == bytes([code]), hex(code)
+
+
+def test_space_is_0x20():
+    assert ebuEncode(" ") == b" "
+
+
+def test_round_trip():
+    text = "Fréquence Hérault, à écouter: Œuvres d'Ève, 5 € ou 4 £"
+    data = ebuEncode(text)
+    assert len(data) == len(text)
+    assert ebuDecode(data) == text
+
+
+def test_dollar_and_currency():
+    assert ebuEncode("$¤") == b"\xab\x24"
+    assert ebuDecode(b"\x24\xab") == "¤$"
+
+
+def test_unmappable_replaced():
+    assert ebuEncode("Radio 日本 ~") == b"Radio ?? ?"
+    assert ebuDecode(ebuEncode("ÿ")) == "?"
@@ -0,0 +1,83 @@
+# This Python file uses the following encoding: utf-8
+"""
+ Input reports built with the byte offsets of the original fm.py parsing
+"""
+
+import pytest
+
+from reports import (parseReport, sizes, PartInfo, SystemState, FunctionInfo, RsqStatus, AcfStatus, RdsStatus,
+                     PART_INFO, SYS_STATE, FUNC_INFO, RSQ_STATUS, ACF_STATUS, RDS_STATUS)
+
+
+def report(code, **fields):
+    """40 bytes report of code with fields {offset: byte}"""
+    data = bytearray(40)
+    data[0] = code
+    for offset, value in fields.items():
+        data[int(offset[1:])] = value & 0xFF
+    return bytes(data)
+
+
+def test_part_info():
+    data = bytearray(report(PART_INFO, b12=0x4684 & 0xFF, b13=0x4684 >> 8))
+    data[27:39] = b"PIC18F25K50 "
+    record = parseReport(data)
+    assert type(record) is PartInfo
+    assert record.skyworksPart == data[13] * 256 + data[12] == 0x4684
+    assert record.microchipPart == "".join(chr(byte) for byte in data[27:39])
+
+
+def test_system_state():
+    record = parseReport(report(SYS_STATE, b8=1))
+    assert type(record) is SystemState
+    assert record.image == 1
+
+
+def test_function_info():
+    record = parseReport(report(FUNC_INFO, b8=6, b9=0, b10=5, b16=1, b17=2, b18=3))
+    assert type(record) is FunctionInfo
+    assert record.siRevision == (6, 0, 5)
+    assert record.picRevision == (1, 2, 3)
+
+
+def test_rsq_status():
+    data = report(RSQ_STATUS, b10=8960 & 0xFF, b11=8960 >> 8, b12=-3, b13=42, b14=-1, b15=17)
+    record = parseReport(data)
+    assert type(record) is RsqStatus
+    assert record.channel == data[11] * 256 + data[10] == 8960
+    assert (record.offset, record.rssi, record.snr, record.multipath) == (-3, 42, -1, 17)
+
+
+def test_acf_status():
+    record = parseReport(report(ACF_STATUS, b10=0xE5, b11=30, b12=0x80 | 64))
+    assert type(record) is AcfStatus
+    assert record.softMute == 5
+    assert record.highCut == 30
+    assert record.stereo
+    assert record.blend == 64
+    assert not parseReport(report(ACF_STATUS, b12=100)).stereo
+
+
+def test_rds_status():
+    data = report(RDS_STATUS, b16=0x01, b17=0xF2, b18=0x08, b19=0x20, b20=0x41, b21=0x42, b22=0x43, b23=0x44)
+    record = parseReport(data)
+    assert type(record) is RdsStatus
+    assert (record.a, record.b, record.c, record.d) == (0xF201, 0x2008, 0x4241, 0x4443)
+
+
+def test_buffer_types():
+    data = report(RSQ_STATUS, b10=0x10, b11=0x27)
+    for buffer in (bytearray(data), memoryview(data)):
+        assert parseReport(buffer).channel == 10000
+
+
+@pytest.mark.parametrize("data", [b"", b"\x00" * 40, b"\xff" + bytes(39)])
+def test_unknown(data):
+    assert parseReport(data) is None
+
+
+@pytest.mark.parametrize("code", sorted(sizes))
+def test_truncated(code):
+    data = report(code)
+    assert parseReport(data[:sizes[code] - 1]) is None
+    assert parseReport(data[:sizes[code]]) is not None
@@ -0,0 +1,161 @@
+# This Python file uses the following encoding: utf-8
+"""
+ TransactionManager: resources, response matching, cancel and timeouts
+"""
+
+import time
+import pytest
+
+from transactions import TransactionManager, TransactionTimeout, TransactionCancelled
+from commands import (STAND_BY_COMMAND, POWER_UP_COMMAND, SEEK_UP_COMMAND, tuneCommand, setPropertyCommand,
+                      PROPERTY_VOLUME, PROPERTY_MUTE)
+from reports import RsqStatus, AcfStatus, PartInfo
+
+
+def rsq(channel):
+    return RsqStatus(channel, 0, 40, 20, 0)
+
+
+@pytest.fixture
+def manager():
+    """TransactionManager writing at once, written commands in manager.written"""
+    written = []
+
+    def send(command, transaction):
+        written.append(command)
+        manager.sent(command, transaction)
+
+    manager = TransactionManager(send)
+    manager.written = written
+    return manager
+
+
+def test_tune_matches_its_channel(manager):
+    tune = manager.submit(tuneCommand(8960))
+    assert manager.written == [tuneCommand(8960)]
+    manager.onReport(rsq(10000))
+    assert not tune.done()
+    manager.onReport(rsq(8960))
+    assert tune.wait(0).channel == 8960
+    assert "tune" in manager.latency
+    assert not manager.pending("channel")
+
+
+def test_seek_matches_another_channel(manager):
+    manager.onReport(rsq(8960))
+    seek = manager.submit(SEEK_UP_COMMAND)
+    manager.onReport(rsq(8960))
+    assert not seek.done()
+    manager.onReport(rsq(9120))
+    assert seek.wait(0).channel == 9120
+
+
+def test_response_code(manager):
+    power = manager.submit(POWER_UP_COMMAND)
+    manager.onReport(AcfStatus(0, 0, 0))
+    manager.onReport(rsq(8960))
+    assert not power.done()
+    manager.onReport(PartInfo(4684, "PIC"))
+    assert power.wait(0).skyworksPart == 4684
+
+
+def test_done_once_written(manager):
+    transaction = manager.submit(setPropertyCommand(PROPERTY_VOLUME, 20))
+    assert transaction.done()
+    assert transaction.wait(0) is None
+    assert manager.submit(STAND_BY_COMMAND).done()
+    assert manager.inFlight == []
+
+
+def test_not_sent_not_completed():
+    queued = []
+    manager = TransactionManager(lambda command, transaction: queued.append(transaction))
+    tune = manager.submit(tuneCommand(8960))
+    # The response of an earlier tune, before this one is written
+    manager.onReport(rsq(8960))
+    assert not tune.done()
+    manager.sent(tune.command, tune)
+    manager.onReport(rsq(8960))
+    assert tune.done()
+
+
+def test_busy_resource_cancelled(manager):
+    first = manager.submit(tuneCommand(8960))
+    done = []
+    second = manager.submit(tuneCommand(9120), onDone=done.append)
+    with pytest.raises(TransactionCancelled):
+        first.wait(0)
+    assert manager.cancelledCount == 1
+    assert manager.inFlight == [second]
+    manager.onReport(rsq(9120))
+    assert done == [second]
+
+
+def test_resources_independent(manager):
+    tune = manager.submit(tuneCommand(8960))
+    power = manager.submit(POWER_UP_COMMAND)
+    manager.submit(setPropertyCommand(PROPERTY_MUTE, 0))
+    assert manager.inFlight == [tune, power]
+    assert manager.pending("channel") and manager.pending("power")
+    assert not manager.pending(("property", PROPERTY_MUTE))
+
+
+def test_stale_sent_ignored(manager):
+    first = manager.submit(tuneCommand(8960))
+    sent = first.sent
+    manager.submit(tuneCommand(8960))
+    # The writer reporting the cancelled transaction doesn't touch the new one
+    manager.sent(first.command, first)
+    assert first.sent == sent
+
+
+def test_timeout_on_report(manager):
+    tune = manager.submit(tuneCommand(8960), timeout=0.01)
+    time.sleep(0.02)
+    manager.onReport(rsq(8960))
+    with pytest.raises(TransactionTimeout):
+        tune.wait(0)
+    assert manager.timeoutCount == 1
+
+
+def test_timeout_without_report(manager):
+    # A quiet device: pending() times the transaction out
+    done = []
+    tune = manager.submit(tuneCommand(8960), timeout=0.01, onDone=done.append)
+    assert manager.pending("channel")
+    time.sleep(0.02)
+    assert not manager.pending("channel")
+    assert done == [tune]
+    assert isinstance(tune.error, TransactionTimeout)
+
+
+def test_timeout_on_submit(manager):
+    power = manager.submit(POWER_UP_COMMAND, timeout=0.01)
+    time.sleep(0.02)
+    manager.submit(tuneCommand(8960))
+    assert isinstance(power.error, TransactionTimeout)
+    assert manager.timeoutCount == 1 and manager.cancelledCount == 0
+
+
+def test_wait_timeout():
+    manager = TransactionManager(lambda command, transaction: None)
+    with pytest.raises(TransactionTimeout):
+        manager.submit(tuneCommand(8960)).wait(0.01)
+
+
+def test_cancel_all(manager):
+    tune = manager.submit(tuneCommand(8960))
+    power = manager.submit(POWER_UP_COMMAND)
+    manager.cancelAll()
+    assert manager.inFlight == []
+    for transaction in (tune, power):
+        with pytest.raises(TransactionCancelled):
+            transaction.wait(0)
+
+
+def test_histogram(manager):
+    tune = manager.submit(tuneCommand(8960))
+    manager.onReport(rsq(8960))
+    assert sum(manager.histograms["tune"].values()) == 1
+    assert len(manager.latency["tune"]) == 1
+    assert tune.response is not None
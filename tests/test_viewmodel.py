@@ -0,0 +1,111 @@
+# This Python file uses the following encoding: utf-8
+"""
+ ViewModel: values applied once per flush, in order, only when changed
+"""
+
+from viewmodel import ViewModel
+
+
+class Widget:
+    """Records the setter calls of its properties in a shared log"""
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def setText(self, value):
+        self.log.append((self.name + ".setText", value))
+
+    def setEnabled(self, value):
+        self.log.append((self.name + ".setEnabled", value))
+
+
+def test_same_value_twice_then_changed():
+    log = []
+    model = ViewModel()
+    ps = Widget("ps", log)
+    model.set(ps.setText, "STATIONA")
+    model.flush()
+    model.set(ps.setText, "STATIONA")
+    model.flush()
+    assert log == [("ps.setText", "STATIONA")]
+    assert model.flushCount == 1
+    model.set(ps.setText, "STATIONB")
+    model.flush()
+    assert log[1:] == [("ps.setText", "STATIONB")]
+    assert model.setCount == 3 and model.applyCount == 2
+
+
+def test_latest_value_applied_once():
+    log = []
+    model = ViewModel()
+    rt = Widget("rt", log)
+    for text in ("a", "ab", "abc"):
+        model.set(rt.setText, text)
+    model.flush()
+    assert log == [("rt.setText", "abc")]
+
+
+def test_back_to_shown_value_skipped():
+    log = []
+    model = ViewModel()
+    ps = Widget("ps", log)
+    model.set(ps.setText, "A")
+    model.flush()
+    model.set(ps.setText, "B")
+    model.set(ps.setText, "A")
+    assert not model.dirty
+    model.flush()
+    assert log == [("ps.setText", "A")]
+
+
+def test_flush_order_of_first_change():
+    log = []
+    model = ViewModel()
+    seek = Widget("seek", log)
+    ps = Widget("ps", log)
+    model.set(seek.setEnabled, False)
+    model.set(ps.setText, "A")
+    model.set(seek.setEnabled, True)
+    model.set(ps.setText, "B")
+    model.flush()
+    assert log == [("seek.setEnabled", True), ("ps.setText", "B")]
+
+
+def test_unchanged_values_skipped_in_a_flush():
+    log = []
+    model = ViewModel()
+    ps, rt = Widget("ps", log), Widget("rt", log)
+    model.set(ps.setText, "A")
+    model.set(rt.setText, "x")
+    model.flush()
+    model.set(ps.setText, "A")
+    model.set(rt.setText, "y")
+    model.flush()
+    assert log == [("ps.setText", "A"), ("rt.setText", "x"), ("rt.setText", "y")]
+
+
+def test_on_dirty_once_per_frame():
+    calls = []
+    model = ViewModel(onDirty=lambda: calls.append(1))
+    ps, rt = Widget("ps", []), Widget("rt", [])
+    model.set(ps.setText, "A")
+    model.set(rt.setText, "x")
+    assert len(calls) == 1
+    model.flush()
+    model.set(ps.setText, "A")
+    assert len(calls) == 1
+    model.set(ps.setText, "B")
+    assert len(calls) == 2
+
+
+def test_forget():
+    log = []
+    model = ViewModel()
+    ps = Widget("ps", log)
+    model.set(ps.setText, "A")
+    model.flush()
+    model.forget()
+    model.set(ps.setText, "A")
+    model.flush()
+    assert log == [("ps.setText", "A")] * 2
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+
+"""
+Widget HID trace window
+
+Shows the last reports of a TraceBuffer, refreshed at display rate and
+only while the window is visible. Freeze takes a snapshot of the whole
+ring buffer which can be scrolled and exported.
+
+Author: Alain the cat
+Website: mao2.fr
+
+"""
+
+from PySide6.QtWidgets import QWidget, QPlainTextEdit, QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QFont
+
+
+class TraceView(QWidget):
+
+    def __init__(self, trace, lines=200, interval=33):
+        super().__init__()
+
+        self.trace = trace
+        self.lines = lines
+        self.shown = -1
+        self.snapshot = None
+
+        self.initUI()
+
+        # Display rate refresh, running only while the window is shown
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.refresh)
+
+    def initUI(self):
+
+        self.setWindowTitle("HID trace")
+        self.resize(900, 400)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Monospace", 9))
+        self.text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.pushButtonFreeze = QPushButton("Freeze")
+        self.pushButtonFreeze.setCheckable(True)
+        self.pushButtonFreeze.toggled.connect(self.freeze)
+        self.pushButtonExport = QPushButton("Export")
+        self.pushButtonExport.clicked.connect(self.export)
+        self.pushButtonClear = QPushButton("Clear")
+        self.pushButtonClear.clicked.connect(self.clear)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.pushButtonFreeze)
+        buttons.addWidget(self.pushButtonExport)
+        buttons.addWidget(self.pushButtonClear)
+        buttons.addStretch()
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.text)
+        layout.addLayout(buttons)
+
+    def showEvent(self, e):
+        self.shown = -1
+        if self.snapshot is None:
+            self.timer.start()
+        super().showEvent(e)
+
+    def hideEvent(self, e):
+        self.timer.stop()
+        super().hideEvent(e)
+
+    def refresh(self):
+        """Renders the last reports if some came since the last refresh"""
+        if self.trace.count == self.shown:
+            return
+        self.shown = self.trace.count
+        entries = self.trace.entries(self.trace.count - self.lines)
+        self.text.setPlainText("\n".join(self.trace.render(entries)))
+        self.text.verticalScrollBar().setValue(self.text.verticalScrollBar().maximum())
+
+    def freeze(self, frozen):
+        """Stops the refresh and shows every report of the ring buffer"""
+        if frozen:
+            self.timer.stop()
+            self.snapshot = self.trace.entries()
+            self.text.setPlainText("\n".join(self.trace.render(self.snapshot)))
+        else:
+            self.snapshot = None
+            self.shown = -1
+            self.timer.start()
+
+    def export(self):
+        """Saves the frozen snapshot, or the whole ring buffer, to a text file"""
+        path, selected = QFileDialog.getSaveFileName(self, "Export trace", "trace.txt", "Text (*.txt)")
+        if path:
+            self.trace.export(path, self.snapshot)
+
+    def clear(self):
+        self.trace.clear()
+        self.shown = -1
+        if self.snapshot is not None:
+            self.snapshot = []
+            self.text.setPlainText("")
+        else:
+            self.refresh()
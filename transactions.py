@@ -0,0 +1,275 @@
+# This Python file uses the following encoding: utf-8
+"""
+ AN649 command transactions
+
+ Each command written to the FM tuner becomes a Transaction tagged with
+ the response it waits for:
+   0x01 power up       -> 0x08 GET_PART_INFO
+   0x30 FM_TUNE_FREQ   -> 0x32 FM_RSQ_STATUS on the requested channel
+   0x31 FM_SEEK_START  -> 0x32 FM_RSQ_STATUS on another channel
+   0x00 stand by, 0x13 SET_PROPERTY -> done once written
+ The parsed reports are fed to the TransactionManager, which completes the
+ oldest matching transaction. Transactions on different resources (channel,
+ power, each property) are in flight at the same time, a new transaction
+ on a busy resource cancels the previous one (the last tune wins).
+ A transaction past its deadline times out at the next report, submit()
+ or pending() call.
+ The round trip time, from the write to the response, is kept per command.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+import threading
+import time
+from collections import deque
+from reports import PART_INFO, SYS_STATE, FUNC_INFO, RSQ_STATUS, ACF_STATUS, RDS_STATUS
+from reports import PartInfo, SystemState, FunctionInfo, RsqStatus, AcfStatus, RdsStatus
+
+
+COMMAND_NAMES = {0x00: "stand by", 0x01: "power up", 0x13: "set property", 0x30: "tune", 0x31: "seek"}
+
+# Parsed record type -> response code
+RECORD_CODES = {PartInfo: PART_INFO, SystemState: SYS_STATE, FunctionInfo: FUNC_INFO, RsqStatus: RSQ_STATUS,
+                AcfStatus: ACF_STATUS, RdsStatus: RDS_STATUS}
+
+
+class TransactionError(Exception):
+    pass
+
+
+class TransactionTimeout(TransactionError):
+    pass
+
+
+class TransactionCancelled(TransactionError):
+    pass
+
+
+class Transaction:
+    """
+        Command waiting for its response
+        ...
+    Attributes:
+        command: bytes, command written to the device
+        name: string, command name ("tune", "seek" ...)
+        resource: hashable, what the command changes, one transaction in flight per resource
+        codes: tuple, response codes completing the transaction, empty when done once written
+        match: callable(record), None or a test of the response record
+        deadline: float, time.perf_counter() of the timeout
+        sent: int, time.perf_counter_ns() of the write, 0 before
+        response: record of the response (RsqStatus ...), None before
+        error: TransactionError, None if not failed
+    """
+
+    def __init__(self, command, name, resource, codes, match, timeout):
+        """ initializes Transaction class """
+        self.command = command
+        self.name = name
+        self.resource = resource
+        self.codes = codes
+        self.match = match
+        self.deadline = time.perf_counter() + timeout
+        self.sent = 0
+        self.response = None
+        self.error = None
+        self.onDone = None
+        self._done = threading.Event()
+
+    def done(self):
+        """True once completed, cancelled or timed out"""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Waits for the response, never call it from the thread feeding the reports
+
+        Args:
+            timeout: float, seconds, the transaction timeout if None
+
+        Returns:
+            response: record of the response, None for a command without response
+        """
+        if timeout is None:
+            timeout = max(0.0, self.deadline - time.perf_counter())
+        if not self._done.wait(timeout):
+            raise TransactionTimeout(self.name + " timed out")
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+    def finish(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self._done.set()
+        if self.onDone is not None:
+            self.onDone(self)
+
+
+class TransactionManager:
+    """
+        Correlates the commands with their responses
+        ...
+    Attributes:
+        send: callable(command, transaction), writes or queues a command
+            (CommandWriter.send), sent() is called with the same transaction once written
+        timeout: float, default transaction timeout in seconds
+        channel: int, channel of the last 0x32 response, None before
+        inFlight: list of Transaction, in submit order
+        latency: dict, command name -> deque of round trip times in ns
+        histograms: dict, command name -> {bucket: count}, bucket is the
+            upper bound in ms of the round trip time (1, 2, 4, 8 ...)
+        timeoutCount: int, number of transactions timed out
+        cancelledCount: int, number of transactions cancelled by a newer one
+    """
+
+    def __init__(self, send, timeout=1.0):
+        """ initializes TransactionManager class """
+        self.send = send
+        self.timeout = timeout
+        self.channel = None
+        self.inFlight = []
+        self.latency = {}
+        self.histograms = {}
+        self.timeoutCount = 0
+        self.cancelledCount = 0
+        self._lock = threading.Lock()
+
+    def expectation(self, command):
+        """Returns (name, resource, codes, match) of a command"""
+        code = command[1]
+        name = COMMAND_NAMES.get(code, "0x{:02x}".format(code))
+        match code:
+            case 0x01:
+                return name, "power", (PART_INFO,), None
+            case 0x00:
+                return name, "power", (), None
+            case 0x30:
+                channel = command[3] | command[4] << 8
+                return name, "channel", (RSQ_STATUS,), lambda record: record.channel == channel
+            case 0x31:
+                start = self.channel
+                return name, "channel", (RSQ_STATUS,), lambda record: record.channel != start
+            case 0x13:
+                return name, ("property", command[3] | command[4] << 8), (), None
+        return name, code, (), None
+
+    def submit(self, command, timeout=None, onDone=None):
+        """Sends a command and returns its transaction
+
+        Args:
+            command: bytes, 16 bytes command
+            timeout: float, seconds, the manager timeout if None
+            onDone: callable(transaction), called once done, on the thread
+                completing it (the writer or the report feeder)
+
+        Returns:
+            transaction: Transaction
+        """
+        command = bytes(command)
+        transaction = Transaction(command, *self.expectation(command),
+                                  self.timeout if timeout is None else timeout)
+        transaction.onDone = onDone
+        with self._lock:
+            expired = self.expired()
+            cancelled = [other for other in self.inFlight if other.resource == transaction.resource]
+            for other in cancelled:
+                self.inFlight.remove(other)
+            self.inFlight.append(transaction)
+            self.cancelledCount += len(cancelled)
+        self.timedOut(expired)
+        for other in cancelled:
+            other.finish(error=TransactionCancelled(other.name + " cancelled by " + transaction.name))
+        self.send(command, transaction)
+        return transaction
+
+    def sent(self, command, transaction):
+        """The writer wrote a command, starts the round trip time of its transaction
+
+        Args:
+            command: bytes, command written
+            transaction: Transaction given to send(), None for a command
+                written outside of the transactions (property change)
+        """
+        now = time.perf_counter_ns()
+        with self._lock:
+            # By identity: a cancelled transaction re-submitted has the same command
+            if transaction is None or transaction not in self.inFlight:
+                return
+            transaction.sent = now
+            if transaction.codes:
+                return
+            self.inFlight.remove(transaction)
+        self.record(transaction, now)
+        transaction.finish()
+
+    def onReport(self, record):
+        """Completes the oldest transaction waiting for record
+
+        Args:
+            record: parsed report (reports.parseReport)
+        """
+        now = time.perf_counter_ns()
+        code = RECORD_CODES.get(type(record))
+        if code == RSQ_STATUS:
+            self.channel = record.channel
+        completed = None
+        with self._lock:
+            if not self.inFlight:
+                return
+            expired = self.expired()
+            for transaction in self.inFlight:
+                if (transaction.sent and code in transaction.codes
+                        and (transaction.match is None or transaction.match(record))):
+                    completed = transaction
+                    break
+            if completed is not None:
+                self.inFlight.remove(completed)
+        self.timedOut(expired)
+        if completed is not None:
+            self.record(completed, now)
+            completed.finish(record)
+
+    def record(self, transaction, now):
+        """Adds the round trip time of a transaction to its histogram"""
+        rtt = now - transaction.sent
+        self.latency.setdefault(transaction.name, deque(maxlen=1024)).append(rtt)
+        histogram = self.histograms.setdefault(transaction.name, {})
+        bucket = 1
+        while bucket * 1000000 < rtt:
+            bucket *= 2
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def expired(self):
+        """Removes the transactions past their deadline, called with the lock held
+
+        Returns:
+            expired: list of Transaction, to be finished by timedOut() out of the lock
+        """
+        now = time.perf_counter()
+        expired = [transaction for transaction in self.inFlight if transaction.deadline < now]
+        for transaction in expired:
+            self.inFlight.remove(transaction)
+        self.timeoutCount += len(expired)
+        return expired
+
+    def timedOut(self, expired):
+        """Finishes the transactions removed by expired()"""
+        for transaction in expired:
+            transaction.finish(error=TransactionTimeout(transaction.name + " timed out"))
+
+    def pending(self, resource):
+        """True if a transaction on resource is in flight, the expired ones
+        time out here too (a quiet device sends no report to time them out)"""
+        with self._lock:
+            expired = self.expired()
+            busy = any(transaction.resource == resource for transaction in self.inFlight)
+        self.timedOut(expired)
+        return busy
+
+    def cancelAll(self):
+        """Cancels every transaction in flight (device closed)"""
+        with self._lock:
+            cancelled = self.inFlight
+            self.inFlight = []
+        for transaction in cancelled:
+            transaction.finish(error=TransactionCancelled(transaction.name + " cancelled"))
@@ -0,0 +1,83 @@
+# This Python file uses the following encoding: utf-8
+"""
+ View model of the control panel
+
+ The decoders store the latest value of each widget property here instead
+ of calling the widget. The values are applied once per frame, and only
+ those which differ from what the widget shows: a stable station costs a
+ few dict lookups per report and no widget call, no relayout, no repolish.
+
+ A property is identified by its setter, a bound method like
+ lineEditPS.setText, or any callable kept for the life of the widget.
+ The changed values are applied in the order of their first change since
+ the previous frame, so setEnabled() set before setValue() is applied first.
+
+ Author: Alain the cat
+ Website: mao2.fr
+"""
+
+
+_missing = object()
+
+
+class ViewModel:
+    """
+        Latest state of the widgets and what they show
+        ...
+    Attributes:
+        onDirty: callable(), called when a first property changes after a
+            flush, typically starts the frame timer
+        state: dict, setter -> latest value
+        shown: dict, setter -> value applied to the widget
+        dirty: dict, setters to apply at the next flush, in the order of their first change
+        setCount: int, number of set() calls
+        applyCount: int, number of setter calls done by flush()
+        flushCount: int, number of flush() calls applying something
+    """
+
+    def __init__(self, onDirty=None):
+        """ initializes ViewModel class """
+        self.onDirty = onDirty
+        self.state = {}
+        self.shown = {}
+        self.dirty = {}
+        self.setCount = 0
+        self.applyCount = 0
+        self.flushCount = 0
+
+    def set(self, setter, value):
+        """Stores the latest value of a widget property
+
+        Args:
+            setter: callable(value), applies the value to the widget
+            value: new value, compared with == to the shown one
+        """
+        self.setCount += 1
+        self.state[setter] = value
+        if self.shown.get(setter, _missing) == value:
+            self.dirty.pop(setter, None)
+            return
+        if not self.dirty:
+            self.dirty[setter] = None
+            if self.onDirty is not None:
+                self.onDirty()
+        else:
+            self.dirty[setter] = None
+
+    def flush(self):
+        """Applies the changed values to the widgets"""
+        if not self.dirty:
+            return
+        dirty = self.dirty
+        self.dirty = {}
+        self.flushCount += 1
+        for setter in dirty:
+            value = self.state[setter]
+            setter(value)
+            self.shown[setter] = value
+            self.applyCount += 1
+
+    def forget(self):
+        """The widgets were changed outside of the view model, the next
+        values are applied even if unchanged"""
+        self.shown.clear()